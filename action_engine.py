@@ -17,7 +17,8 @@ def execute(action_data, user_input):
         print("Assistant: Meeting scheduled at default time.")
 
     elif action == "store_task":
-       add_task(action_data["task"], action_data["time"])
+       add_task(action_data["task"], action_data["time"], action_data.get("person"),
+                action_data.get("timestamp"))
        print(f"Assistant: Task saved for {action_data['time']}")
 
 
@@ -26,6 +27,11 @@ def execute(action_data, user_input):
         if context:
             print(f"Assistant: I remember you said: {context['match']}")
             print(f"Relevance Score: {context['score']:.2f}")
+            related = context.get("matches", [])[1:]
+            if related:
+                print("Other related memories:")
+                for memory in related:
+                    print(f"  - {memory['match']} ({memory['score']:.2f})")
         else:
             print("Assistant: No relevant memory found.")
 
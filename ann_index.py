@@ -0,0 +1,270 @@
+"""
+Approximate nearest-neighbour search over normalised embeddings.
+
+A pure Python/NumPy implementation of HNSW (Malkov & Yashunin, 2016):
+a layered proximity graph where upper layers are sparse long-range links
+and layer 0 links every vector to its nearest neighbours. Queries descend
+greedily from the top layer and then run a best-first search of width
+``ef`` on layer 0, so cost grows roughly with log(n) instead of n.
+
+Similarity is the dot product, i.e. cosine similarity for unit vectors.
+"""
+
+import heapq
+import math
+import random
+
+import numpy as np
+
+
+class HNSWIndex:
+    """Incremental HNSW graph over unit-length float32 vectors.
+
+    Args:
+        dim: Vector dimensionality
+        M: Links per node on upper layers (layer 0 keeps 2 * M); more links
+           raise recall and memory use
+        ef_construction: Search width while inserting; higher builds a
+           better graph more slowly
+        ef_search: Default search width for queries; the recall/latency knob
+    """
+
+    def __init__(self, dim, M=16, ef_construction=100, ef_search=50, seed=0):
+        self.dim = dim
+        self.M = M
+        self.M0 = 2 * M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.seed = seed
+        self.level_multiplier = 1.0 / math.log(max(M, 2))
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.count = 0
+        self.levels = []
+        self.neighbors = []  # neighbors[node][layer] -> list of node ids
+        self.entry_point = None
+        self.max_level = -1
+        self._rng = random.Random(seed)
+
+    def __len__(self):
+        return self.count
+
+    # ----- internals -----
+
+    def _random_level(self):
+        return int(-math.log(1.0 - self._rng.random()) * self.level_multiplier)
+
+    def _ensure_capacity(self, rows):
+        capacity = self.vectors.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(1024, capacity)
+        while new_capacity < rows:
+            new_capacity *= 2
+        vectors = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        vectors[:self.count] = self.vectors[:self.count]
+        self.vectors = vectors
+
+    def _greedy_closest(self, query, node, layer):
+        """Hill-climb on one layer towards the query (ef = 1)"""
+        best = node
+        best_sim = float(self.vectors[node] @ query)
+        improved = True
+        while improved:
+            improved = False
+            candidates = self.neighbors[best][layer]
+            if not candidates:
+                break
+            sims = self.vectors[candidates] @ query
+            i = int(np.argmax(sims))
+            if sims[i] > best_sim:
+                best_sim = float(sims[i])
+                best = candidates[i]
+                improved = True
+        return best
+
+    def _search_layer(self, query, entry_points, ef, layer):
+        """Best-first search; returns up to ef (similarity, node), best first"""
+        vectors = self.vectors
+        neighbors = self.neighbors
+        visited = set(entry_points)
+        sims = (vectors[entry_points] @ query).tolist()
+
+        # candidates: max-heap on similarity; results: min-heap of the ef best
+        candidates = [(-s, n) for s, n in zip(sims, entry_points)]
+        heapq.heapify(candidates)
+        results = [(s, n) for s, n in zip(sims, entry_points)]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if -neg_sim < results[0][0] and len(results) >= ef:
+                break
+            fresh = [n for n in neighbors[node][layer] if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for n, s in zip(fresh, (vectors[fresh] @ query).tolist()):
+                if len(results) < ef or s > results[0][0]:
+                    heapq.heappush(candidates, (-s, n))
+                    heapq.heappush(results, (s, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _select_neighbors(self, candidates, M):
+        """HNSW neighbour-selection heuristic.
+
+        Walks candidates from most to least similar and keeps one only if it
+        is closer to the base vector than to every neighbour already kept,
+        which preserves links in different directions; remaining slots are
+        topped up with the closest pruned candidates.
+        """
+        if len(candidates) <= M:
+            return [n for _, n in candidates]
+        ids = [n for _, n in candidates]
+        # One Gram matrix instead of a matrix-vector product per candidate
+        gram = (self.vectors[ids] @ self.vectors[ids].T).tolist()
+        selected = []
+        pruned = []
+        for i, (sim, _) in enumerate(candidates):
+            if len(selected) >= M:
+                break
+            row = gram[i]
+            if any(row[j] >= sim for j in selected):
+                pruned.append(i)
+            else:
+                selected.append(i)
+        for i in pruned:
+            if len(selected) >= M:
+                break
+            selected.append(i)
+        return [ids[i] for i in selected]
+
+    def _shrink(self, node, layer):
+        # Back-links may overshoot the limit by half before the heuristic
+        # prunes them, so pruning runs once per several inserts instead of
+        # on every one.
+        links = self.neighbors[node][layer]
+        limit = self.M0 if layer == 0 else self.M
+        if len(links) <= limit + limit // 2:
+            return
+        sims = (self.vectors[links] @ self.vectors[node]).tolist()
+        ranked = sorted(zip(sims, links), reverse=True)
+        self.neighbors[node][layer] = self._select_neighbors(ranked, limit)
+
+    # ----- public API -----
+
+    def add(self, vector):
+        """Insert one vector; returns its node id"""
+        vector = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        node = self.count
+        self._ensure_capacity(node + 1)
+        self.vectors[node] = vector
+        self.count += 1
+
+        level = self._random_level()
+        self.levels.append(level)
+        self.neighbors.append([[] for _ in range(level + 1)])
+
+        if self.entry_point is None:
+            self.entry_point = node
+            self.max_level = level
+            return node
+
+        entry = self.entry_point
+        for layer in range(self.max_level, level, -1):
+            entry = self._greedy_closest(vector, entry, layer)
+
+        entry_points = [entry]
+        for layer in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(vector, entry_points, self.ef_construction, layer)
+            selected = self._select_neighbors(found, self.M0 if layer == 0 else self.M)
+            self.neighbors[node][layer] = selected
+            for other in selected:
+                self.neighbors[other][layer].append(node)
+                self._shrink(other, layer)
+            entry_points = [n for _, n in found]
+
+        if level > self.max_level:
+            self.entry_point = node
+            self.max_level = level
+        return node
+
+    def add_many(self, vectors):
+        return [self.add(v) for v in np.asarray(vectors, dtype=np.float32)]
+
+    def search(self, query, k=1, ef=None):
+        """Return up to k (node, similarity) pairs, most similar first"""
+        if self.entry_point is None or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        ef = max(ef or self.ef_search, k)
+
+        entry = self.entry_point
+        for layer in range(self.max_level, 0, -1):
+            entry = self._greedy_closest(query, entry, layer)
+        found = self._search_layer(query, [entry], ef, 0)
+        return [(node, sim) for sim, node in found[:k]]
+
+    # ----- persistence -----
+
+    def save(self, path):
+        """Write vectors, graph and parameters to a single .npz file"""
+        offsets = [0]
+        flat = []
+        for node_links in self.neighbors:
+            for links in node_links:
+                flat.extend(links)
+                offsets.append(len(flat))
+        np.savez(
+            path,
+            vectors=self.vectors[:self.count],
+            levels=np.asarray(self.levels, dtype=np.int32),
+            offsets=np.asarray(offsets, dtype=np.int64),
+            links=np.asarray(flat, dtype=np.int64),
+            params=np.asarray([
+                self.dim, self.M, self.ef_construction, self.ef_search, self.seed,
+                -1 if self.entry_point is None else self.entry_point, self.max_level,
+            ], dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            dim, M, ef_construction, ef_search, seed, entry_point, max_level = (
+                int(x) for x in data["params"]
+            )
+            index = cls(dim, M=M, ef_construction=ef_construction, ef_search=ef_search, seed=seed)
+            vectors = data["vectors"]
+            levels = data["levels"].tolist()
+            offsets = data["offsets"].tolist()
+            links = data["links"].tolist()
+
+        index._ensure_capacity(len(levels))
+        index.count = len(levels)
+        index.vectors[:index.count] = vectors
+        index.levels = levels
+        position = 0
+        for level in levels:
+            node_links = []
+            for _ in range(level + 1):
+                node_links.append(links[offsets[position]:offsets[position + 1]])
+                position += 1
+            index.neighbors.append(node_links)
+        index.entry_point = None if entry_point < 0 else entry_point
+        index.max_level = max_level
+        # Continue the level sequence rather than replaying it
+        index._rng = random.Random(seed + index.count)
+        return index
+
+
+def exact_search(vectors, query, k=1):
+    """Brute-force top-k by dot product, for measuring recall"""
+    sims = vectors @ query
+    k = min(k, len(sims))
+    top = np.argpartition(-sims, k - 1)[:k]
+    top = top[np.argsort(-sims[top], kind="stable")]
+    return [(int(i), float(sims[i])) for i in top]
@@ -2,7 +2,7 @@ import streamlit as st
 
 # ===== SAFE IMPORT BLOCK =====
 try:
-    from nlp_engine import analyze_input
+    from nlp_engine import analyze_input, analysis_cache_info
     from reasoning_engine import reason
     from action_engine import execute
     from memory_system import load_memory
@@ -42,6 +42,9 @@ if st.button("Run Assistant"):
 
         st.success(buffer.getvalue())
 
+with st.expander("Analysis Cache"):
+    st.json(analysis_cache_info())
+
 st.subheader("Persistent Memory Snapshot")
 
 try:
@@ -9,8 +9,35 @@ from datetime import datetime
 from nlp_engine import analyze_input
 from reasoning_engine import reason
 from action_engine import execute
+from intent_detectors import MODEL_REGISTRY, CascadeIntentDetector, TransformerIntentDetector, preload_models
 
-# Page configuration
+# Detection methods in the sidebar; None is the rule-based engine
+INTENT_BACKENDS = {
+    "Rule-Based": None,
+    "Cascade (rules, then models)": "cascade",
+    "Sentence Transformers": "sentence_transformers",
+    "Sentence Transformers (int8)": "sentence_transformers_int8",
+    "HuggingFace": "huggingface",
+    "Claude API": "claude",
+}
+
+
+@st.cache_resource
+def startup():
+    """Load INTENT_PRELOAD models once per server process"""
+    preload_models()
+
+
+@st.cache_resource
+def intent_detector(backend):
+    # Models come from the process-wide registry, so switching back to a
+    # backend that was used before does not reload anything
+    if backend == "cascade":
+        return CascadeIntentDetector()
+    return TransformerIntentDetector(backend=backend)
+
+
+# Page configuration; must be the first Streamlit call of the script
 st.set_page_config(
     page_title="NIXIN AI - Context Engine",
     page_icon="🤖",
@@ -18,6 +45,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+startup()
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -76,8 +105,10 @@ with st.sidebar:
     st.subheader("Intent Detection")
     intent_backend = st.selectbox(
         "Detection Method",
-        ["Rule-Based", "Sentence Transformers", "HuggingFace", "Claude API"]
+        list(INTENT_BACKENDS)
     )
+    with st.expander("Loaded Models"):
+        st.json(MODEL_REGISTRY.info())
     
     st.subheader("Memory")
     if st.button("📋 Load Memory"):
@@ -119,12 +150,24 @@ if user_input:
     
     # Analyze input
     intent_data = analyze_input(user_input)
+    answered_by = None
+    if INTENT_BACKENDS[intent_backend] == "cascade":
+        detector = intent_detector("cascade")
+        # analyze_input has already run the rules; only escalate its answer
+        intent_data["intent"], intent_data["confidence"], answered_by = detector.classify(
+            user_input, rules=(intent_data["intent"], intent_data["confidence"])
+        )
+    elif INTENT_BACKENDS[intent_backend]:
+        detector = intent_detector(INTENT_BACKENDS[intent_backend])
+        intent_data["intent"], intent_data["confidence"] = detector.detect(user_input)
     
     # Display Results
     col1, col2, col3 = st.columns(3)
     
     with col1:
         st.metric("Intent Detected", intent_data["intent"], delta=None)
+        if answered_by:
+            st.caption(f"Answered by: {answered_by}")
     
     with col2:
         confidence_pct = f"{int(intent_data['confidence'] * 100)}%"
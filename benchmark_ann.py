@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+HNSW vs brute-force benchmark for the "ann" recall mode.
+
+Embeds a synthetic history with the offline hashing embedder, builds an
+HNSW graph over it and reports query latency and recall@k against exact
+search at several ef settings.
+
+Usage:
+    python benchmark_ann.py
+    python benchmark_ann.py --entries 50000 --k 10 --ef 16 32 64 100 128
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from ann_index import HNSWIndex, exact_search
+from benchmark_recall import synthetic_history, synthetic_queries
+from vector_memory import HashingEmbedder
+
+
+def timed(fn, queries):
+    results = []
+    start = time.perf_counter()
+    for q in queries:
+        results.append(fn(q))
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def run(entries, n_queries, k, ef_values, M, ef_construction):
+    embedder = HashingEmbedder()
+    print(f"Embedding {entries} history entries...")
+    vectors = embedder.encode(synthetic_history(entries))
+    queries = embedder.encode(synthetic_queries(n_queries))
+
+    print(f"Building HNSW (M={M}, ef_construction={ef_construction})...")
+    index = HNSWIndex(embedder.dim, M=M, ef_construction=ef_construction)
+    start = time.perf_counter()
+    index.add_many(vectors)
+    build_time = time.perf_counter() - start
+    print(f"Build: {build_time:.1f}s ({build_time / entries * 1000:.2f}ms per insert)\n")
+
+    exact, exact_latency = timed(lambda q: exact_search(vectors, q, k), queries)
+    # Hashed embeddings of templated text have many exact ties, so a hit
+    # counts if it is at least as similar as the k-th exact result.
+    kth_exact = [hits[-1][1] - 1e-6 for hits in exact]
+
+    print(f"{'Method':<18} {'Recall@' + str(k):>10} {'Latency':>12} {'Speedup':>9}")
+    print("-" * 52)
+    print(f"{'brute force':<18} {1.0:>10.3f} {exact_latency * 1000:>10.3f}ms {1.0:>8.1f}x")
+    for ef in ef_values:
+        approx, latency = timed(lambda q: index.search(q, k, ef=ef), queries)
+        recall = np.mean([
+            sum(1 for _, sim in hits if sim >= kth) / k
+            for kth, hits in zip(kth_exact, approx)
+        ])
+        print(f"{'hnsw ef=' + str(ef):<18} {recall:>10.3f} {latency * 1000:>10.3f}ms "
+              f"{exact_latency / latency:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HNSW recall and latency against exact search")
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 100, 128])
+    parser.add_argument("--M", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=100)
+    args = parser.parse_args()
+
+    run(args.entries, args.queries, args.k, args.ef, args.M, args.ef_construction)
+
+
+if __name__ == "__main__":
+    main()
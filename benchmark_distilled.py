@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Accuracy-versus-latency report for the distilled intent classifier.
+
+Labels the training corpus with a teacher backend and trains the distilled
+classifier on four fifths of it. The labeled test cases
+(comprehensive_test_suite.py and test_intent_detectors.py) are kept out of
+training. It then reports, for the teacher and the student:
+- agreement with the teacher on the held-out fifth
+- accuracy on the labeled test cases
+- mean and p99 latency per detect() call
+
+Usage:
+    python benchmark_distilled.py
+    python benchmark_distilled.py --teacher rules --repeat 20
+"""
+
+import argparse
+import ast
+import os
+import time
+import zlib
+
+from intent_detectors import TransformerIntentDetector
+from intent_distillation import DISTILLED_DIM, DistilledIntentClassifier, teacher_labels, training_corpus
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _literal(filename, variable):
+    with open(os.path.join(SCRIPT_DIR, filename), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == variable for t in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    return []
+
+
+def labeled_cases():
+    """(text, expected intent) pairs from the test suites"""
+    cases = [(case["input"], case["expected_intent"]) for case in _literal("comprehensive_test_suite.py", "test_cases")]
+    cases.extend(_literal("test_intent_detectors.py", "TEST_DATA"))
+    return cases
+
+
+def held_out(text):
+    # Stable split: about one text in five
+    return zlib.crc32(text.encode("utf-8")) % 5 == 0
+
+
+def timed_detect(detect, texts, repeat):
+    latencies = []
+    answers = []
+    for _ in range(repeat):
+        answers = []
+        for text in texts:
+            start = time.perf_counter()
+            answers.append(detect(text)[0])
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return answers, sum(latencies) / len(latencies), latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+
+
+def run(teacher, corpus_path, dim, repeat):
+    cases = labeled_cases()
+    case_texts = [text for text, _ in cases]
+    corpus = training_corpus(corpus_path, exclude=case_texts)
+    labels = dict(zip(corpus, (intent for intent, _ in teacher_labels(corpus, teacher))))
+    train = [text for text in corpus if not held_out(text)]
+    test = [text for text in corpus if held_out(text)]
+    student = DistilledIntentClassifier.fit(train, [labels[text] for text in train], dim=dim)
+
+    if teacher == "rules":
+        from nlp_engine import detect_intent_rule_based as teacher_detect
+    else:
+        teacher_detect = TransformerIntentDetector(teacher, micro_batching=False).detect
+
+    print(f"Teacher {teacher}: {len(train)} training and {len(test)} held-out utterances, "
+          f"{len(cases)} labeled test cases, {dim} feature buckets\n")
+    print(f"{'Model':<12} {'Held-out agreement':>19} {'Test-case accuracy':>19} {'Mean':>10} {'p99':>10}")
+    print("-" * 74)
+    for name, detect in (("teacher", teacher_detect), ("distilled", student.predict)):
+        held_answers = [detect(text)[0] for text in test]
+        agreement = sum(answer == labels[text] for answer, text in zip(held_answers, test)) / max(1, len(test))
+        answers, mean, p99 = timed_detect(detect, case_texts, repeat)
+        accuracy = sum(answer == expected for answer, (_, expected) in zip(answers, cases)) / len(cases)
+        print(f"{name:<12} {agreement:>18.0%} {accuracy:>18.0%} {mean * 1e3:>8.3f}ms {p99 * 1e3:>8.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the distilled intent classifier with its teacher")
+    parser.add_argument("--teacher", default="huggingface",
+                        help="Backend that labels the corpus (huggingface, sentence_transformers, claude or rules)")
+    parser.add_argument("--corpus", help="Extra utterances, one per line")
+    parser.add_argument("--dim", type=int, default=DISTILLED_DIM, help="Hashed feature buckets")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing passes over the test cases")
+    args = parser.parse_args()
+    try:
+        run(args.teacher, args.corpus, args.dim, args.repeat)
+    except RuntimeError as e:
+        parser.error(f"{e}; try --teacher rules")
+
+
+if __name__ == "__main__":
+    main()
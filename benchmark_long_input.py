@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Adversarial long-input benchmark for nlp_engine.analyze_input.
+
+Builds inputs of a megabyte or more that stress one rule each (a single
+huge word, thousands of dates or titled names, digits everywhere, no
+punctuation to cut at), times analyze_input on them at two sizes to show
+the cost grows linearly, and compares the chunked long-input mode with
+one token stream over the whole text and with the original
+pattern-by-pattern extractor.
+
+Usage:
+    python benchmark_long_input.py
+    python benchmark_long_input.py --megabytes 4 --no-legacy
+"""
+
+import argparse
+import random
+import time
+
+import nlp_engine
+from benchmark_nlp import legacy_detect_intent, legacy_extract_entities, load_corpus
+from nlp_engine import analyze_input, configure_analysis_cache, detect_intent_rule_based, extract_entities, tokenize
+
+
+def repeated(unit):
+    return lambda size: (unit * (size // len(unit) + 1))[:size]
+
+
+def pasted_email(corpus, seed=11):
+    rng = random.Random(seed)
+
+    def make(size):
+        sentences = []
+        length = 0
+        while length < size:
+            sentence = rng.choice(corpus).rstrip(".") + "."
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        return " ".join(sentences)[:size]
+    return make
+
+
+def adversarial_inputs(corpus):
+    return {
+        "pasted email": pasted_email(corpus),
+        "one huge word": lambda size: "a" * size,
+        "no punctuation": repeated("remind alice to call bob about the report "),
+        "digits": repeated("1 "),
+        "dates and times": repeated("17 feb 2026 at 10:30 am, "),
+        "titled names": repeated("kavita mam "),
+        "prepositions": repeated("to the "),
+        "capitalized": repeated("The Alice "),
+        "whitespace run": lambda size: "x" + " " * (size - 2) + "1",
+    }
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    result = fn(text)
+    return time.perf_counter() - start, result
+
+
+def single_stream(text):
+    tokens = tokenize(text)
+    return extract_entities(text, tokens), detect_intent_rule_based(text, tokens)
+
+
+def legacy(text):
+    return legacy_extract_entities(text), legacy_detect_intent(text)
+
+
+def run(megabytes, with_legacy):
+    size = int(megabytes * (1 << 20))
+    configure_analysis_cache(enabled=False)
+    print(f"Chunks of {nlp_engine.LONG_INPUT_CHUNK_CHARS} characters above {nlp_engine.LONG_INPUT_CHARS}\n")
+    header = f"{'Input':<16} {f'{megabytes:g}MB':>10} {'MB/s':>7} {'2x size':>8} {'One stream':>11}"
+    if with_legacy:
+        header += f" {'Legacy':>10}"
+    print(header + "  Same result")
+    print("-" * (len(header) + 13))
+
+    for name, make in adversarial_inputs(load_corpus()).items():
+        text = make(size)
+        chunked, result = timed(analyze_input, text)
+        doubled, _ = timed(analyze_input, make(2 * size))
+        whole, (entities, (intent, _)) = timed(single_stream, text)
+        row = f"{name:<16} {chunked * 1e3:>8.1f}ms {megabytes / chunked:>7.1f} {doubled / chunked:>7.2f}x {whole * 1e3:>9.1f}ms"
+        if with_legacy:
+            row += f" {timed(legacy, text)[0] * 1e3:>8.1f}ms"
+        # Identical unless a stretch without punctuation forced a cut at a space
+        same = (result["entities"], result["intent"]) == (entities[0], intent)
+        print(row + f"  {'yes' if same else 'no'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark nlp_engine on adversarial long inputs")
+    parser.add_argument("--megabytes", type=float, default=1, help="Size of each input (timed again at twice that)")
+    parser.add_argument("--no-legacy", action="store_true", help="Skip the original extractor")
+    args = parser.parse_args()
+    run(args.megabytes, not args.no_legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Micro-batching benchmark for TransformerIntentDetector.detect.
+
+Simulates concurrent sessions against the sentence-transformers backend:
+each client thread sends requests back to back, and the model is a
+stand-in whose forward pass costs a fixed overhead plus a small per-text
+cost and runs one at a time, like a CPU-bound encoder. Reports throughput
+and p50/p99 latency without micro-batching and at several max wait times.
+
+Usage:
+    python benchmark_micro_batching.py
+    python benchmark_micro_batching.py --clients 1 8 64 --wait-ms 0 2 5 --overhead-ms 10
+"""
+
+import argparse
+import threading
+import time
+
+import intent_detectors
+from benchmark_nlp import load_corpus
+from intent_detectors import TransformerIntentDetector
+from vector_memory import HashingEmbedder
+
+
+class SimulatedEncoder:
+    """Stands in for a SentenceTransformer: one forward pass at a time,
+    costing overhead_ms + per_item_ms per text"""
+
+    def __init__(self, overhead_ms, per_item_ms):
+        self.overhead = overhead_ms / 1000
+        self.per_item = per_item_ms / 1000
+        self.embedder = HashingEmbedder()
+        self._lock = threading.Lock()
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        texts = list(texts)
+        with self._lock:
+            time.sleep(self.overhead + self.per_item * len(texts))
+            return self.embedder.encode(texts)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_clients(detector, texts, clients, requests):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(offset):
+        own = []
+        for i in range(requests):
+            start = time.perf_counter()
+            detector.detect(texts[(offset + i) % len(texts)])
+            own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(n * requests,)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+
+def detector_for(model, wait_ms, max_batch_size):
+    return TransformerIntentDetector(
+        "sentence_transformers", micro_batching=wait_ms is not None,
+        max_batch_size=max_batch_size, max_wait_ms=wait_ms, model=model,
+    )
+
+
+def run(clients, requests, wait_times, overhead_ms, per_item_ms, max_batch_size):
+    texts = load_corpus()
+    model = SimulatedEncoder(overhead_ms, per_item_ms)
+    intent_detectors.example_matrix(model)  # encode the examples up front
+    print(f"Simulated forward pass: {overhead_ms}ms + {per_item_ms}ms per text, "
+          f"max batch {max_batch_size}, {requests} requests per client\n")
+    print(f"{'Clients':<8} {'Mode':<18} {'Throughput':>12} {'p50':>9} {'p99':>9} {'Mean batch':>11}")
+    print("-" * 72)
+
+    for count in clients:
+        for wait_ms in [None] + wait_times:
+            with detector_for(model, wait_ms, max_batch_size) as detector:
+                throughput, p50, p99 = run_clients(detector, texts, count, requests)
+                if wait_ms is None:
+                    mode, mean_batch = "one at a time", 1.0
+                else:
+                    mode = f"batched, {wait_ms:g}ms wait"
+                    mean_batch = detector.micro_batcher().info()["mean_batch_size"]
+            print(f"{count:<8} {mode:<18} {throughput:>9.0f}/s {p50 * 1e3:>7.1f}ms {p99 * 1e3:>7.1f}ms {mean_batch:>11.1f}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched intent detection")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 64], help="Concurrent client threads")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per client")
+    parser.add_argument("--wait-ms", type=float, nargs="+", default=[0, 2, 5], help="Micro-batch max wait times")
+    parser.add_argument("--overhead-ms", type=float, default=8, help="Fixed cost of a forward pass")
+    parser.add_argument("--per-item-ms", type=float, default=0.5, help="Extra cost per text in a forward pass")
+    parser.add_argument("--max-batch", type=int, default=32, help="Micro-batch max size")
+    args = parser.parse_args()
+    run(args.clients, args.requests, args.wait_ms, args.overhead_ms, args.per_item_ms, args.max_batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Entity and intent detection benchmark for nlp_engine.analyze_input.
+
+Checks that the shared token stream behind entity extraction and intent
+detection returns exactly what the original pattern-by-pattern extractor
+and substring checks did on every input in the test suites, then times
+both per call, on long pasted inputs, analyze_input as the trigger
+vocabulary grows (with and without the per-word cache warm), and
+time-expression resolution in expressions per second.
+
+Usage:
+    python benchmark_nlp.py
+    python benchmark_nlp.py --repeat 200 --vocabulary 10 100 1000 10000 --sentences 100 2000
+"""
+
+import argparse
+import ast
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+import nlp_engine
+from nlp_engine import (
+    INTENT_TRIGGERS, analyze_input, configure_analysis_cache, configure_intent_triggers,
+    detect_intent_rule_based, extract_entities, time_expressions, tokenize,
+)
+from time_parser import clear_cache as clear_time_cache, parse_time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_SOURCES = {
+    "comprehensive_test_suite.py": "test_cases",
+    "practical_test_cases.py": "test_scenarios",
+    "test_fixes.py": "test_cases",
+    "test_intent_detectors.py": "TEST_DATA",
+}
+
+# Inputs that exercise overlaps, casing and stop words beyond the suites
+EXTRA_INPUTS = [
+    "Meet John Smith and Kavita Mam on Monday at 10:30 AM",
+    "remind me on 17 feb 2026 and 18 feb and 3 pm and 3pm",
+    "talk to the team with bob from alice by friday for carol",
+    "into tomorrow 12/12/2024 onto 1/2/25 at 11:45pm Tonight",
+    "The Report For You This Tuesday",
+    "call Dr smith prof",
+    "",
+]
+
+
+def legacy_extract_entities(user_input):
+    """The original extractor: one re.finditer() per pattern, per call"""
+    entities = []
+    time_entity = None
+    person_entity = None
+
+    time_patterns = [
+        r'\d{1,2}\s+(?:january|february|march|april|may|june|july|august|september|october|november|december|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{4}',
+        r'\d{1,2}:\d{2}\s*(?:am|pm|AM|PM)',
+        r'\d{1,2}\s+(?:am|pm|AM|PM)',
+        r'\d{1,2}/\d{1,2}/\d{2,4}',
+        r'(?:today|tomorrow|tonight|yesterday)',
+        r'(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)',
+        r'\d{1,2}\s+(?:january|february|march|april|may|june|july|august|september|october|november|december|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)',
+    ]
+
+    for pattern in time_patterns:
+        for match in re.finditer(pattern, user_input, re.IGNORECASE):
+            time_str = match.group()
+            if time_entity is None or (len(time_str) >= len(time_entity)):
+                time_entity = time_str
+                if not entities or entities[-1][1] != "TIME" or entities[-1][0] != time_str:
+                    entities.append((time_str, "TIME"))
+
+    person_pattern_with_title = r'\b[A-Z][a-z]+(?:\s+(?:mam|sir|madam|mrs|mr|ms|dr|prof|dad|mom))\b'
+    for match in re.finditer(person_pattern_with_title, user_input, re.IGNORECASE):
+        name = match.group()
+        person_entity = name
+        entities.append((name, "PERSON"))
+
+    if not person_entity:
+        preposition_pattern = r'(?:to|with|from|by|for)\s+([a-z]+)\b'
+        for match in re.finditer(preposition_pattern, user_input, re.IGNORECASE):
+            name = match.group(1)
+            excluded_words = {
+                "the", "you", "me", "him", "her", "it", "them", "time", "submit",
+                "morning", "afternoon", "evening", "night", "today", "tomorrow", "yesterday",
+                "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+                "january", "february", "march", "april", "may", "june", "july", "august",
+                "september", "october", "november", "december", "jan", "feb", "mar", "apr",
+                "jun", "jul", "aug", "sep", "oct", "nov", "dec", "tonight", "date", "time",
+                "day", "hour", "minute", "week", "month", "year", "pm", "am"
+            }
+            if name not in excluded_words and len(name) > 2:
+                person_entity = name
+                entities.append((name, "PERSON"))
+                break
+
+    if not person_entity:
+        for match in re.finditer(r'\b[A-Z][a-z]+\b', user_input):
+            name = match.group()
+            excluded_words = {
+                "I", "The", "This", "That", "What", "When", "Where", "Why", "How", "You", "Submit",
+                "Alert", "Remind", "Your", "Form", "Morning", "Afternoon", "Evening", "Night",
+                "Today", "Tomorrow", "Yesterday", "Monday", "Tuesday", "Wednesday", "Thursday",
+                "Friday", "Saturday", "Sunday", "January", "February", "March", "April", "June",
+                "July", "August", "September", "October", "November", "December", "Jan", "Feb",
+                "Mar", "Apr", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec", "Tonight",
+                "Date", "Time", "Day", "Hour", "Minute", "Week", "Month", "Year", "Pm", "Am"
+            }
+            if name not in excluded_words and len(name) > 2:
+                person_entity = name
+                entities.append((name, "PERSON"))
+                break
+
+    return entities, time_entity, person_entity
+
+
+def legacy_detect_intent(text):
+    """The original intent rules: one substring search per trigger phrase"""
+    text = text.lower()
+    if any(phrase in text for phrase in ["what have i", "what did", "did i mention", "do you remember", "what have you told", "tell me about"]):
+        return "retrieve_task", 0.8
+    if text.startswith("what") and any(word in text for word in ["told", "said", "mentioned", "earlier"]):
+        return "retrieve_task", 0.8
+    if "prefer" in text and "remember" not in text:
+        return "set_preference", 0.9
+    if any(word in text for word in ["remind", "reminder", "alert"]):
+        return "set_reminder", 0.9
+    if any(word in text for word in ["schedule", "meeting", "appoint"]):
+        if "did i mention" not in text and "what" not in text:
+            return "schedule_meeting", 0.9
+    if any(word in text for word in [
+        "submit", "attend", "complete", "finish",
+        "send", "call", "pay", "buy", "prepare",
+        "visit", "meet"
+    ]):
+        return "create_task", 0.85
+    return "unknown", 0.3
+
+
+def load_corpus():
+    """Collect every string literal from the test suites' input tables"""
+    corpus = []
+    for filename, variable in CORPUS_SOURCES.items():
+        path = os.path.join(SCRIPT_DIR, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any(
+                isinstance(t, ast.Name) and t.id == variable for t in node.targets
+            ):
+                corpus.extend(
+                    n.value for n in ast.walk(node.value)
+                    if isinstance(n, ast.Constant) and isinstance(n.value, str)
+                )
+    corpus.extend(EXTRA_INPUTS)
+    return list(dict.fromkeys(corpus))
+
+
+def check_equivalence(corpus, engine, legacy):
+    mismatches = [text for text in corpus if engine(text) != legacy(text)]
+    for text in mismatches:
+        print(f"✗ MISMATCH | {text!r}")
+        print(f"  legacy: {legacy(text)}")
+        print(f"  engine: {engine(text)}")
+    return not mismatches
+
+
+def tokenized_intent(text):
+    # The intent rules on a token stream, as analyze_input runs them
+    return detect_intent_rule_based(text, tokenize(text))
+
+
+def per_call(fn, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(corpus))
+
+
+def synthetic_phrases(n, seed=3):
+    # Letters the corpus rarely contains, so phrases never match and the
+    # substring checks cannot stop early; every other one is two words
+    rng = random.Random(seed)
+
+    def word():
+        return "".join(rng.choice("jqxzvk") for _ in range(rng.randint(4, 9)))
+
+    return [f"{word()} {word()}" if i % 2 else word() for i in range(n)]
+
+
+def cold_words_per_call(corpus, repeat):
+    # analyze_input with no word seen before, so every word is scanned
+    # against the trigger vocabulary
+    total = 0.0
+    for _ in range(repeat):
+        for text in corpus:
+            nlp_engine._word_info.cache_clear()
+            start = time.perf_counter()
+            analyze_input(text)
+            total += time.perf_counter() - start
+    return total / (repeat * len(corpus))
+
+
+def vocabulary_growth(corpus, sizes, repeat):
+    print(f"\n{'Trigger phrases':<16} {'Substring checks':>17} {'analyze_input, new words':>25} {'analyze_input':>14}")
+    print("-" * 75)
+    base = [phrase for phrases in INTENT_TRIGGERS.values() for phrase in phrases]
+    lowered = [text.lower() for text in corpus]
+    configure_analysis_cache(enabled=False)
+    try:
+        for size in sizes:
+            extra = synthetic_phrases(size)
+            phrases = base + extra
+            substring = per_call(lambda text: [phrase in text for phrase in phrases], lowered, repeat)
+            configure_intent_triggers({"synthetic": extra})
+            cold = cold_words_per_call(corpus, repeat)
+            warm = per_call(analyze_input, corpus, repeat)
+            print(f"{len(phrases):<16} {substring * 1e6:>15.2f}us {cold * 1e6:>23.2f}us {warm * 1e6:>12.2f}us")
+    finally:
+        configure_intent_triggers()
+        configure_analysis_cache(enabled=True)
+
+
+def long_inputs(corpus, sentences, repeat, seed=7):
+    # Pasted documents: corpus sentences joined into one input
+    print(f"\n{'Long input':<20} {'Legacy':>10} {'Token stream':>13} {'Speedup':>8}")
+    print("-" * 54)
+    rng = random.Random(seed)
+    configure_analysis_cache(enabled=False)
+    try:
+        for count in sentences:
+            text = " ".join(rng.choice(corpus) for _ in range(count))
+            if not (check_equivalence([text], extract_entities, legacy_extract_entities)
+                    and check_equivalence([text], detect_intent_rule_based, legacy_detect_intent)):
+                raise SystemExit(1)
+            legacy = per_call(lambda text: (legacy_extract_entities(text), legacy_detect_intent(text)), [text], repeat)
+            engine = per_call(analyze_input, [text], repeat)
+            label = f"{count} sentences, {len(text) // 1024}KB"
+            print(f"{label:<20} {legacy * 1e3:>8.2f}ms {engine * 1e3:>11.2f}ms {legacy / engine:>7.1f}x")
+    finally:
+        configure_analysis_cache(enabled=True)
+
+
+def synthetic_time_expressions(n, seed=5):
+    rng = random.Random(seed)
+    months = ["jan", "feb", "march", "april", "sep", "december"]
+    makers = [
+        lambda: f"{rng.randint(1, 28)} {rng.choice(months)} {rng.randint(2024, 2030)}",
+        lambda: f"{rng.randint(1, 28)} {rng.choice(months)}",
+        lambda: f"{rng.randint(1, 12)}:{rng.randint(0, 59):02d} {rng.choice(['am', 'pm'])}",
+        lambda: f"{rng.randint(1, 12)} {rng.choice(['am', 'PM'])}",
+        lambda: f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/{rng.randint(2024, 2030)}",
+        lambda: rng.choice(["today", "tomorrow", "tonight", "yesterday", "friday", "Monday"]),
+    ]
+    return [rng.choice(makers)() for _ in range(n)]
+
+
+def time_resolution(corpus, n=100000):
+    from reasoning_engine import _timestamp
+
+    expressions = [text for line in corpus for text in time_expressions(line)]
+    expressions += synthetic_time_expressions(n - len(expressions))
+    unique = len(set(expressions))
+
+    def throughput(texts, now=None, cold=False):
+        if cold:
+            clear_time_cache()
+        start = time.perf_counter()
+        for text in texts:
+            parse_time(text, now)
+        return len(texts) / (time.perf_counter() - start)
+
+    def pipeline(texts, cold=False):
+        # What reasoning_engine stores per turn: expressions already found
+        # by analyze_input, resolved against the clock, as a UTC timestamp
+        intents = [{"time_expressions": [text]} for text in texts]
+        if cold:
+            clear_time_cache()
+        start = time.perf_counter()
+        for intent_data in intents:
+            _timestamp(intent_data, "")
+        return len(texts) / (time.perf_counter() - start)
+
+    # Distinct expressions with cleared caches: every call parses and
+    # resolves from scratch
+    distinct = list(dict.fromkeys(expressions))
+    reference = datetime.now().astimezone()
+
+    print(f"\nTime resolution ({len(expressions)} expressions, {unique} distinct)")
+    print(f"  uncached parse, clock read per call: {throughput(distinct, cold=True):>10,.0f} expressions/s")
+    print(f"  uncached parse, fixed reference:     {throughput(distinct, reference, cold=True):>10,.0f} expressions/s")
+    print(f"  mixed traffic, clock read per call:  {throughput(expressions):>10,.0f} expressions/s")
+    print(f"  reasoning_engine timestamps, uncached: {pipeline(distinct, cold=True):>8,.0f} expressions/s")
+    print(f"  reasoning_engine timestamps, mixed:    {pipeline(expressions):>8,.0f} expressions/s")
+
+
+def run(repeat, vocabulary, sentences):
+    corpus = load_corpus()
+    print(f"Corpus: {len(corpus)} inputs from the test suites")
+    if not (check_equivalence(corpus, extract_entities, legacy_extract_entities)
+            and check_equivalence(corpus, detect_intent_rule_based, legacy_detect_intent)
+            and check_equivalence(corpus, detect_intent_rule_based, tokenized_intent)):
+        raise SystemExit(1)
+    print("✓ Entities and intents identical to the legacy implementation\n")
+
+    legacy = per_call(legacy_extract_entities, corpus, repeat)
+    engine = per_call(extract_entities, corpus, repeat)
+    legacy_intent = per_call(legacy_detect_intent, corpus, repeat)
+    intent = per_call(tokenized_intent, corpus, repeat)
+    scan = per_call(detect_intent_rule_based, corpus, repeat)
+    configure_analysis_cache(enabled=False)
+    analyze = per_call(analyze_input, corpus, repeat)
+    configure_analysis_cache(enabled=True)
+
+    print(f"{'Step':<34} {'Per call':>10} {'Speedup':>9}")
+    print("-" * 55)
+    print(f"{'entities: legacy (per-pattern)':<34} {legacy * 1e6:>8.2f}us {1.0:>8.1f}x")
+    print(f"{'entities: token stream':<34} {engine * 1e6:>8.2f}us {legacy / engine:>8.1f}x")
+    print(f"{'intent: legacy (substring checks)':<34} {legacy_intent * 1e6:>8.2f}us {1.0:>8.1f}x")
+    print(f"{'intent: token stream':<34} {intent * 1e6:>8.2f}us {legacy_intent / intent:>8.1f}x")
+    print(f"{'intent: whole-text automaton':<34} {scan * 1e6:>8.2f}us {legacy_intent / scan:>8.1f}x")
+    # analyze_input tokenizes once for both, uncached
+    print(f"\nanalyze_input per call: {(legacy + legacy_intent) * 1e6:.2f}us -> {analyze * 1e6:.2f}us")
+
+    long_inputs(corpus, sentences, max(1, repeat // 20))
+    vocabulary_growth(corpus, vocabulary, max(1, repeat // 10))
+    time_resolution(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark entity extraction in nlp_engine")
+    parser.add_argument("--repeat", type=int, default=100, help="Passes over the corpus per timing")
+    parser.add_argument("--vocabulary", type=int, nargs="+", default=[0, 100, 1000, 10000],
+                        help="Extra trigger phrases for the vocabulary growth table")
+    parser.add_argument("--sentences", type=int, nargs="+", default=[10, 100, 2000],
+                        help="Corpus sentences per input for the long input table")
+    args = parser.parse_args()
+    run(args.repeat, args.vocabulary, args.sentences)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Float versus int8-quantized embedding backend benchmark.
+
+Loads the Sentence Transformers model from a local directory twice, once
+as is and once with its Linear layers quantized to int8, and reports the
+weight memory, single-text and batched latency, and how often the two
+agree on the intent of each input in the test suites. --build-tiny
+builds a small randomly initialized model (word embeddings, mean pooling
+and two dense layers) in a temporary directory first, so the comparison
+runs offline.
+
+Usage:
+    python benchmark_quantized.py --model-dir ./models/all-MiniLM-L6-v2
+    python benchmark_quantized.py --build-tiny --dim 384 --hidden 1536 --repeat 20
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmark_nlp import load_corpus
+from intent_detectors import (
+    INTENT_EMBEDDING_MODEL, INTENT_EXAMPLES, TransformerIntentDetector,
+    init_sentence_transformer, init_sentence_transformer_int8,
+)
+from model_registry import model_size_mb
+from vector_memory import TOKEN_PATTERN
+
+
+def build_tiny_model(path, dim=128, hidden=512, seed=0):
+    """Save a small SentenceTransformer over the test-suite vocabulary to path"""
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+
+    torch.manual_seed(seed)
+    texts = load_corpus() + [example for examples in INTENT_EXAMPLES.values() for example in examples]
+    vocabulary = sorted({word for text in texts for word in TOKEN_PATTERN.findall(text.lower())})
+    tokenizer = models.tokenizer.WhitespaceTokenizer(vocab=vocabulary, do_lower_case=True)
+    embeddings = models.WordEmbeddings(tokenizer, torch.randn(len(vocabulary), dim), update_embeddings=False)
+    model = SentenceTransformer(modules=[
+        embeddings,
+        models.Pooling(dim),
+        models.Dense(dim, hidden),
+        models.Dense(hidden, dim),
+    ], device="cpu")
+    model.save(path)
+    return path
+
+
+def detector_for(model):
+    return TransformerIntentDetector("sentence_transformers", micro_batching=False, model=model)
+
+
+def timed(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def run(model_dir, repeat):
+    texts = load_corpus()
+    print(f"Model: {model_dir}, {len(texts)} test-suite inputs, best of {repeat}\n")
+    print(f"{'Model':<8} {'Weights':>10} {'Per text':>10} {'Batch/text':>11} {'Same intent':>12}")
+    print("-" * 56)
+
+    baseline = None
+    for name, loader in (("float32", init_sentence_transformer), ("int8", init_sentence_transformer_int8)):
+        # Time the model itself, not the embedding cache
+        model = loader(model_dir, cache_dir="")
+        if model is None:
+            raise RuntimeError(f"Could not load {model_dir}")
+        detector = detector_for(model)
+        detector.detect("warm up")
+        single, _ = timed(lambda: [detector.detect(text) for text in texts], repeat)
+        batched, intents = timed(lambda: detector.detect_batch(texts), repeat)
+        intents = [intent for intent, _ in intents]
+        if baseline is None:
+            baseline = intents
+        same = sum(a == b for a, b in zip(intents, baseline)) / len(texts)
+        print(f"{name:<8} {model_size_mb(model):>8.1f}MB {single / len(texts) * 1e3:>8.2f}ms "
+              f"{batched / len(texts) * 1e3:>9.3f}ms {same:>11.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the float and int8-quantized embedding backends")
+    parser.add_argument("--model-dir", default=INTENT_EMBEDDING_MODEL, help="Local model directory (or model name)")
+    parser.add_argument("--build-tiny", action="store_true", help="Build and use a small local model")
+    parser.add_argument("--dim", type=int, default=128, help="Embedding size of the built model")
+    parser.add_argument("--hidden", type=int, default=512, help="Hidden layer size of the built model")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing passes; the fastest is reported")
+    args = parser.parse_args()
+
+    if args.build_tiny:
+        with tempfile.TemporaryDirectory() as directory:
+            run(build_tiny_model(os.path.join(directory, "tiny"), args.dim, args.hidden), args.repeat)
+    else:
+        run(args.model_dir, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Recall latency benchmark for vector_memory.semantic_search.
+
+Builds a synthetic conversation history in an in-memory store and times
+each recall mode against it. Mean, p50 and p99 are cold searches (the
+recall cache is cleared before each query); "Cached" is the mean latency
+of repeating the same queries.
+
+Usage:
+    python benchmark_recall.py
+    python benchmark_recall.py --entries 100000 --queries 500
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import time
+
+import memory_system
+import vector_memory
+
+ACTIONS = ["call", "email", "meet", "visit", "pay", "remind", "send the report to", "submit the form to"]
+TIMES = ["tomorrow", "today", "on monday", "on friday", "at 3 pm", "at 10:30 am", "on 17 feb 2026", "next week"]
+SYLLABLES = ["ka", "vi", "ta", "ro", "ma", "li", "su", "ne", "do", "pa", "re", "mi", "zo", "la", "ti", "ba"]
+
+
+def _vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _zipf_picker(words, rng):
+    # Real chat vocabularies are Zipfian: a few words are everywhere,
+    # most appear only a handful of times.
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    return lambda: rng.choices(words, cum_weights=cum_weights)[0]
+
+
+def synthetic_history(n, seed=7, vocabulary=20000, people=500):
+    rng = random.Random(seed)
+    topic = _zipf_picker(_vocabulary(vocabulary, random.Random(1)), rng)
+    person = _zipf_picker(_vocabulary(people, random.Random(2)), rng)
+    return [
+        f"{rng.choice(ACTIONS)} {person()} about the {topic()} and {topic()} "
+        f"{rng.choice(TIMES)}"
+        for _ in range(n)
+    ]
+
+
+def synthetic_queries(n, seed=11, vocabulary=20000, people=500):
+    rng = random.Random(seed)
+    topic = _zipf_picker(_vocabulary(vocabulary, random.Random(1)), rng)
+    person = _zipf_picker(_vocabulary(people, random.Random(2)), rng)
+    return [
+        f"what did I tell you about the {topic()} with {person()}"
+        for _ in range(n)
+    ]
+
+
+def _percentiles(latencies):
+    latencies = sorted(latencies)
+    return {
+        "mean": statistics.mean(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def time_mode(mode, queries):
+    # First call pays any index build cost; report it separately
+    vector_memory.clear_recall_cache()
+    start = time.perf_counter()
+    vector_memory.semantic_search(queries[0], mode=mode)
+    warmup = time.perf_counter() - start
+
+    # Cold: every query searches the index. Repeated queries would
+    # otherwise be answered by the recall cache.
+    latencies = []
+    for query in queries:
+        vector_memory.clear_recall_cache()
+        start = time.perf_counter()
+        vector_memory.semantic_search(query, mode=mode)
+        latencies.append(time.perf_counter() - start)
+    stats = _percentiles(latencies)
+
+    # Cached: the same queries again, all answered from the recall cache
+    for query in queries:
+        vector_memory.semantic_search(query, mode=mode)
+    start = time.perf_counter()
+    for query in queries:
+        vector_memory.semantic_search(query, mode=mode)
+    stats["cached"] = (time.perf_counter() - start) / len(queries)
+    stats["warmup"] = warmup
+    return stats
+
+
+def run(entries, queries, fuzzy_entries, modes):
+    query_set = synthetic_queries(queries)
+
+    print(f"{'Mode':<10} {'Entries':>9} {'Build/first':>12} {'Mean':>10} {'p50':>10} {'p99':>10} {'Cached':>10}")
+    print("-" * 77)
+    for mode in modes:
+        n = min(entries, fuzzy_entries) if mode == "fuzzy" else entries
+        memory_system.configure(memory_system.InMemoryBackend({
+            "conversation_history": synthetic_history(n)
+        }))
+        if mode == "embedding":
+            # Keep the benchmark matrix in RAM rather than next to memory.json
+            vector_memory.configure_embedding_index(path=None)
+        per_mode_queries = query_set[:max(5, queries // 20)] if mode == "fuzzy" else query_set
+        stats = time_mode(mode, per_mode_queries)
+        print(
+            f"{mode:<10} {n:>9} {stats['warmup'] * 1000:>10.2f}ms "
+            f"{stats['mean'] * 1000:>8.3f}ms {stats['p50'] * 1000:>8.3f}ms {stats['p99'] * 1000:>8.3f}ms "
+            f"{stats['cached'] * 1000:>8.3f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark semantic_search recall modes")
+    parser.add_argument("--entries", type=int, default=100000, help="History size for indexed modes")
+    parser.add_argument("--queries", type=int, default=200, help="Number of timed queries")
+    parser.add_argument("--fuzzy-entries", type=int, default=5000,
+                        help="History size for the brute-force fuzzy mode")
+    parser.add_argument("--modes", nargs="+", default=["fuzzy", "bm25", "embedding"],
+                        help="Recall modes to time")
+    args = parser.parse_args()
+
+    run(args.entries, args.queries, args.fuzzy_entries, args.modes)
+
+
+if __name__ == "__main__":
+    main()
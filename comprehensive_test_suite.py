@@ -3,10 +3,16 @@ Comprehensive test suite for context-aware assistant
 Tests across all intent types, entity combinations, and edge cases
 """
 
+import memory_system
 from nlp_engine import analyze_input
 from reasoning_engine import reason
 import json
 
+# Run against process-local memory so the suite never touches memory.json
+memory_system.configure(memory_system.InMemoryBackend({
+    "preferences": {"meeting_time": "set preference for morning time"},
+}))
+
 test_cases = [
     # ==================== SET_REMINDER TESTS ====================
     {
@@ -0,0 +1,343 @@
+"""
+Content-addressed embedding cache on disk.
+
+Each model version gets a directory holding a memory-mapped .npy matrix of
+embeddings, a row-aligned array of SHA-256 text digests and a JSON sidecar
+with the number of valid rows. Texts are looked up by digest, so every
+distinct string is encoded at most once per model version, across
+restarts and across processes sharing the directory.
+
+Writers fill rows past the published count and only then replace the
+sidecar, so readers never see a half-written row. Growing the matrix or
+evicting writes a new generation of files that the sidecar then points
+to; readers keep using the files they mapped until they see the new
+generation. When the cache is full, the least recently used half of the
+entries (as seen by the writing process) is dropped.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # No cross-process write lock; one writing process at a time
+    fcntl = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# "" disables the cache
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(SCRIPT_DIR, "embedding_cache"))
+# Entries kept per model version
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+
+DIGEST_SIZE = 32
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def model_version(model_name):
+    """model_name, plus a fingerprint of its files when it is a local
+    directory, so a retrained model does not reuse the old embeddings"""
+    if not os.path.isdir(model_name):
+        return model_name
+    fingerprint = hashlib.sha1()
+    for root, directories, files in os.walk(model_name):
+        directories.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            fingerprint.update(f"{os.path.relpath(path, model_name)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return f"{os.path.abspath(model_name)}@{fingerprint.hexdigest()[:12]}"
+
+
+class EmbeddingCache:
+    """Persistent digest -> embedding map for one model version.
+
+    Args:
+        directory: Where the files live; one directory per model version
+        dim: Embedding size
+        max_entries: Size bound; reaching it evicts the least recently used half
+    """
+
+    def __init__(self, directory, dim, max_entries=EMBEDDING_CACHE_MAX_ENTRIES, initial_capacity=1024):
+        self.directory = directory
+        self.dim = dim
+        self.max_entries = max(2, max_entries)
+        self.initial_capacity = min(initial_capacity, self.max_entries)
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._vectors = None
+        self._keys = None
+        self._rows = {}
+        self._last_used = {}
+        self._clock = 0
+        self._count = 0
+        self._generation = None
+        self._meta_signature = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    # ----- storage -----
+
+    def _paths(self, generation):
+        return (os.path.join(self.directory, f"vectors-{generation}.npy"),
+                os.path.join(self.directory, f"keys-{generation}.npy"))
+
+    @contextmanager
+    def _write_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, "lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Pick up rows and generations published since the last look"""
+        import numpy as np
+
+        try:
+            stat = os.stat(self.meta_path)
+        except FileNotFoundError:
+            return
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature == self._meta_signature:
+            return
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim:
+                raise ValueError(f"Embedding cache in {self.directory} holds dim {meta['dim']}, not {self.dim}")
+            if meta["generation"] != self._generation:
+                vectors_path, keys_path = self._paths(meta["generation"])
+                vectors = np.load(vectors_path, mmap_mode="r+")
+                keys = np.load(keys_path, mmap_mode="r+")
+                self._vectors, self._keys = vectors, keys
+                self._rows, self._last_used, self._count = {}, {}, 0
+                self._generation = meta["generation"]
+        except (OSError, KeyError, json.JSONDecodeError):
+            # Caught between a writer's steps; try again on the next call
+            return
+        for row in range(self._count, meta["count"]):
+            self._rows[self._keys[row].tobytes()] = row
+        self._count = meta["count"]
+        self._meta_signature = signature
+
+    def _publish(self):
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": self.dim, "generation": self._generation, "count": self._count}, f)
+        os.replace(tmp_path, self.meta_path)
+        stat = os.stat(self.meta_path)
+        self._meta_signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _rewrite(self, rows, capacity):
+        """Write rows (in order) to a new generation of files of the given capacity"""
+        import numpy as np
+
+        old_paths = self._paths(self._generation) if self._generation is not None else ()
+        generation = (self._generation or 0) + 1
+        vectors_path, keys_path = self._paths(generation)
+        vectors = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=(capacity, self.dim))
+        keys = np.lib.format.open_memmap(keys_path, mode="w+", dtype=np.uint8, shape=(capacity, DIGEST_SIZE))
+        if rows:
+            vectors[:len(rows)] = self._vectors[rows]
+            keys[:len(rows)] = self._keys[rows]
+        vectors.flush()
+        keys.flush()
+
+        self._last_used = {new: self._last_used[old] for new, old in enumerate(rows) if old in self._last_used}
+        self._rows = {keys[row].tobytes(): row for row in range(len(rows))}
+        self._vectors, self._keys = vectors, keys
+        self._count = len(rows)
+        self._generation = generation
+        self._publish()
+        # Readers that still map the old files keep them until they move on
+        for path in old_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _make_room(self, incoming):
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        rows = list(range(self._count))
+        if self._count + incoming > self.max_entries:
+            keep = max(0, min(self.max_entries // 2, self.max_entries - incoming))
+            recent = sorted(rows, key=lambda row: (self._last_used.get(row, 0), row), reverse=True)
+            self.evictions += self._count - keep
+            rows = sorted(recent[:keep])
+        elif self._count + incoming <= capacity:
+            return
+        needed = len(rows) + incoming
+        new_capacity = max(self.initial_capacity, capacity)
+        while new_capacity < needed:
+            new_capacity *= 2
+        self._rewrite(rows, min(new_capacity, self.max_entries))
+
+    # ----- lookups -----
+
+    def get_many(self, digests):
+        """Cached embedding (a copy) per digest, or None where missing"""
+        import numpy as np
+
+        with self._lock:
+            self._refresh()
+            results = []
+            for digest in digests:
+                row = self._rows.get(digest)
+                if row is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                self.hits += 1
+                self._clock += 1
+                self._last_used[row] = self._clock
+                results.append(np.array(self._vectors[row]))
+            return results
+
+    def put_many(self, digests, vectors):
+        import numpy as np
+
+        with self._lock, self._write_lock():
+            self._refresh()
+            new = {}
+            for digest, vector in zip(digests, vectors):
+                if digest not in self._rows:
+                    new[digest] = vector
+            if not new:
+                return
+            items = list(new.items())[-self.max_entries:]
+            self._make_room(len(items))
+
+            start = self._count
+            end = start + len(items)
+            self._vectors[start:end] = np.asarray([vector for _, vector in items], dtype=np.float32)
+            self._keys[start:end] = np.frombuffer(b"".join(digest for digest, _ in items), dtype=np.uint8).reshape(-1, DIGEST_SIZE)
+            self._vectors.flush()
+            self._keys.flush()
+            for row, (digest, _) in enumerate(items, start):
+                self._rows[digest] = row
+                self._clock += 1
+                self._last_used[row] = self._clock
+            self._count = end
+            self._publish()
+
+    def info(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": self._count,
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def embedding_cache(version, dim, cache_dir=None, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+    """The process-wide EmbeddingCache for a model version"""
+    cache_dir = EMBEDDING_CACHE_DIR if cache_dir is None else cache_dir
+    name = re.sub(r"[^\w.-]+", "_", os.path.basename(version.split("@")[0].rstrip("/")))[:40]
+    directory = os.path.join(cache_dir, f"{name}-{hashlib.sha1(version.encode('utf-8')).hexdigest()[:12]}")
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = EmbeddingCache(directory, dim, max_entries)
+        return cache
+
+
+# encode() arguments that do not change the embeddings, and the values of
+# output-shaping arguments that give the float32 vectors the cache holds.
+# A call with anything else goes straight to the model.
+CACHE_NEUTRAL_KWARGS = {"batch_size", "show_progress_bar", "device"}
+CACHEABLE_KWARG_VALUES = {
+    "output_value": "sentence_embedding",
+    "convert_to_numpy": True,
+    "convert_to_tensor": False,
+    "precision": "float32",
+    "prompt": None,
+    "prompt_name": None,
+}
+
+
+def _cacheable(kwargs):
+    return all(
+        key in CACHE_NEUTRAL_KWARGS
+        or (key in CACHEABLE_KWARG_VALUES and value == CACHEABLE_KWARG_VALUES[key])
+        for key, value in kwargs.items()
+    )
+
+
+class CachedEncoder:
+    """Wraps a model's encode(texts, ...) so each distinct text is encoded
+    once per model version; other attributes are the model's own.
+
+    Embeddings are cached as the model returns them without
+    normalize_embeddings, and normalized on the way out when asked for.
+    Calls asking for other output (tensors, token embeddings, prompts,
+    quantized precisions) bypass the cache.
+    """
+
+    def __init__(self, model, cache):
+        self.model = model
+        self.cache = cache
+
+    def encode(self, sentences, normalize_embeddings=False, **kwargs):
+        import numpy as np
+
+        if not _cacheable(kwargs):
+            return self.model.encode(sentences, normalize_embeddings=normalize_embeddings, **kwargs)
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        digests = [text_digest(text) for text in texts]
+        vectors = self.cache.get_many(digests)
+
+        missing = {}
+        for digest, text, vector in zip(digests, texts, vectors):
+            if vector is None:
+                missing.setdefault(digest, text)
+        if missing:
+            encoded = np.asarray(self.model.encode(list(missing.values()), **kwargs), dtype=np.float32)
+            encoded = encoded.reshape(len(missing), self.cache.dim)
+            self.cache.put_many(list(missing), encoded)
+            fresh = dict(zip(missing, encoded))
+            vectors = [fresh[digest] if vector is None else vector for digest, vector in zip(digests, vectors)]
+
+        matrix = np.stack(vectors) if vectors else np.zeros((0, self.cache.dim), dtype=np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+        return matrix[0] if single else matrix
+
+    def __getattr__(self, name):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+def cached_encoder(model, version, dim=None, cache_dir=None):
+    """model behind a CachedEncoder for version, or model itself when the
+    cache is disabled"""
+    cache_dir = EMBEDDING_CACHE_DIR if cache_dir is None else cache_dir
+    if not cache_dir or model is None:
+        return model
+    if dim is None:
+        dim = model.get_sentence_embedding_dimension() if hasattr(model, "get_sentence_embedding_dimension") else model.dim
+    return CachedEncoder(model, embedding_cache(version, dim, cache_dir))
@@ -1,13 +1,57 @@
 """
 Multiple transformer-based intent detection implementations:
 1. HuggingFace Zero-Shot Classification (facebook/bart-large-mnli)
-2. Sentence Transformers with Semantic Similarity
+2. Sentence Transformers with Semantic Similarity (float or int8-quantized)
 3. Claude API (OpenAI-compatible)
+4. Distilled hashed n-gram classifier trained on a teacher backend's labels
 """
 
 import os
 import json
-from typing import Tuple, Dict, Optional
+import asyncio
+import threading
+import weakref
+from collections import Counter
+from concurrent.futures import wait
+from typing import TYPE_CHECKING, Iterable, List, Tuple, Dict, Optional
+
+from embedding_cache import cached_encoder, model_version
+from micro_batcher import MicroBatcher
+from model_registry import ModelRegistry
+from nlp_engine import detect_intent_rule_based
+from response_cache import ResponseCache, request_key
+
+if TYPE_CHECKING:
+    import numpy
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Embedding model for the Sentence Transformers backends: a model name or a
+# local model directory
+INTENT_EMBEDDING_MODEL = os.getenv("INTENT_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Texts per forward pass when classifying a batch
+INTENT_BATCH_SIZE = int(os.getenv("INTENT_BATCH_SIZE", "32"))
+# Memory the resident models may use together; least recently used ones are evicted
+INTENT_MODEL_MEMORY_MB = float(os.getenv("INTENT_MODEL_MEMORY_MB", "2048"))
+# Backends to load at startup (comma-separated), e.g. "sentence_transformers"
+INTENT_PRELOAD = [name for name in os.getenv("INTENT_PRELOAD", "").split(",") if name.strip()]
+# Micro-batching of concurrent detect() calls for the model backends; set
+# INTENT_MICRO_BATCHING=off to run each call on its own
+INTENT_MICRO_BATCHING = os.getenv("INTENT_MICRO_BATCHING", "on").lower() not in ("0", "off", "false", "no")
+INTENT_MAX_BATCH_SIZE = int(os.getenv("INTENT_MAX_BATCH_SIZE", str(INTENT_BATCH_SIZE)))
+INTENT_MAX_WAIT_MS = float(os.getenv("INTENT_MAX_WAIT_MS", "2"))
+# Claude backend: model, per-request timeout in seconds, retries (none by
+# default: a failed request falls back to the rule-based intent instead),
+# concurrent requests per batch, and the answer cache file ("" keeps answers
+# in memory only)
+CLAUDE_MODEL = os.getenv("CLAUDE_INTENT_MODEL", "claude-3-5-sonnet-20241022")
+CLAUDE_TIMEOUT = float(os.getenv("CLAUDE_TIMEOUT", "10"))
+CLAUDE_MAX_RETRIES = int(os.getenv("CLAUDE_MAX_RETRIES", "0"))
+CLAUDE_MAX_CONCURRENCY = int(os.getenv("CLAUDE_MAX_CONCURRENCY", "8"))
+CLAUDE_CACHE_FILE = os.getenv("CLAUDE_CACHE_FILE", os.path.join(SCRIPT_DIR, "claude_intent_cache.jsonl"))
+CLAUDE_CACHE = ResponseCache(CLAUDE_CACHE_FILE or None)
+# Backends CascadeIntentDetector escalates to, in order, as backend:budget_ms
+INTENT_CASCADE_TIERS = os.getenv("INTENT_CASCADE_TIERS", "sentence_transformers:100,huggingface:1000")
 
 # Intent configuration
 INTENT_CONFIG = {
@@ -46,7 +90,7 @@ def init_huggingface_classifier():
 def detect_intent_huggingface(text: str, classifier=None) -> Tuple[str, float]:
     """Detect intent using HuggingFace zero-shot classification"""
     if classifier is None:
-        classifier = init_huggingface_classifier()
+        classifier = get_model("huggingface")
     
     if classifier is None:
         return "unknown", 0.3
@@ -75,72 +119,133 @@ def detect_intent_huggingface(text: str, classifier=None) -> Tuple[str, float]:
         print(f"[ERROR] HuggingFace inference failed: {e}")
         return "unknown", 0.3
 
+def detect_intents_huggingface(texts: List[str], classifier=None) -> List[Tuple[str, float]]:
+    """Classify a batch of texts with one batched zero-shot pipeline call"""
+    if classifier is None:
+        classifier = get_model("huggingface")
+
+    if classifier is None or not texts:
+        return [("unknown", 0.3)] * len(texts)
+
+    try:
+        intent_labels = list(INTENT_CONFIG.keys())
+        templates = [INTENT_CONFIG[label]["template"] for label in intent_labels]
+        template_to_intent = {
+            INTENT_CONFIG[label]["template"]: label for label in intent_labels
+        }
+
+        results = classifier(
+            list(texts),
+            templates,
+            multi_class=False,
+            batch_size=INTENT_BATCH_SIZE
+        )
+        if isinstance(results, dict):
+            results = [results]
+
+        return [
+            (template_to_intent.get(result["labels"][0], "unknown"), float(result["scores"][0]))
+            for result in results
+        ]
+    except Exception as e:
+        print(f"[ERROR] HuggingFace batch inference failed: {e}")
+        return [("unknown", 0.3)] * len(texts)
+
 # ============= 2. Sentence Transformers with Semantic Similarity =============
 
-def init_sentence_transformer():
-    """Initialize Sentence Transformers for semantic similarity"""
+def init_sentence_transformer(model_name: Optional[str] = None, cache_dir: Optional[str] = None):
+    """Initialize Sentence Transformers for semantic similarity, behind the
+    on-disk embedding cache (cache_dir="" for the bare model)"""
     try:
         from sentence_transformers import SentenceTransformer
-        model = SentenceTransformer("all-MiniLM-L6-v2")
-        return model
+        model_name = model_name or INTENT_EMBEDDING_MODEL
+        model = SentenceTransformer(model_name)
+        return cached_encoder(model, model_version(model_name), cache_dir=cache_dir)
     except Exception as e:
         print(f"[ERROR] Failed to initialize Sentence Transformers: {e}")
         return None
 
+def quantize_embedding_model(model):
+    """Convert the model's Linear layers to dynamic int8 for CPU inference:
+    weights are stored as int8 and activations are quantized on the fly"""
+    import torch
+    model.to("cpu")
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def init_sentence_transformer_int8(model_name: Optional[str] = None, cache_dir: Optional[str] = None):
+    """Initialize an int8-quantized Sentence Transformers model on CPU, behind
+    the on-disk embedding cache (cache_dir="" for the bare model)"""
+    try:
+        from sentence_transformers import SentenceTransformer
+        model_name = model_name or INTENT_EMBEDDING_MODEL
+        model = quantize_embedding_model(SentenceTransformer(model_name, device="cpu"))
+        return cached_encoder(model, model_version(model_name) + "#int8", cache_dir=cache_dir)
+    except Exception as e:
+        print(f"[ERROR] Failed to initialize quantized Sentence Transformers: {e}")
+        return None
+
+# Normalized INTENT_EXAMPLES embeddings per model, so examples are encoded
+# once per model instead of on every request
+_example_matrices = weakref.WeakKeyDictionary()
+_example_lock = threading.Lock()
+
+def _normalize_rows(matrix):
+    import numpy as np
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def example_matrix(model) -> Tuple[List[str], "numpy.ndarray"]:
+    """Intent of each example and the L2-normalized example embedding matrix
+    (one row per example) for model; re-encoded only if INTENT_EXAMPLES changes"""
+    examples = tuple((intent, example) for intent, items in INTENT_EXAMPLES.items() for example in items)
+    with _example_lock:
+        cached = _example_matrices.get(model)
+        if cached is None or cached[0] != examples:
+            matrix = model.encode([example for _, example in examples],
+                                  batch_size=INTENT_BATCH_SIZE, convert_to_numpy=True)
+            cached = (examples, [intent for intent, _ in examples], _normalize_rows(matrix))
+            _example_matrices[model] = cached
+    return cached[1], cached[2]
+
 def detect_intent_sentence_transformers(text: str, model=None) -> Tuple[str, float]:
     """Detect intent using Sentence Transformers semantic similarity"""
+    return detect_intents_sentence_transformers([text], model)[0]
+
+def detect_intents_sentence_transformers(texts: List[str], model=None) -> List[Tuple[str, float]]:
+    """Classify a batch of texts: one encode call, one product with the cached example matrix"""
     if model is None:
-        model = init_sentence_transformer()
-    
-    if model is None:
-        return "unknown", 0.3
-    
+        model = get_model("sentence_transformers")
+
+    if model is None or not texts:
+        return [("unknown", 0.3)] * len(texts)
+
     try:
-        from sklearn.metrics.pairwise import cosine_similarity
-        import numpy as np
-        
-        # Encode user input
-        user_embedding = model.encode(text, convert_to_tensor=False)
-        
-        # Compute similarity to intent examples
-        best_intent = "unknown"
-        best_score = 0.3
-        
-        for intent, examples in INTENT_EXAMPLES.items():
-            for example in examples:
-                example_embedding = model.encode(example, convert_to_tensor=False)
-                similarity = cosine_similarity(
-                    [user_embedding],
-                    [example_embedding]
-                )[0][0]
-                
-                if similarity > best_score:
-                    best_score = similarity
-                    best_intent = intent
-        
-        return best_intent, float(best_score)
+        example_intents, examples = example_matrix(model)
+        embeddings = model.encode(list(texts), batch_size=INTENT_BATCH_SIZE, convert_to_numpy=True)
+
+        # rows: texts, columns: examples
+        similarities = _normalize_rows(embeddings) @ examples.T
+        best = similarities.argmax(axis=1)
+
+        results = []
+        for row, column in enumerate(best):
+            score = float(similarities[row, column])
+            # The best example must beat 0.3, otherwise the intent is unknown
+            if score > 0.3:
+                results.append((example_intents[column], score))
+            else:
+                results.append(("unknown", 0.3))
+        return results
     except Exception as e:
         print(f"[ERROR] Sentence Transformers inference failed: {e}")
-        return "unknown", 0.3
+        return [("unknown", 0.3)] * len(texts)
 
 # ============= 3. Claude API (via OpenAI-compatible interface) =============
 
-def detect_intent_claude(text: str, api_key: Optional[str] = None) -> Tuple[str, float]:
-    """Detect intent using Claude API"""
-    api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
-    
-    if not api_key:
-        print("[WARNING] ANTHROPIC_API_KEY not set. Skipping Claude detection.")
-        return "unknown", 0.3
-    
-    try:
-        import anthropic
-        
-        client = anthropic.Anthropic(api_key=api_key)
-        
-        intent_list = ", ".join(INTENT_CONFIG.keys())
-        
-        prompt = f"""Analyze the user's intent from the following message and classify it into one of these categories: {intent_list}
+def _claude_prompt(text: str) -> str:
+    intent_list = ", ".join(INTENT_CONFIG.keys())
+    return f"""Analyze the user's intent from the following message and classify it into one of these categories: {intent_list}
 
 User message: "{text}"
 
@@ -149,76 +254,438 @@ Respond with ONLY a JSON object in this format:
 
 Where confidence is how certain you are (1.0 = very certain, 0.0 = not certain).
 Available intents: {intent_list}"""
-        
-        message = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
+
+def _parse_claude_message(message) -> Tuple[str, float]:
+    result = json.loads(message.content[0].text.strip())
+    intent = result.get("intent", "unknown")
+    confidence = float(result.get("confidence", 0.3))
+
+    # Validate intent
+    if intent not in INTENT_CONFIG:
+        intent = "unknown"
+        confidence = 0.3
+
+    return intent, confidence
+
+# One client per API key and endpoint, so calls reuse its connection pool
+_claude_clients = {}
+_claude_lock = threading.Lock()
+
+def claude_client(api_key: str, base_url: Optional[str] = None):
+    """The process-wide anthropic.Anthropic client for api_key"""
+    import anthropic
+    with _claude_lock:
+        client = _claude_clients.get((api_key, base_url))
+        if client is None:
+            client = anthropic.Anthropic(api_key=api_key, base_url=base_url, max_retries=CLAUDE_MAX_RETRIES)
+            _claude_clients[(api_key, base_url)] = client
+        return client
+
+def detect_intent_claude(text: str, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                         timeout: Optional[float] = None) -> Tuple[str, float]:
+    """Detect intent using Claude API; answers are cached in CLAUDE_CACHE, and
+    errors and timeouts fall back to the rule-based intent"""
+    api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+    
+    if not api_key:
+        print("[WARNING] ANTHROPIC_API_KEY not set. Skipping Claude detection.")
+        return detect_intent_rule_based(text)
+
+    prompt = _claude_prompt(text)
+    key = request_key(CLAUDE_MODEL, prompt)
+    cached = CLAUDE_CACHE.get(key)
+    if cached is not None:
+        return tuple(cached)
+
+    try:
+        message = claude_client(api_key, base_url).messages.create(
+            model=CLAUDE_MODEL,
             max_tokens=100,
             messages=[
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            timeout=timeout or CLAUDE_TIMEOUT
         )
-        
-        response_text = message.content[0].text.strip()
-        result = json.loads(response_text)
-        
-        intent = result.get("intent", "unknown")
-        confidence = float(result.get("confidence", 0.3))
-        
-        # Validate intent
-        if intent not in INTENT_CONFIG:
-            intent = "unknown"
-            confidence = 0.3
-        
-        return intent, confidence
+        result = _parse_claude_message(message)
     except Exception as e:
-        print(f"[ERROR] Claude API inference failed: {e}")
-        return "unknown", 0.3
+        print(f"[ERROR] Claude API inference failed, using rule-based intent: {e}")
+        return detect_intent_rule_based(text)
+
+    CLAUDE_CACHE.put(key, list(result))
+    return result
+
+# Async clients (and their connections) belong to the event loop they were
+# created on: one per loop, API key and endpoint
+_claude_async_clients = weakref.WeakKeyDictionary()
+# Event loop thread that runs detect_intents_claude's batches
+_claude_loop = None
+
+def claude_async_client(api_key: str, base_url: Optional[str] = None):
+    """The anthropic.AsyncAnthropic client for api_key on the running event loop"""
+    import anthropic
+    loop = asyncio.get_running_loop()
+    with _claude_lock:
+        clients = _claude_async_clients.setdefault(loop, {})
+        client = clients.get((api_key, base_url))
+        if client is None:
+            client = anthropic.AsyncAnthropic(api_key=api_key, base_url=base_url, max_retries=CLAUDE_MAX_RETRIES)
+            clients[(api_key, base_url)] = client
+        return client
+
+def _cached_claude_answers(texts: List[str]):
+    """({text: cached answer}, {text: cache key}) for the distinct texts"""
+    answers = {}
+    missing = {}
+    for text in dict.fromkeys(texts):
+        key = request_key(CLAUDE_MODEL, _claude_prompt(text))
+        cached = CLAUDE_CACHE.get(key)
+        if cached is not None:
+            answers[text] = tuple(cached)
+        else:
+            missing[text] = key
+    return answers, missing
+
+async def detect_intents_claude_async(texts: Iterable[str], api_key: Optional[str] = None,
+                                      max_concurrency: int = CLAUDE_MAX_CONCURRENCY,
+                                      base_url: Optional[str] = None,
+                                      timeout: Optional[float] = None) -> List[Tuple[str, float]]:
+    """Classify many texts with concurrent Claude requests, at most
+    max_concurrency in flight; cached and repeated texts are not sent again"""
+    texts = list(texts)
+    api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        print("[WARNING] ANTHROPIC_API_KEY not set. Skipping Claude detection.")
+        return [detect_intent_rule_based(text) for text in texts]
+
+    # The cache reads and appends to its file; keep that off the event loop
+    answers, missing = await asyncio.to_thread(_cached_claude_answers, texts)
+    if missing:
+        client = claude_async_client(api_key, base_url)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        fresh = []
+
+        async def classify(text, key):
+            async with semaphore:
+                try:
+                    message = await client.messages.create(
+                        model=CLAUDE_MODEL,
+                        max_tokens=100,
+                        messages=[{"role": "user", "content": _claude_prompt(text)}],
+                        timeout=timeout or CLAUDE_TIMEOUT
+                    )
+                    result = _parse_claude_message(message)
+                except Exception as e:
+                    print(f"[ERROR] Claude API inference failed, using rule-based intent: {e}")
+                    return text, detect_intent_rule_based(text)
+            fresh.append((key, list(result)))
+            return text, result
+
+        answers.update(await asyncio.gather(*(classify(text, key) for text, key in missing.items())))
+        await asyncio.to_thread(CLAUDE_CACHE.put_many, fresh)
+
+    return [answers[text] for text in texts]
+
+def _claude_event_loop():
+    global _claude_loop
+    with _claude_lock:
+        if _claude_loop is None:
+            _claude_loop = asyncio.new_event_loop()
+            threading.Thread(target=_claude_loop.run_forever, name="claude-intents", daemon=True).start()
+        return _claude_loop
+
+def detect_intents_claude(texts: Iterable[str], api_key: Optional[str] = None, **kwargs) -> List[Tuple[str, float]]:
+    """Blocking detect_intents_claude_async. Batches run on one long-lived
+    event loop thread, so its clients keep their connections between calls
+    and callers inside a running event loop can use it too."""
+    batch = detect_intents_claude_async(list(texts), api_key, **kwargs)
+    return asyncio.run_coroutine_threadsafe(batch, _claude_event_loop()).result()
+
+# ============= 4. Distilled Classifier =============
+
+def init_distilled_classifier():
+    """Load the classifier trained by intent_distillation.py"""
+    try:
+        from intent_distillation import load_distilled_classifier
+        return load_distilled_classifier()
+    except Exception as e:
+        print(f"[ERROR] Failed to load distilled intent classifier: {e}")
+        return None
+
+def detect_intent_distilled(text: str, model=None) -> Tuple[str, float]:
+    """Detect intent with the distilled classifier"""
+    return detect_intents_distilled([text], model)[0]
+
+def detect_intents_distilled(texts: List[str], model=None) -> List[Tuple[str, float]]:
+    """Classify a batch of texts with the distilled classifier"""
+    if model is None:
+        model = get_model("distilled")
+
+    if model is None or not texts:
+        return [("unknown", 0.3)] * len(texts)
+    return model.predict_batch(texts)
+
+# ============= Model registry =============
+
+def _warm_up_huggingface(classifier):
+    templates = [config["template"] for config in INTENT_CONFIG.values()]
+    classifier("warm up", templates, multi_class=False)
+
+def _warm_up_sentence_transformer(model):
+    # Also encodes INTENT_EXAMPLES, the other first-request cost
+    example_matrix(model)
+
+MODEL_REGISTRY = ModelRegistry(INTENT_MODEL_MEMORY_MB)
+# Sizes are fallbacks for when parameter memory cannot be measured
+MODEL_REGISTRY.register("huggingface", init_huggingface_classifier, _warm_up_huggingface, size_mb=1600)
+MODEL_REGISTRY.register("sentence_transformers", init_sentence_transformer, _warm_up_sentence_transformer, size_mb=90)
+MODEL_REGISTRY.register("sentence_transformers_int8", init_sentence_transformer_int8,
+                        _warm_up_sentence_transformer, size_mb=25)
+MODEL_REGISTRY.register("distilled", init_distilled_classifier, size_mb=1)
+# Backends whose forward pass is worth batching concurrent detect() calls for;
+# the distilled classifier answers faster than a micro-batch hand-off
+MICRO_BATCHED_BACKENDS = ("huggingface", "sentence_transformers", "sentence_transformers_int8")
+
+def get_model(backend: str):
+    """The process-wide model for a backend, loaded and warmed up on first use"""
+    return MODEL_REGISTRY.get(backend)
+
+def preload_models(backends: Optional[Iterable[str]] = None) -> None:
+    """Load backends now (default: INTENT_PRELOAD) instead of on the first request"""
+    MODEL_REGISTRY.preload(name.strip() for name in (INTENT_PRELOAD if backends is None else backends))
 
 # ============= Unified Interface =============
 
 class TransformerIntentDetector:
     """Unified intent detector with multiple backends"""
     
-    def __init__(self, backend: str = "huggingface"):
+    def __init__(self, backend: str = "huggingface", micro_batching: bool = INTENT_MICRO_BATCHING,
+                 max_batch_size: Optional[int] = None, max_wait_ms: Optional[float] = None,
+                 model=None):
         """
         Initialize detector with specified backend
         
         Args:
-            backend: One of "huggingface", "sentence_transformers", "claude"
+            backend: One of "huggingface", "sentence_transformers",
+                "sentence_transformers_int8", "claude", "distilled"
+            micro_batching: Group concurrent detect() calls on the
+                MICRO_BATCHED_BACKENDS into batched forward passes
+            max_batch_size: Most texts per micro-batch (default: INTENT_MAX_BATCH_SIZE)
+            max_wait_ms: How long a micro-batch waits for more texts
+                (default: INTENT_MAX_WAIT_MS)
+            model: An already loaded model (the pipeline, for huggingface)
+                to use instead of the shared one from MODEL_REGISTRY,
+                which is then not loaded
         """
         self.backend = backend
+        # None: use the shared model from MODEL_REGISTRY
         self.model = None
         self.classifier = None
-        
         if backend == "huggingface":
-            self.classifier = init_huggingface_classifier()
-        elif backend == "sentence_transformers":
-            self.model = init_sentence_transformer()
+            self.classifier = model
+        else:
+            self.model = model
+        self.api_key = None
+        self.micro_batching = micro_batching
+        self.max_batch_size = max_batch_size or INTENT_MAX_BATCH_SIZE
+        self.max_wait_ms = INTENT_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
+        if model is None:
+            self._load(backend)
+
+    def _load(self, backend: str) -> None:
+        if backend in MODEL_REGISTRY:
+            # Loads once per process; instant when already resident
+            get_model(backend)
         elif backend == "claude":
             self.api_key = os.getenv("ANTHROPIC_API_KEY")
     
+    def _model_or_shared(self):
+        return self.model if self.model is not None else get_model(self.backend)
+
     def detect(self, text: str) -> Tuple[str, float]:
         """Detect intent using configured backend"""
+        if self.micro_batching and self.backend in MICRO_BATCHED_BACKENDS:
+            return self.micro_batcher().submit(text).result()
         if self.backend == "huggingface":
             return detect_intent_huggingface(text, self.classifier)
         elif self.backend == "sentence_transformers":
             return detect_intent_sentence_transformers(text, self.model)
+        elif self.backend == "sentence_transformers_int8":
+            return detect_intent_sentence_transformers(text, self._model_or_shared())
         elif self.backend == "claude":
             return detect_intent_claude(text, self.api_key)
+        elif self.backend == "distilled":
+            return detect_intent_distilled(text, self.model)
         else:
             return "unknown", 0.3
     
+    def detect_batch(self, texts: Iterable[str]) -> List[Tuple[str, float]]:
+        """Detect intents for many texts, batching model calls where the backend allows"""
+        texts = list(texts)
+        if self.backend == "huggingface":
+            return detect_intents_huggingface(texts, self.classifier)
+        elif self.backend == "sentence_transformers":
+            return detect_intents_sentence_transformers(texts, self.model)
+        elif self.backend == "sentence_transformers_int8":
+            return detect_intents_sentence_transformers(texts, self._model_or_shared())
+        elif self.backend == "distilled":
+            return detect_intents_distilled(texts, self.model)
+        elif self.backend == "claude":
+            return detect_intents_claude(texts, self.api_key)
+        return [self.detect(text) for text in texts]
+
+    def detect_many(self, texts: Iterable[str]) -> List[Tuple[str, float]]:
+        """Same as detect_batch"""
+        return self.detect_batch(texts)
+
+    def micro_batcher(self) -> MicroBatcher:
+        """The MicroBatcher that detect() submits to, started on first use"""
+        with self._batcher_lock:
+            if self._batcher is None:
+                # The worker thread only holds the detector weakly, so a
+                # dropped detector is collected and its worker stopped
+                detect_batch = weakref.WeakMethod(self.detect_batch)
+                self._batcher = MicroBatcher(
+                    lambda texts: detect_batch()(texts), self.max_batch_size, self.max_wait_ms,
+                    name=f"intent-{self.backend}",
+                )
+                weakref.finalize(self, self._batcher.close, False)
+            return self._batcher
+
+    def close(self) -> None:
+        """Stop the micro-batching worker, if one was started"""
+        with self._batcher_lock:
+            batcher, self._batcher = self._batcher, None
+        if batcher is not None:
+            batcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+    
     def switch_backend(self, backend: str) -> bool:
         """Switch to a different backend"""
         try:
+            # A model passed to the constructor belongs to the old backend
+            self.model = None
+            self.classifier = None
+            self.close()
             self.backend = backend
-            if backend == "huggingface":
-                self.classifier = init_huggingface_classifier()
-            elif backend == "sentence_transformers":
-                self.model = init_sentence_transformer()
-            elif backend == "claude":
-                self.api_key = os.getenv("ANTHROPIC_API_KEY")
+            self._load(backend)
             return True
         except Exception as e:
             print(f"[ERROR] Failed to switch to {backend}: {e}")
             return False
+
+# ============= Cascade =============
+
+def cascade_tiers(spec: str = INTENT_CASCADE_TIERS) -> List[Tuple[str, float]]:
+    """Parse "backend:budget_ms,..." into (backend, budget_ms) pairs"""
+    tiers = []
+    for entry in spec.split(","):
+        backend, _, budget = entry.strip().partition(":")
+        if backend:
+            tiers.append((backend, float(budget or 100)))
+    return tiers
+
+class CascadeIntentDetector:
+    """Rule-based intent detection first; only answers below the confidence
+    threshold are escalated to the model backends, one tier at a time"""
+
+    def __init__(self, tiers=None, threshold: Optional[float] = None):
+        """
+        Args:
+            tiers: (detector, budget_ms) pairs to escalate through, in order
+                (default: a TransformerIntentDetector per INTENT_CASCADE_TIERS
+                backend). A tier that has not answered within its budget is
+                skipped.
+            threshold: Confidence below which an answer is escalated
+                (default: reasoning_engine.CONFIDENCE_THRESHOLD)
+        """
+        if threshold is None:
+            import reasoning_engine
+            threshold = reasoning_engine.CONFIDENCE_THRESHOLD
+        # close() only closes the detectors built here
+        self._own_tiers = tiers is None
+        if tiers is None:
+            tiers = [(TransformerIntentDetector(backend), budget) for backend, budget in cascade_tiers()]
+        self.tiers = list(tiers)
+        self.threshold = threshold
+        self.answered = Counter()
+        self.timeouts = Counter()
+        self._lock = threading.Lock()
+
+    def classify(self, text: str, rules: Optional[Tuple[str, float]] = None) -> Tuple[str, float, str]:
+        """(intent, confidence, tier) for one text"""
+        return self.classify_batch([text], None if rules is None else [rules])[0]
+
+    def classify_batch(self, texts: Iterable[str],
+                       rules: Optional[Iterable[Tuple[str, float]]] = None) -> List[Tuple[str, float, str]]:
+        """(intent, confidence, tier) per text, where tier is "rules" or the
+        backend that answered. The most confident answer wins; texts
+        escalated together share each tier's budget.
+
+        rules: the rule-based (intent, confidence) per text when the caller
+            already has them, e.g. from analyze_input; otherwise they are
+            computed here
+        """
+        texts = list(texts)
+        if rules is None:
+            rules = [detect_intent_rule_based(text) for text in texts]
+        results = [(intent, confidence, "rules") for intent, confidence in rules]
+        timeouts = Counter()
+        for detector, budget_ms in self.tiers:
+            pending = [i for i, (_, confidence, _) in enumerate(results) if confidence < self.threshold]
+            if not pending:
+                break
+            # The tier's micro-batcher lets the wait time out and lets
+            # concurrent escalations share a forward pass
+            batcher = detector.micro_batcher()
+            futures = {i: batcher.submit(texts[i]) for i in pending}
+            _, late = wait(futures.values(), timeout=budget_ms / 1000)
+            for future in late:
+                future.cancel()
+                timeouts[detector.backend] += 1
+            for i, future in futures.items():
+                if future in late or future.exception() is not None:
+                    continue
+                intent, confidence = future.result()
+                if confidence > results[i][1]:
+                    results[i] = (intent, confidence, detector.backend)
+
+        with self._lock:
+            self.answered.update(tier for _, _, tier in results)
+            self.timeouts.update(timeouts)
+        return results
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        """Detect intent, escalating only when the rules are unsure"""
+        return self.classify(text)[:2]
+
+    def detect_batch(self, texts: Iterable[str]) -> List[Tuple[str, float]]:
+        """detect() for many texts; escalated texts are batched per tier"""
+        return [result[:2] for result in self.classify_batch(texts)]
+
+    def close(self) -> None:
+        """Stop the micro-batching workers of the default tiers"""
+        if self._own_tiers:
+            for detector, _ in self.tiers:
+                detector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def info(self) -> Dict:
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "tiers": [(detector.backend, budget_ms) for detector, budget_ms in self.tiers],
+                "answered": dict(self.answered),
+                "timeouts": dict(self.timeouts),
+            }
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Distilled intent classifier.
+
+A corpus is labeled offline by a heavy backend (the teacher, by default the
+HuggingFace zero-shot classifier), and a linear softmax model over hashed
+word and character n-grams is trained on those labels in NumPy. The
+trained weights are saved to an .npz file that the "distilled"
+TransformerIntentDetector backend loads; classifying one text then costs a
+feature hash and a small matrix product.
+
+Usage:
+    python intent_distillation.py
+    python intent_distillation.py --teacher sentence_transformers --corpus utterances.txt --output intent_distilled.npz
+"""
+
+import argparse
+import itertools
+import os
+import string
+
+from vector_memory import HashingEmbedder
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DISTILLED_MODEL_PATH = os.getenv("INTENT_DISTILLED_MODEL", os.path.join(SCRIPT_DIR, "intent_distilled.npz"))
+# Hashed feature buckets
+DISTILLED_DIM = int(os.getenv("INTENT_DISTILLED_DIM", "4096"))
+
+# The built-in training corpus: every template filled with every
+# combination of its slots. It is kept apart from the test suites, so
+# their labeled cases measure the student on unseen text. The teacher
+# labels each utterance; the grouping below is only for reading.
+CORPUS_TEMPLATES = [
+    # Reminders
+    "remind me to {task} {when}",
+    "set a reminder to {task} {when}",
+    "don't let me forget to {task}",
+    "alert me {when} to {task}",
+    # Meetings
+    "schedule a meeting with {person} {when}",
+    "book a call with {person} {when}",
+    "set up an appointment with {person} {when}",
+    # Recall
+    "what did I say about {topic}",
+    "did I mention {topic} earlier",
+    "do you remember what I told you about {topic}",
+    # Preferences
+    "I prefer {preference}",
+    "I like {preference}",
+    "my preference is {preference}",
+    # Tasks
+    "{task} {when}",
+    "I need to {task}",
+    "add a task to {task}",
+]
+CORPUS_SLOTS = {
+    "task": ["call the bank", "pay the rent", "submit the report", "buy groceries",
+             "email the client", "renew my passport"],
+    "when": ["tomorrow", "on friday", "at 3 pm", "next week", "tonight", "on 12 march"],
+    "person": ["alice", "John", "the design team", "my manager", "Dr Rao"],
+    "topic": ["the budget", "the project deadline", "my vacation", "the client meeting", "the tax form"],
+    "preference": ["morning meetings", "tea over coffee", "short reminders",
+                   "working from home on fridays", "quiet hours after 8 pm"],
+}
+
+
+class DistilledIntentClassifier:
+    """Softmax regression over HashingEmbedder features"""
+
+    def __init__(self, labels, weights, bias):
+        import numpy as np
+
+        self.labels = list(labels)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.embedder = HashingEmbedder(self.weights.shape[0])
+
+    @classmethod
+    def fit(cls, texts, labels, dim=DISTILLED_DIM, epochs=300, learning_rate=2.0, l2=1e-4):
+        """Train on (text, label) pairs with full-batch gradient descent"""
+        import numpy as np
+
+        classes = sorted(set(labels))
+        features = HashingEmbedder(dim).encode(list(texts))
+        targets = np.zeros((len(labels), len(classes)), dtype=np.float32)
+        targets[np.arange(len(labels)), [classes.index(label) for label in labels]] = 1.0
+
+        weights = np.zeros((dim, len(classes)), dtype=np.float32)
+        bias = np.zeros(len(classes), dtype=np.float32)
+        for _ in range(epochs):
+            error = (_softmax(features @ weights + bias) - targets) / len(labels)
+            weights -= learning_rate * (features.T @ error + l2 * weights)
+            bias -= learning_rate * error.sum(axis=0)
+        return cls(classes, weights, bias)
+
+    def predict_batch(self, texts):
+        """(intent, probability) per text"""
+        texts = list(texts)
+        if not texts:
+            return []
+        probabilities = _softmax(self.embedder.encode(texts) @ self.weights + self.bias)
+        best = probabilities.argmax(axis=1)
+        return [(self.labels[i], float(row[i])) for i, row in zip(best, probabilities)]
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+    def save(self, path=DISTILLED_MODEL_PATH):
+        import numpy as np
+
+        np.savez_compressed(path, labels=np.array(self.labels), weights=self.weights, bias=self.bias)
+
+    @classmethod
+    def load(cls, path=DISTILLED_MODEL_PATH):
+        import numpy as np
+
+        with np.load(path) as data:
+            return cls([str(label) for label in data["labels"]], data["weights"], data["bias"])
+
+
+def _softmax(scores):
+    import numpy as np
+
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def load_distilled_classifier(path=DISTILLED_MODEL_PATH):
+    """The saved classifier, or None if it has not been trained yet"""
+    if not os.path.exists(path):
+        print(f"[ERROR] No distilled intent model at {path}; run intent_distillation.py")
+        return None
+    return DistilledIntentClassifier.load(path)
+
+
+def teacher_labels(texts, teacher="huggingface"):
+    """(intent, confidence) per text from a heavy backend, or "rules" for
+    nlp_engine's rule-based detector"""
+    texts = list(texts)
+    if teacher == "rules":
+        from nlp_engine import detect_intent_rule_based
+        return [detect_intent_rule_based(text) for text in texts]
+
+    from intent_detectors import MODEL_REGISTRY, TransformerIntentDetector, get_model
+    if teacher in MODEL_REGISTRY and get_model(teacher) is None:
+        raise RuntimeError(f"Teacher backend {teacher} is not available")
+    return TransformerIntentDetector(teacher, micro_batching=False).detect_batch(texts)
+
+
+def templated_utterances():
+    """CORPUS_TEMPLATES filled with every combination of CORPUS_SLOTS"""
+    utterances = []
+    for template in CORPUS_TEMPLATES:
+        slots = [name for _, name, _, _ in string.Formatter().parse(template) if name]
+        for values in itertools.product(*(CORPUS_SLOTS[slot] for slot in slots)):
+            utterances.append(template.format(**dict(zip(slots, values))))
+    return utterances
+
+
+def training_corpus(path=None, exclude=()):
+    """INTENT_EXAMPLES and the templated utterances, plus one utterance per
+    line of path if given, without any text in exclude"""
+    from intent_detectors import INTENT_EXAMPLES
+
+    corpus = [example for examples in INTENT_EXAMPLES.values() for example in examples]
+    corpus.extend(templated_utterances())
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            corpus.extend(line.strip() for line in f if line.strip())
+    exclude = set(exclude)
+    return [text for text in dict.fromkeys(corpus) if text not in exclude]
+
+
+def distill(texts, teacher="huggingface", dim=DISTILLED_DIM):
+    """Label texts with the teacher and train a classifier on its answers"""
+    texts = list(texts)
+    labels = [intent for intent, _ in teacher_labels(texts, teacher)]
+    return DistilledIntentClassifier.fit(texts, labels, dim=dim)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the distilled intent classifier")
+    parser.add_argument("--teacher", default="huggingface",
+                        help="Backend that labels the corpus (huggingface, sentence_transformers, claude or rules)")
+    parser.add_argument("--corpus", help="Extra utterances, one per line")
+    parser.add_argument("--dim", type=int, default=DISTILLED_DIM, help="Hashed feature buckets")
+    parser.add_argument("--output", default=DISTILLED_MODEL_PATH, help="Where to save the model")
+    args = parser.parse_args()
+
+    texts = training_corpus(args.corpus)
+    try:
+        classifier = distill(texts, args.teacher, args.dim)
+    except RuntimeError as e:
+        parser.error(str(e))
+    classifier.save(args.output)
+    print(f"Trained on {len(texts)} utterances labeled by {args.teacher}; saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Multi-keyword matching with an Aho-Corasick automaton.
+
+All keywords are compiled into one deterministic automaton, so a scan reads
+each character of the text exactly once no matter how many keywords there
+are, and reports every keyword occurrence - including overlapping ones
+such as "remind" inside "reminder".
+"""
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton mapping keywords to labels.
+
+    Args:
+        keywords: Mapping of label -> iterable of keyword strings. A label
+            is reported when any of its keywords occurs in the text.
+    """
+
+    def __init__(self, keywords):
+        self.labels = list(keywords)
+        # transitions[state] maps a character to the next state; states
+        # with no entry for a character fall back to the root (state 0)
+        self.transitions = [{}]
+        self.outputs = [0]
+        for bit, label in enumerate(self.labels):
+            for keyword in keywords[label]:
+                self._insert(keyword, 1 << bit)
+        self._link()
+
+    def _insert(self, keyword, mask):
+        state = 0
+        for char in keyword:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions.append({})
+                self.outputs.append(0)
+                self.transitions[state][char] = next_state
+            state = next_state
+        self.outputs[state] |= mask
+
+    def _link(self):
+        """Add failure links and fold them into a complete transition table"""
+        fail = [0] * len(self.transitions)
+        children = [list(edges.items()) for edges in self.transitions]
+        queue = [child for _, child in children[0]]
+        # Breadth-first, so a state's failure target is always complete
+        # before the state itself is visited
+        for state in queue:
+            failure = self.transitions[fail[state]]
+            self.outputs[state] |= self.outputs[fail[state]]
+            for char, child in children[state]:
+                fail[child] = failure.get(char, 0)
+                queue.append(child)
+            # Inherit the failure state's transitions so scanning never
+            # has to walk failure links
+            for char, target in failure.items():
+                self.transitions[state].setdefault(char, target)
+
+    def scan(self, text):
+        """Bitmask of the labels (bit i = self.labels[i]) found in text"""
+        transitions = self.transitions
+        outputs = self.outputs
+        state = 0
+        found = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            found |= outputs[state]
+        return found
+
+    def scan_with_suffix(self, text):
+        """(labels found anywhere in text, labels with a keyword that text
+        ends with) as two bitmasks, from one pass over text"""
+        transitions = self.transitions
+        outputs = self.outputs
+        state = 0
+        found = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            found |= outputs[state]
+        # The final state's outputs, failure links folded in, are exactly
+        # the keywords ending at the last character
+        return found, outputs[state]
+
+    def find(self, text):
+        """Set of labels with at least one keyword in text"""
+        found = self.scan(text)
+        return {label for bit, label in enumerate(self.labels) if found >> bit & 1}
+
+    def __len__(self):
+        return len(self.transitions)
@@ -1,30 +1,37 @@
-from nlp_engine import analyze_input
+from nlp_engine import analyze_input, analysis_cache_info
 from reasoning_engine import reason
 from action_engine import execute
+from memory_system import flush
 
 def run():
     print("NIXIN AI - Layer 1 Context Engine Running\n")
 
-    while True:
-        user_input = input("You: ")
+    try:
+        while True:
+            user_input = input("You: ")
 
-        if user_input.lower() == "exit":
-            break
+            if user_input.lower() == "exit":
+                break
 
-        intent_data = analyze_input(user_input)
+            intent_data = analyze_input(user_input)
 
-        # 🔥 PROFESSIONAL OUTPUT BLOCK
-        print("\n===== CONTEXTUAL RESPONSE =====")
-        print("Intent:", intent_data["intent"])
-        print("Confidence:", intent_data["confidence"])
-        print("Entities:", intent_data["entities"])
-        print("================================\n")
+            # 🔥 PROFESSIONAL OUTPUT BLOCK
+            print("\n===== CONTEXTUAL RESPONSE =====")
+            print("Intent:", intent_data["intent"])
+            print("Confidence:", intent_data["confidence"])
+            print("Entities:", intent_data["entities"])
+            print("================================\n")
 
-        action_data = reason(intent_data, user_input)
+            action_data = reason(intent_data, user_input)
 
-        execute(action_data, user_input)
+            execute(action_data, user_input)
+    finally:
+        # Write out anything still queued in batched durability mode
+        flush()
 
 if __name__ == "__main__":
     run()
 
+    cache = analysis_cache_info()
+    print(f"\nAnalysis cache: {cache['hits']} hits / {cache['misses']} misses ({cache['hit_rate']:.0%})")
     print("\nNIXIN AI - Layer 1 Context Engine Stopped")
\ No newline at end of file
@@ -1,53 +1,813 @@
+import atexit
+import bisect
+import collections
+import copy
 import json
+import logging
 import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # No cross-process lock; one writing process at a time
+    fcntl = None
+
+from time_parser import to_timestamp
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 MEMORY_FILE = os.path.join(SCRIPT_DIR, "memory.json")
+MEMORY_DB_FILE = os.getenv("MEMORY_DB_FILE", os.path.join(SCRIPT_DIR, "memory.db"))
+
+# Conversation history is appended here one JSON line per turn and folded
+# back into memory.json whenever the document is rewritten anyway, or when
+# the log grows past HISTORY_COMPACT_BYTES. Each log starts with a header
+# line naming it; memory.json records the name of the last log it absorbed,
+# so a log left behind by a crash mid-compaction is not replayed twice.
+HISTORY_LOG_FILE = os.path.join(SCRIPT_DIR, "history.jsonl")
+HISTORY_COMPACT_BYTES = 256 * 1024
+
+# One of "json", "sqlite", "memory"
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "json")
+
+# "sync" writes every mutation through immediately; "batched" queues
+# mutations and group-commits them after MEMORY_FLUSH_EVERY operations or
+# MEMORY_FLUSH_INTERVAL seconds, whichever comes first. Batched mode trades
+# the last few unflushed turns on a hard crash for fewer disk writes.
+MEMORY_DURABILITY = os.getenv("MEMORY_DURABILITY", "sync")
+MEMORY_FLUSH_EVERY = int(os.getenv("MEMORY_FLUSH_EVERY", "20"))
+MEMORY_FLUSH_INTERVAL = float(os.getenv("MEMORY_FLUSH_INTERVAL", "1.0"))
+
+_log = logging.getLogger(__name__)
+
+
+def _empty_memory():
+    return {"preferences": {}, "tasks": [], "conversation_history": []}
+
+
+def normalize_task_key(text):
+    """Case- and whitespace-insensitive key used to de-duplicate tasks"""
+    return " ".join(str(text).lower().split())
+
+
+def _normalize_timestamp(value):
+    if value is None or isinstance(value, str):
+        return value
+    return to_timestamp(value)
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+# ============= Storage backends =============
+
+class MemoryBackend:
+    """Storage interface used by MemoryStore.
+
+    Write methods receive the store's already-updated document so that
+    whole-document backends can serialize it, while row-based backends only
+    persist the single change.
+    """
+
+    def load(self):
+        """Return the full memory document"""
+        raise NotImplementedError
+
+    def signature(self):
+        """Cheap token that changes when another process modifies storage"""
+        return None
+
+    def save(self, memory):
+        raise NotImplementedError
+
+    def write_preference(self, memory, key, value):
+        raise NotImplementedError
+
+    def write_task(self, memory, task):
+        raise NotImplementedError
+
+    def append_conversation(self, memory, text):
+        raise NotImplementedError
+
+    def apply(self, memory, ops):
+        """Persist a batch of queued operations; backends may group-commit"""
+        for op in ops:
+            if op[0] == "preference":
+                self.write_preference(memory, op[1], op[2])
+            elif op[0] == "task":
+                self.write_task(memory, op[1])
+            elif op[0] == "conversation":
+                self.append_conversation(memory, op[1])
+
+    def compact(self, memory):
+        pass
+
+    @contextmanager
+    def locked(self):
+        """Hold off writers in other processes; a store checks the
+        signature, reloads if needed and writes inside it"""
+        yield
+
+    def close(self):
+        pass
+
+
+class InMemoryBackend(MemoryBackend):
+    """Process-local storage for tests and benchmarks; never touches disk"""
+
+    def __init__(self, memory=None):
+        self._memory = _empty_memory()
+        if memory:
+            for section, value in copy.deepcopy(memory).items():
+                self._memory[section] = value
+
+    def load(self):
+        return copy.deepcopy(self._memory)
+
+    def save(self, memory):
+        self._memory = copy.deepcopy(memory)
+
+    def write_preference(self, memory, key, value):
+        self._memory["preferences"][key] = value
+
+    def write_task(self, memory, task):
+        self._memory["tasks"].append(dict(task))
+
+    def append_conversation(self, memory, text):
+        self._memory["conversation_history"].append(text)
+
+
+class JsonFileBackend(MemoryBackend):
+    """memory.json plus the append-only history log"""
+
+    # memory.json key holding the id of the last log folded into it
+    COMPACTED_LOG_KEY = "compacted_history_log"
+
+    def __init__(self, memory_file=MEMORY_FILE, history_file=HISTORY_LOG_FILE,
+                 compact_bytes=HISTORY_COMPACT_BYTES, fsync=True):
+        self.memory_file = memory_file
+        self.history_file = history_file
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        # (memory.json signature, id of the log it absorbed)
+        self._compacted = (None, None)
+        self._held = threading.local()
+
+    @contextmanager
+    def _file_lock(self, shared=False):
+        """Serialize appends and compactions across processes; readers
+        take it shared so they never see a half-finished compaction.
+        Re-entrant within a thread: an inner call runs under the outer
+        exclusive lock."""
+        if fcntl is None or getattr(self._held, "depth", 0):
+            self._held.depth = getattr(self._held, "depth", 0) + 1
+            try:
+                yield
+            finally:
+                self._held.depth -= 1
+            return
+        with open(f"{self.memory_file}.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            self._held.depth = 1
+            try:
+                yield
+            finally:
+                self._held.depth = 0
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def locked(self):
+        return self._file_lock()
+
+    def _read_history_log(self):
+        """(log id, entries) for the conversation appended since the last
+        compaction; the id is None for a missing or headerless log"""
+        log_id = None
+        entries = []
+        try:
+            with open(self.history_file, "r") as f:
+                for number, line in enumerate(f):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-append; skip it
+                        continue
+                    if number == 0 and isinstance(entry, dict) and "log_id" in entry:
+                        log_id = entry["log_id"]
+                        continue
+                    entries.append(entry)
+        except FileNotFoundError:
+            pass
+        return log_id, entries
+
+    def _log_header(self):
+        """Id of the current history log, from its first line only"""
+        try:
+            with open(self.history_file, "r") as f:
+                header = json.loads(f.readline())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return header.get("log_id") if isinstance(header, dict) else None
+
+    def _compacted_log_id(self):
+        """Id of the log memory.json has absorbed, reparsed only when
+        memory.json changed since it was last read"""
+        signature = _file_signature(self.memory_file)
+        if signature != self._compacted[0]:
+            with open(self.memory_file, "r") as f:
+                self._compacted = (signature, json.load(f).get(self.COMPACTED_LOG_KEY))
+        return self._compacted[1]
+
+    def _clear_history_log(self):
+        try:
+            os.remove(self.history_file)
+        except FileNotFoundError:
+            pass
+
+    def load(self):
+        with self._file_lock(shared=True):
+            with open(self.memory_file, "r") as f:
+                memory = json.load(f)
+                st = os.fstat(f.fileno())
+            log_id, entries = self._read_history_log()
+        compacted = memory.pop(self.COMPACTED_LOG_KEY, None)
+        self._compacted = ((st.st_mtime_ns, st.st_size), compacted)
+        if log_id is None or log_id != compacted:
+            memory["conversation_history"].extend(entries)
+        return memory
+
+    def signature(self):
+        return (_file_signature(self.memory_file), _file_signature(self.history_file))
+
+    def save(self, memory):
+        with self._file_lock():
+            self._write_snapshot(memory)
+
+    def _write_snapshot(self, memory):
+        # memory already holds the log entries, so writing it out is a
+        # compaction. The document names the log it absorbed before the log
+        # is dropped, so a crash in between leaves a log that load() skips.
+        log_id, _ = self._read_history_log()
+        document = dict(memory)
+        if log_id is not None:
+            document[self.COMPACTED_LOG_KEY] = log_id
+
+        # Write to a temp file and rename over memory.json so a crash
+        # mid-write leaves either the old or the new document, never a
+        # truncated one.
+        directory = os.path.dirname(os.path.abspath(self.memory_file))
+        fd, tmp_path = tempfile.mkstemp(prefix=".memory-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(document, f, indent=4)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, self.memory_file)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._compacted = (_file_signature(self.memory_file), document.get(self.COMPACTED_LOG_KEY))
+
+        self._clear_history_log()
+
+    def write_preference(self, memory, key, value):
+        self.save(memory)
+
+    def write_task(self, memory, task):
+        self.save(memory)
+
+    def _append_lines(self, memory, texts):
+        # O(1) per turn: append lines instead of rewriting the document
+        lines = "".join(json.dumps(text) + "\n" for text in texts)
+        with self._file_lock():
+            # A log a crashed compaction already folded into memory.json
+            # is dropped rather than appended to
+            log_id = self._log_header()
+            if log_id is not None and log_id == self._compacted_log_id():
+                self._clear_history_log()
+            with open(self.history_file, "a") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    lines = json.dumps({"log_id": uuid.uuid4().hex}) + "\n" + lines
+                f.write(lines)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+                size = f.tell()
+            if size > self.compact_bytes:
+                self._write_snapshot(memory)
+
+    def append_conversation(self, memory, text):
+        self._append_lines(memory, [text])
+
+    def apply(self, memory, ops):
+        # memory already reflects every queued op, so a batch containing
+        # any preference or task change is a single document rewrite.
+        if any(op[0] != "conversation" for op in ops):
+            self.save(memory)
+        else:
+            self._append_lines(memory, [op[1] for op in ops])
+
+    def compact(self, memory):
+        self.save(memory)
+
+
+class SQLiteBackend(MemoryBackend):
+    """SQLite storage: one row per preference, task and conversation turn"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS preferences (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task TEXT NOT NULL,
+            time TEXT
+        );
+        CREATE TABLE IF NOT EXISTS conversation_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+    """
+
+    # Columns added after the first schema; older databases get them
+    # through ALTER TABLE before the indexes are created.
+    TASK_COLUMNS = {
+        "person": "TEXT",
+        "task_key": "TEXT",
+        "timestamp": "TEXT",
+    }
+
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS idx_tasks_task_key ON tasks (task_key);
+        CREATE INDEX IF NOT EXISTS idx_tasks_person ON tasks (person);
+        CREATE INDEX IF NOT EXISTS idx_tasks_time ON tasks (time);
+        CREATE INDEX IF NOT EXISTS idx_tasks_timestamp ON tasks (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_history_created_at
+            ON conversation_history (created_at);
+    """
+
+    def __init__(self, db_file=MEMORY_DB_FILE):
+        self.db_file = db_file
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        if db_file != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        for column, column_type in self.TASK_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {column_type}")
+        self._conn.executescript(self.INDEXES)
+        self._conn.commit()
+
+    def _insert_task(self, task):
+        self._conn.execute(
+            "INSERT INTO tasks (task, time, person, task_key, timestamp) VALUES (?, ?, ?, ?, ?)",
+            (task["task"], task.get("time"), task.get("person"), normalize_task_key(task["task"]),
+             task.get("timestamp"))
+        )
+
+    def load(self):
+        memory = _empty_memory()
+        for key, value in self._conn.execute("SELECT key, value FROM preferences"):
+            memory["preferences"][key] = json.loads(value)
+        for task, task_time, person, timestamp in self._conn.execute(
+                "SELECT task, time, person, timestamp FROM tasks ORDER BY id"):
+            memory["tasks"].append({"task": task, "time": task_time, "person": person, "timestamp": timestamp})
+        memory["conversation_history"] = [
+            text for (text,) in
+            self._conn.execute("SELECT text FROM conversation_history ORDER BY id")
+        ]
+        return memory
+
+    def signature(self):
+        # data_version only changes when another connection commits
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def save(self, memory):
+        with self._conn:
+            self._conn.execute("DELETE FROM preferences")
+            self._conn.execute("DELETE FROM tasks")
+            self._conn.executemany(
+                "INSERT INTO preferences (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in memory["preferences"].items()]
+            )
+            for task in memory["tasks"]:
+                self._insert_task(task)
+            # Turns that were already stored keep their created_at, matched
+            # by text in order; only new turns are stamped now
+            created = {}
+            for text, created_at in self._conn.execute(
+                    "SELECT text, created_at FROM conversation_history ORDER BY id"):
+                created.setdefault(text, collections.deque()).append(created_at)
+            self._conn.execute("DELETE FROM conversation_history")
+            now = time.time()
+            rows = []
+            for text in memory["conversation_history"]:
+                stamps = created.get(text)
+                rows.append((text, stamps.popleft() if stamps else now))
+            self._conn.executemany(
+                "INSERT INTO conversation_history (text, created_at) VALUES (?, ?)", rows
+            )
+
+    def write_preference(self, memory, key, value):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO preferences (key, value) VALUES (?, ?)",
+                (key, json.dumps(value))
+            )
+
+    def write_task(self, memory, task):
+        with self._conn:
+            self._insert_task(task)
+
+    def append_conversation(self, memory, text):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO conversation_history (text, created_at) VALUES (?, ?)",
+                (text, time.time())
+            )
+
+    def apply(self, memory, ops):
+        # One transaction for the whole batch
+        with self._conn:
+            for op in ops:
+                if op[0] == "preference":
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO preferences (key, value) VALUES (?, ?)",
+                        (op[1], json.dumps(op[2]))
+                    )
+                elif op[0] == "task":
+                    self._insert_task(op[1])
+                elif op[0] == "conversation":
+                    self._conn.execute(
+                        "INSERT INTO conversation_history (text, created_at) VALUES (?, ?)",
+                        (op[1], time.time())
+                    )
+
+    def close(self):
+        self._conn.close()
+
+
+BACKENDS = {
+    "json": JsonFileBackend,
+    "sqlite": SQLiteBackend,
+    "memory": InMemoryBackend,
+}
+
+def create_backend(name=None, **kwargs):
+    """Build a storage backend by name ("json", "sqlite" or "memory")"""
+    name = name or MEMORY_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown memory backend: {name}")
+    return BACKENDS[name](**kwargs)
+
+
+# ============= Cached store =============
+
+class MemoryStore:
+    """Parsed memory kept resident in-process.
+
+    Every read first compares the backend's signature (file mtime/size for
+    JSON, data_version for SQLite) against the one seen at the last load, so
+    another process writing storage is picked up without a full reparse.
+    ``generation`` increases on every reload or mutation and can be used by
+    callers to key their own caches.
+
+    In "batched" durability mode mutations update the cache immediately and
+    are queued; flush() hands the queue to the backend in one go.
+
+    Tasks are indexed by normalized text (for O(1) de-duplication), by
+    person and time (for find_tasks) and kept sorted by their normalized
+    timestamp (for tasks_between); the indexes are rebuilt on reload and
+    maintained incrementally on insert.
+
+    Recall indexes over conversation history subscribe() to appended turns
+    and compare ``history_epoch``, which changes whenever the history is
+    replaced wholesale, to know when they must rebuild instead. Result
+    caches key on history_generation(), which also changes on every
+    appended turn.
+    """
+
+    def __init__(self, backend=None, durability=None, flush_every=None, flush_interval=None):
+        self.backend = backend if backend is not None else create_backend()
+        self.durability = durability or MEMORY_DURABILITY
+        self.flush_every = flush_every or MEMORY_FLUSH_EVERY
+        self.flush_interval = flush_interval if flush_interval is not None else MEMORY_FLUSH_INTERVAL
+        if self.durability not in ("sync", "batched"):
+            raise ValueError(f"Unknown memory durability mode: {self.durability}")
+        self.generation = 0
+        self.history_epoch = 0
+        self._history_generation = 0
+        self._memory = None
+        self._signature = None
+        self._pending = []
+        self._timer = None
+        self._task_index = {}
+        self._tasks_by_person = {}
+        self._tasks_by_time = {}
+        self._timestamp_keys = []
+        self._timestamp_tasks = []
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    @property
+    def lock(self):
+        """Re-entrant lock guarding the cache; held while listeners run"""
+        return self._lock
+
+    def _memory_view(self):
+        """Return the cached document, reloading it if storage changed"""
+        signature = self.backend.signature()
+        if self._memory is None or signature != self._signature:
+            self._memory = self.backend.load()
+            self._signature = signature
+            self.history_epoch += 1
+            self._history_generation += 1
+            self._rebuild_task_indexes()
+            # Queued ops have not reached storage yet; replay them on top
+            pending, self._pending = self._pending, []
+            for op in pending:
+                if op[0] != "task" or normalize_task_key(op[1]["task"]) not in self._task_index:
+                    self._apply_op(op)
+                    self._pending.append(op)
+            self.generation += 1
+        return self._memory
+
+    def _index_task(self, task):
+        self._task_index[normalize_task_key(task["task"])] = task
+        if task.get("person"):
+            self._tasks_by_person.setdefault(normalize_task_key(task["person"]), []).append(task)
+        if task.get("time"):
+            self._tasks_by_time.setdefault(normalize_task_key(task["time"]), []).append(task)
+        if task.get("timestamp"):
+            # (timestamp, insertion order) keeps equal timestamps in the
+            # order they were added and never compares the task dicts
+            key = (task["timestamp"], len(self._timestamp_keys))
+            position = bisect.bisect_right(self._timestamp_keys, key)
+            self._timestamp_keys.insert(position, key)
+            self._timestamp_tasks.insert(position, task)
+
+    def _rebuild_task_indexes(self):
+        self._task_index = {}
+        self._tasks_by_person = {}
+        self._tasks_by_time = {}
+        self._timestamp_keys = []
+        self._timestamp_tasks = []
+        for task in self._memory["tasks"]:
+            self._index_task(task)
+
+    def _apply_op(self, op):
+        memory = self._memory
+        if op[0] == "preference":
+            memory["preferences"][op[1]] = op[2]
+        elif op[0] == "task":
+            memory["tasks"].append(op[1])
+            self._index_task(op[1])
+        elif op[0] == "conversation":
+            memory["conversation_history"].append(op[1])
+            self._history_generation += 1
+
+    def _notify(self, op):
+        if op[0] != "conversation":
+            return
+        position = len(self._memory["conversation_history"]) - 1
+        for callback in list(self._listeners):
+            try:
+                callback(position, op[1])
+            except Exception:
+                # A broken listener must not lose the write; it catches up
+                # on its next sync
+                _log.exception("Conversation listener %r failed", callback)
+
+    def _mutate(self, op):
+        self._memory_view()
+        self._apply_op(op)
+        self.generation += 1
+        self._pending.append(op)
+        self._notify(op)
+
+        if self.durability == "sync" or len(self._pending) >= self.flush_every:
+            self.flush()
+        elif self._timer is None and self.flush_interval > 0:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write all queued mutations to the backend"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            with self.backend.locked():
+                # Another process may have written since the last read;
+                # a document rewrite from a stale copy would drop its
+                # changes, so reload and replay the queue on top first
+                self._memory_view()
+                ops, self._pending = self._pending, []
+                self.backend.apply(self._memory, ops)
+                self._signature = self.backend.signature()
+
+    def load(self):
+        with self._lock:
+            return copy.deepcopy(self._memory_view())
+
+    def save(self, memory):
+        with self._lock:
+            self._pending = []
+            self._memory = copy.deepcopy(memory)
+            self.history_epoch += 1
+            self._history_generation += 1
+            self._rebuild_task_indexes()
+            self.backend.save(self._memory)
+            self._signature = self.backend.signature()
+            self.generation += 1
+
+    def compact(self):
+        """Fold any append-only history log back into primary storage"""
+        with self._lock:
+            self.flush()
+            with self.backend.locked():
+                self.backend.compact(self._memory_view())
+                self._signature = self.backend.signature()
+
+    def store_preference(self, key, value):
+        with self._lock:
+            self._mutate(("preference", key, value))
+
+    def add_task(self, task, time, person=None, timestamp=None):
+        """Store a task; timestamp is the resolved time as a datetime or a
+        UTC ISO 8601 string (see time_parser.to_timestamp)"""
+        with self._lock:
+            # Prevent duplicates
+            if self.has_task(task):
+                return
+
+            self._mutate(("task", {
+                "task": task,
+                "time": time,
+                "person": person,
+                "timestamp": _normalize_timestamp(timestamp)
+            }))
+
+    def has_task(self, task):
+        with self._lock:
+            self._memory_view()
+            return normalize_task_key(task) in self._task_index
+
+    def find_tasks(self, person=None, time=None):
+        """Tasks matching person and/or time, looked up through the indexes.
+
+        Like every task query, returns copies, so callers cannot reach the
+        store's task dicts or its indexes.
+        """
+        with self._lock:
+            memory = self._memory_view()
+            if person is None and time is None:
+                return [dict(task) for task in memory["tasks"]]
+
+            candidates = None
+            if person is not None:
+                candidates = self._tasks_by_person.get(normalize_task_key(person), [])
+            if time is not None:
+                by_time = self._tasks_by_time.get(normalize_task_key(time), [])
+                if candidates is None:
+                    candidates = by_time
+                else:
+                    ids = {id(task) for task in by_time}
+                    candidates = [task for task in candidates if id(task) in ids]
+            return [dict(task) for task in candidates]
+
+    def tasks_between(self, start=None, end=None):
+        """Tasks with a timestamp in [start, end), earliest first.
+
+        Bounds are datetimes or normalized timestamp strings; None leaves
+        that side open. Tasks without a resolved time are not included.
+        """
+        with self._lock:
+            self._memory_view()
+            keys = self._timestamp_keys
+            low = 0 if start is None else bisect.bisect_left(keys, (_normalize_timestamp(start),))
+            high = len(keys) if end is None else bisect.bisect_left(keys, (_normalize_timestamp(end),))
+            return [dict(task) for task in self._timestamp_tasks[low:high]]
+
+    def add_conversation(self, text):
+        with self._lock:
+            self._mutate(("conversation", text))
+
+    def get_preference(self, key):
+        with self._lock:
+            return self._memory_view()["preferences"].get(key)
+
+    def get_tasks(self):
+        with self._lock:
+            return [dict(task) for task in self._memory_view()["tasks"]]
+
+    def get_conversation_history(self):
+        with self._lock:
+            return list(self._memory_view()["conversation_history"])
+
+    def get_conversation_entries(self, positions):
+        """Fetch history entries by position without copying the whole list"""
+        with self._lock:
+            history = self._memory_view()["conversation_history"]
+            return [history[i] for i in positions]
+
+    def history_generation(self):
+        """Counter that changes whenever conversation history changes"""
+        with self._lock:
+            self._memory_view()
+            return self._history_generation
+
+    def history_length(self):
+        with self._lock:
+            return len(self._memory_view()["conversation_history"])
+
+    def subscribe(self, callback):
+        """Call callback(position, text) for every conversation turn added"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def close(self):
+        self.flush()
+        self.backend.close()
+
+
+_store = MemoryStore()
+
+def get_store():
+    return _store
+
+def configure(backend=None, durability=None, **kwargs):
+    """Replace the default store; backend may be a name or a MemoryBackend"""
+    global _store
+    _store.flush()
+    if backend is None or isinstance(backend, str):
+        backend = create_backend(backend, **kwargs)
+    _store = MemoryStore(backend, durability=durability)
+    return _store
+
+# ----- Compatibility layer over the default store -----
 
 def load_memory():
-    with open(MEMORY_FILE, "r") as f:
-        return json.load(f)
+    return _store.load()
 
 def save_memory(memory):
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(memory, f, indent=4)
+    _store.save(memory)
 
-def store_preference(key, value):
-    memory = load_memory()
-    memory["preferences"][key] = value
-    save_memory(memory)
+def compact_history():
+    _store.compact()
 
-def add_task(task, time):
-    memory = load_memory()
+def flush():
+    _store.flush()
 
-    # Prevent duplicates
-    for t in memory["tasks"]:
-        if t["task"] == task:
-            return
+# Queued writes must not be lost when the interpreter exits normally
+atexit.register(flush)
 
-    memory["tasks"].append({
-        "task": task,
-        "time": time
-    })
+def store_preference(key, value):
+    _store.store_preference(key, value)
+
+def add_task(task, time, person=None, timestamp=None):
+    _store.add_task(task, time, person, timestamp)
 
-    save_memory(memory)
+def tasks_between(start=None, end=None):
+    return _store.tasks_between(start, end)
 
+def find_tasks(person=None, time=None):
+    return _store.find_tasks(person=person, time=time)
 
 def add_conversation(text):
-    memory = load_memory()
-    memory["conversation_history"].append(text)
-    save_memory(memory)
+    _store.add_conversation(text)
 
 def get_preference(key):
-    memory = load_memory()
-    return memory["preferences"].get(key)
+    return _store.get_preference(key)
 
 def get_tasks():
-    memory = load_memory()
-    return memory["tasks"]
+    return _store.get_tasks()
 
 def get_conversation_history():
-    memory = load_memory()
-    return memory["conversation_history"]   
-
+    return _store.get_conversation_history()
@@ -0,0 +1,115 @@
+"""
+Dynamic micro-batching for model inference.
+
+Concurrent callers submit one item each; a worker thread groups whatever
+arrives within max_wait_ms of the first item (up to max_batch_size) into a
+single call of the batch function and hands every caller its own result.
+Under load the model sees full batches; a lone request waits at most
+max_wait_ms.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Runs batch_fn over micro-batches of concurrently submitted items.
+
+    Args:
+        batch_fn: Called with a list of items; returns one result per item,
+            in order. An exception is raised to every caller in the batch.
+        max_batch_size: Most items per batch_fn call
+        max_wait_ms: How long to hold a batch open for more items after
+            its first one arrived
+    """
+
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=5.0, name="micro-batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """Queue one item; returns a Future for its result"""
+        future = Future()
+        # Nothing may be queued behind the stop marker
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((item, future))
+        return future
+
+    def __call__(self, item):
+        """Submit one item and wait for its result"""
+        return self.submit(item).result()
+
+    def _collect(self):
+        """Block for the next batch; returns (batch, stop)"""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                # Past the deadline, still take whatever is already queued
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            # Skip callers that cancelled while waiting
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise ValueError(f"batch_fn returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def close(self, wait=True):
+        """Finish the queued items, then stop the worker; wait=False
+        returns without waiting for it"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        if wait and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def info(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
@@ -0,0 +1,165 @@
+"""
+Process-wide registry of loaded models.
+
+Each registered model is loaded at most once per process - on first use,
+or up front with preload() - and warmed up with one inference, so neither
+the first request nor a backend switch pays for initialization. Loaded
+models stay resident in LRU order under a memory budget: loading one that
+does not fit evicts the least recently used others.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def _tensor_bytes(value):
+    # Quantized layers keep their packed weights in (weight, bias) tuples
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(item) for item in value)
+    if callable(getattr(value, "numel", None)) and callable(getattr(value, "element_size", None)):
+        return value.numel() * value.element_size()
+    return 0
+
+
+def model_size_mb(model):
+    """Weight memory of a torch-backed model (a SentenceTransformer, or a
+    pipeline through its .model) in MB, or None if it cannot be measured.
+    Counts the state dict, so int8-quantized weights count one byte each."""
+    module = getattr(model, "model", model)
+    state_dict = getattr(module, "state_dict", None)
+    if not callable(state_dict):
+        return None
+    try:
+        total = sum(_tensor_bytes(value) for value in state_dict().values())
+    except Exception:
+        return None
+    return total / 2 ** 20
+
+
+class ModelRegistry:
+    """Loads registered models lazily, once, and keeps them under a memory budget.
+
+    Args:
+        memory_budget_mb: Total size of the resident models; the least
+            recently used ones are evicted to stay within it. A model
+            larger than the budget on its own is still kept, alone.
+        retry_after: Seconds a failed load is remembered for; get()
+            returns None without calling the loader again until then
+    """
+
+    def __init__(self, memory_budget_mb, retry_after=60.0):
+        self.memory_budget_mb = memory_budget_mb
+        self.retry_after = retry_after
+        self._specs = {}
+        # name -> (model, size in MB), least recently used first
+        self._resident = OrderedDict()
+        # name -> time.monotonic() of its last failed load
+        self._failed = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.failures = 0
+
+    def register(self, name, loader, warm_up=None, size_mb=None):
+        """Register a model.
+
+        Args:
+            loader: Called with no arguments to load the model; may return
+                None on failure, which is remembered for retry_after seconds
+            warm_up: Called with the loaded model to run one inference
+            size_mb: Size to assume when model_size_mb() cannot measure it
+        """
+        self._specs[name] = (loader, warm_up, size_mb)
+
+    def __contains__(self, name):
+        return name in self._specs
+
+    def _lookup(self, name):
+        # (found, model); call with self._lock held
+        if name in self._resident:
+            self._resident.move_to_end(name)
+            self.hits += 1
+            return True, self._resident[name][0]
+        failed_at = self._failed.get(name)
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+            return True, None
+        return False, None
+
+    def get(self, name):
+        """The loaded model for name, loading and warming it up on first use;
+        None if it failed to load within the last retry_after seconds"""
+        with self._lock:
+            found, model = self._lookup(name)
+            if found:
+                return model
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # One load per model at a time; other models stay available meanwhile
+        with load_lock:
+            with self._lock:
+                found, model = self._lookup(name)
+                if found:
+                    return model
+
+            loader, warm_up, size_mb = self._specs[name]
+            model = loader()
+            if model is None:
+                with self._lock:
+                    self._failed[name] = time.monotonic()
+                    self.failures += 1
+                return None
+            if warm_up is not None:
+                try:
+                    warm_up(model)
+                except Exception as e:
+                    print(f"[WARNING] Warm-up of {name} failed: {e}")
+            size = model_size_mb(model) or size_mb or 0.0
+
+            with self._lock:
+                self._failed.pop(name, None)
+                self._resident[name] = (model, size)
+                self.loads += 1
+                self._evict_over_budget(keep=name)
+        return model
+
+    def preload(self, names):
+        """Load (and warm up) models now instead of on first use"""
+        for name in names:
+            self.get(name)
+
+    def _evict_over_budget(self, keep):
+        used = sum(size for _, size in self._resident.values())
+        for name in list(self._resident):
+            if used <= self.memory_budget_mb:
+                break
+            if name != keep:
+                used -= self._resident.pop(name)[1]
+                self.evictions += 1
+
+    def evict(self, name):
+        """Drop a resident model (or a remembered failure); it is reloaded
+        on next use"""
+        with self._lock:
+            self._failed.pop(name, None)
+            if self._resident.pop(name, None) is not None:
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._resident.clear()
+            self._failed.clear()
+
+    def info(self):
+        with self._lock:
+            return {
+                "resident": {name: round(size, 1) for name, (_, size) in self._resident.items()},
+                "used_mb": round(sum(size for _, size in self._resident.values()), 1),
+                "memory_budget_mb": self.memory_budget_mb,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "failures": self.failures,
+            }
@@ -1,128 +1,752 @@
+import os
 import re
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache, reduce
+from itertools import accumulate, compress, islice
+from operator import or_
 
-def analyze_input(user_input):
-    """Analyze user input with rule-based intent detection"""
-    
+from keyword_automaton import KeywordAutomaton
+
+# Texts per unit of work in analyze_batch
+BATCH_CHUNK_SIZE = int(os.getenv("NLP_BATCH_CHUNK_SIZE", "256"))
+# analyze_input memoization; set NLP_CACHE=off to disable
+ANALYSIS_CACHE_SIZE = int(os.getenv("NLP_CACHE_SIZE", "1024"))
+ANALYSIS_CACHE_ENABLED = os.getenv("NLP_CACHE", "on").lower() not in ("0", "off", "false", "no")
+# Inputs longer than this (pasted emails, documents) are analyzed in chunks
+# of at most LONG_INPUT_CHUNK_CHARS and are not cached
+LONG_INPUT_CHARS = int(os.getenv("NLP_LONG_INPUT_CHARS", "8192"))
+LONG_INPUT_CHUNK_CHARS = int(os.getenv("NLP_LONG_INPUT_CHUNK_CHARS", "4096"))
+
+# ============= Entity patterns =============
+
+_MONTHS = "january|february|march|april|may|june|july|august|september|october|november|december|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec"
+
+# Numeric date/time patterns - ordered from most to least specific
+NUMERIC_TIME_PATTERNS = (
+    r'\d{1,2}\s+(?:' + _MONTHS + r')\s+\d{4}',  # Most complete: 17 feb 2026
+    r'\d{1,2}:\d{2}\s*(?:am|pm|AM|PM)',  # 10:30 am
+    r'\d{1,2}\s+(?:am|pm|AM|PM)',  # 3 pm, 10 am (without colon)
+    r'\d{1,2}/\d{1,2}/\d{2,4}',  # 02/16/2026
+)
+RELATIVE_DATE_PATTERN = re.compile(r'(?:today|tomorrow|tonight|yesterday)', re.IGNORECASE)
+DAY_NAME_PATTERN = re.compile(r'(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)', re.IGNORECASE)
+PARTIAL_DATE_PATTERN = r'\d{1,2}\s+(?:' + _MONTHS + r')'  # Fallback: 17 feb
+
+
+def _after_first_digit(pattern):
+    # Every numeric pattern starts with \d{1,2}; once the scanner has
+    # consumed the first digit, the rest of the pattern is \d? + the tail
+    assert pattern.startswith(r'\d{1,2}')
+    return r'\d?' + pattern[len(r'\d{1,2}'):]
+
+
+# Stops only at digits that start at least one numeric TIME match. Each
+# pattern sits in its own lookahead group, so overlapping candidates (a
+# "17 feb" inside "17 feb 2026") are all reported, and the conditional tail
+# rejects digits where none matched. The leading \d lets the regex engine
+# skip everything else without returning to Python.
+NUMERIC_SCANNER = re.compile(
+    # Every pattern continues its one or two digits with whitespace, ':'
+    # or '/', which rules out most digits of longer numbers up front
+    r"\d(?=\d?[\s:/])"
+    + "".join(f"(?:(?=((?i:{_after_first_digit(pattern)})))|)" for pattern in NUMERIC_TIME_PATTERNS + (PARTIAL_DATE_PATTERN,))
+    + "(?(1)|(?(2)|(?(3)|(?(4)|(?(5)|(?!))))))"
+)
+# Scanner group -> index into the TIME match lists: NUMERIC_TIME_PATTERNS,
+# then PARTIAL_DATE_PATTERN (after the relative dates and day names)
+_NUMERIC_SLOTS = ((1, 0), (2, 1), (3, 2), (4, 3), (5, 6))
+_RELATIVE_SLOT = 4
+_DAY_NAME_SLOT = 5
+_TIME_SLOT_COUNT = 7
+
+# Substrings every relative date / day name contains; their letters have no
+# other case-insensitive spellings, so a miss rules the pattern out
+RELATIVE_DATE_HINTS = ("tod", "tom", "ton", "terday")
+DAY_NAME_HINT = "day"
+
+# Pieces of the PERSON patterns, applied to whole letter runs
+NAME_PATTERN = re.compile(r'[a-z]+', re.IGNORECASE)
+CAPITALIZED_NAME_PATTERN = re.compile(r'[A-Z][a-z]+')
+TITLE_PATTERN = re.compile(r'(?:mam|sir|madam|mrs|mr|ms|dr|prof|dad|mom)', re.IGNORECASE)
+MAX_TITLE_LENGTH = 5
+PREPOSITIONS = ("to", "with", "from", "by", "for")
+
+# Filter common words, time-related words, and day names
+PREPOSITION_STOP_WORDS = frozenset({
+    "the", "you", "me", "him", "her", "it", "them", "time", "submit",
+    "morning", "afternoon", "evening", "night", "today", "tomorrow", "yesterday",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december", "jan", "feb", "mar", "apr",
+    "jun", "jul", "aug", "sep", "oct", "nov", "dec", "tonight", "date", "time",
+    "day", "hour", "minute", "week", "month", "year", "pm", "am"
+})
+
+# Filter common words that shouldn't be names
+CAPITALIZED_STOP_WORDS = frozenset({
+    "I", "The", "This", "That", "What", "When", "Where", "Why", "How", "You", "Submit",
+    "Alert", "Remind", "Your", "Form", "Morning", "Afternoon", "Evening", "Night",
+    "Today", "Tomorrow", "Yesterday", "Monday", "Tuesday", "Wednesday", "Thursday",
+    "Friday", "Saturday", "Sunday", "January", "February", "March", "April", "June",
+    "July", "August", "September", "October", "November", "December", "Jan", "Feb",
+    "Mar", "Apr", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec", "Tonight",
+    "Date", "Time", "Day", "Hour", "Minute", "Week", "Month", "Year", "Pm", "Am"
+})
+
+
+# ============= Intent trigger phrases =============
+#
+# One-word triggers and the first words of multi-word phrases are compiled
+# into one keyword automaton that is run over each distinct word once; the
+# rest of each phrase is matched on the token stream.
+# detect_intent_rule_based then applies the priority rules to the set of
+# groups that were hit.
+
+INTENT_TRIGGERS = {
+    # Retrieval / memory recall: "what have I", "did I mention", "do you remember"
+    "recall_phrase": ("what have i", "what did", "did i mention", "do you remember", "what have you told", "tell me about"),
+    # Recall words that count only in questions starting with "what"
+    "recall_word": ("told", "said", "mentioned", "earlier"),
+    "what": ("what",),
+    "did_i_mention": ("did i mention",),
+    "prefer": ("prefer",),
+    "remember": ("remember",),
+    "reminder": ("remind", "reminder", "alert"),
+    "meeting": ("schedule", "meeting", "appoint"),
+    # Generic task creation (submit, attend, complete, finish, send, call, pay)
+    "task": (
+        "submit", "attend", "complete", "finish",
+        "send", "call", "pay", "buy", "prepare",
+        "visit", "meet"
+    ),
+}
+
+
+def _trigger_tables(triggers):
+    """(word automaton, text automaton, label -> bit, INTENT_PHRASES) for
+    label -> triggers; INTENT_PHRASES holds (label bit, words) for every
+    multi-word trigger.
+
+    Bit i of either automaton's scan is label i. The word automaton, run
+    over single tokens, has the one-word triggers and above them one bit
+    per multi-word phrase, reported when a word ends with the phrase's
+    first word. The text automaton holds every trigger whole, for
+    scanning an input without tokenizing it.
+    """
+    for trigger in (trigger for group in triggers.values() for trigger in group):
+        # Token matching relies on triggers being lowercase words joined by single spaces
+        if not re.fullmatch(r"[a-z]+(?: [a-z]+)*", trigger):
+            raise ValueError(f"intent trigger {trigger!r} must be lowercase words separated by single spaces")
+
+    bits = {label: 1 << bit for bit, label in enumerate(triggers)}
+    phrases = tuple(
+        (bits[label], tuple(trigger.split(" ")))
+        for label, group in triggers.items()
+        for trigger in group
+        if " " in trigger
+    )
+    keywords = {label: [trigger for trigger in group if " " not in trigger] for label, group in triggers.items()}
+    for index, (_, words) in enumerate(phrases):
+        keywords[("phrase", index)] = [words[0]]
+    return KeywordAutomaton(keywords), KeywordAutomaton(triggers), bits, phrases
+
+
+def _use_triggers(triggers):
+    global INTENT_AUTOMATON, INTENT_TEXT_AUTOMATON, _TRIGGER_BIT, INTENT_PHRASES, _PHRASE_SHIFT, _WORD_TRIGGER_MASK
+    INTENT_AUTOMATON, INTENT_TEXT_AUTOMATON, _TRIGGER_BIT, INTENT_PHRASES = _trigger_tables(triggers)
+    _PHRASE_SHIFT = len(triggers)
+    _WORD_TRIGGER_MASK = (1 << _PHRASE_SHIFT) - 1
+
+
+_use_triggers(INTENT_TRIGGERS)
+RECALL_PHRASE = _TRIGGER_BIT["recall_phrase"]
+RECALL_WORD = _TRIGGER_BIT["recall_word"]
+WHAT = _TRIGGER_BIT["what"]
+DID_I_MENTION = _TRIGGER_BIT["did_i_mention"]
+PREFER = _TRIGGER_BIT["prefer"]
+REMEMBER = _TRIGGER_BIT["remember"]
+REMINDER = _TRIGGER_BIT["reminder"]
+MEETING = _TRIGGER_BIT["meeting"]
+TASK = _TRIGGER_BIT["task"]
+
+
+# ============= Token stream =============
+#
+# Entity extraction and intent detection share one tokenization of the
+# input: WORD_SPLITTER cuts it into letter runs and the gaps between them,
+# and what the rules need to know about a letter run on its own - its
+# lowercase form, name/title/capitalization flags, trigger keywords, day
+# names - is computed once per distinct word and memoized. The rules then
+# only look at token flags, positions and gaps, so a long pasted input
+# costs one split plus a cache lookup per word instead of a full-string
+# scan per rule. The results are identical to running each pattern over
+# the whole string, as benchmark_nlp.py checks.
+
+WORD_SPLITTER = re.compile(r"([^\W\d_]+)")
+# Distinct words whose properties are kept
+WORD_CACHE_SIZE = 65536
+
+# Token flags
+NAME = 1  # all ASCII letters (NAME_PATTERN)
+TITLE = 2  # mam, sir, dr, ...
+PREPOSITION = 4  # ends with to/with/from/by/for
+NAME_AFTER_PREPOSITION = 8  # NAME, longer than 2 and not a stop word
+CAPITALIZED_NAME = 16  # Capitalized, longer than 2 and not a stop word
+
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def _word_info(word):
+    """Position-independent properties of one letter run.
+
+    Returns (lowercase form, flags, trigger bits, bitmask of the
+    INTENT_PHRASES whose first word it ends with, TIME matches as
+    (slot, start, end) relative to the word).
+    """
+    lower = word.lower()
+    flags = 0
+    if NAME_PATTERN.fullmatch(word):
+        flags |= NAME
+        if word not in PREPOSITION_STOP_WORDS and len(word) > 2:
+            flags |= NAME_AFTER_PREPOSITION
+    if len(word) <= MAX_TITLE_LENGTH and TITLE_PATTERN.fullmatch(word):
+        flags |= TITLE
+    if lower.endswith(PREPOSITIONS):
+        flags |= PREPOSITION
+    if word not in CAPITALIZED_STOP_WORDS and len(word) > 2 and CAPITALIZED_NAME_PATTERN.fullmatch(word):
+        flags |= CAPITALIZED_NAME
+
+    found, ending = INTENT_AUTOMATON.scan_with_suffix(lower)
+
+    time_matches = []
+    if any(hint in lower for hint in RELATIVE_DATE_HINTS):
+        time_matches += [(_RELATIVE_SLOT, *m.span()) for m in RELATIVE_DATE_PATTERN.finditer(word)]
+    if DAY_NAME_HINT in lower:
+        time_matches += [(_DAY_NAME_SLOT, *m.span()) for m in DAY_NAME_PATTERN.finditer(word)]
+
+    return lower, flags, found & _WORD_TRIGGER_MASK, ending >> _PHRASE_SHIFT, tuple(time_matches)
+
+
+def _is_boundary(char):
+    # A \b edge: no character (start/end of text) or a non-word character
+    return not char or not (char.isalnum() or char == "_")
+
+
+class TokenStream:
+    """The letter runs of one input, with their memoized properties.
+
+    Token i is text[starts[i]:ends[i]] == words[i]; gaps[i] is the text
+    before it and gaps[i + 1] the text after it. lowers and flags are
+    per-token; hits is the INTENT_TRIGGERS bitmask of the whole input and
+    time_matches one list of (start, end) spans per TIME pattern, in
+    priority order.
+    """
+
+    __slots__ = ("text", "words", "gaps", "starts", "ends", "lowers", "flags", "hits", "time_matches")
+
+    def __init__(self, text):
+        self.text = text
+        pieces = WORD_SPLITTER.split(text)
+        self.words = words = pieces[1::2]
+        self.gaps = pieces[0::2]
+        offsets = list(accumulate(map(len, pieces)))
+        self.starts = offsets[0:-1:2]
+        self.ends = offsets[1::2]
+
+        if words:
+            self.lowers, self.flags, triggers, phrases, word_times = zip(*map(_word_info, words))
+            self.hits = reduce(or_, triggers)
+        else:
+            self.lowers = self.flags = phrases = word_times = ()
+            self.hits = 0
+
+        if any(phrases):
+            self._match_phrases(phrases)
+        self.time_matches = self._scan_time(word_times)
+
+    def _match_phrases(self, phrases):
+        lowers = self.lowers
+        gaps = self.gaps
+        count = len(lowers)
+        for first in compress(range(count), phrases):
+            mask = phrases[first]
+            while mask:
+                low = mask & -mask
+                mask ^= low
+                bit, words = INTENT_PHRASES[low.bit_length() - 1]
+                last = first + len(words) - 1
+                # The first word ends token `first`, middle words are whole
+                # tokens and the last one starts a token, all one space apart
+                if (
+                    not self.hits & bit
+                    and last < count
+                    and all(gaps[first + k] == " " for k in range(1, len(words)))
+                    and all(lowers[first + k] == words[k] for k in range(1, len(words) - 1))
+                    and lowers[last].startswith(words[-1])
+                ):
+                    self.hits |= bit
+
+    def _scan_time(self, word_times):
+        time_matches = [[], [], [], [], [], [], []]
+        text = self.text
+
+        last_end = [0] * 7
+        for match in NUMERIC_SCANNER.finditer(text):
+            regs = match.regs
+            for group, slot in _NUMERIC_SLOTS:
+                start, end = regs[group]
+                # Groups start after the digit the scanner consumed (and
+                # unmatched ones at -1); re.finditer() would not report a
+                # match starting inside the previous one
+                if start > last_end[slot]:
+                    time_matches[slot].append((start - 1, end))
+                    last_end[slot] = end
+
+        if any(word_times):
+            for word_start, matches in compress(zip(self.starts, word_times), word_times):
+                for slot, start, end in matches:
+                    time_matches[slot].append((word_start + start, word_start + end))
+        return time_matches
+
+    def __len__(self):
+        return len(self.words)
+
+    def starts_with(self, prefix):
+        """text.lower().startswith(prefix) for a lowercase ASCII prefix"""
+        return bool(self.words) and not self.gaps[0] and self.lowers[0].startswith(prefix)
+
+    def boundary_before(self, index):
+        return _is_boundary(self.gaps[index][-1:])
+
+    def boundary_after(self, index):
+        return _is_boundary(self.gaps[index + 1][:1])
+
+
+def tokenize(user_input):
+    """Tokenize an input once for extract_entities, time_expressions and
+    detect_intent_rule_based"""
+    return TokenStream(user_input)
+
+
+# ============= Long inputs =============
+#
+# A long input is cut into chunks of at most LONG_INPUT_CHUNK_CHARS and
+# each chunk is tokenized on its own, so the work per chunk is bounded and
+# the total is linear in the input length. Chunks end right after a
+# character no rule can match across - anything but a word character,
+# whitespace, ':' or '/' - so for text with ordinary punctuation the
+# results are exactly those of a single token stream. Only a stretch of
+# LONG_INPUT_CHUNK_CHARS / 2 without such a character forces a cut at a
+# space (or anywhere, failing that), which may split one expression.
+
+# Longest prefix of a window that ends in a chunk break character
+CHUNK_BREAK = re.compile(r".*[^\w\s:/]", re.DOTALL)
+
+
+def long_input_chunks(user_input, size=None):
+    """Yield consecutive chunks of user_input, each at most size characters"""
+    size = max(2, size or LONG_INPUT_CHUNK_CHARS)
+    start = 0
+    while len(user_input) - start > size:
+        # Cut in the second half of the window so chunks stay large
+        low, high = start + size // 2, start + size
+        match = CHUNK_BREAK.match(user_input, low, high)
+        if match:
+            cut = match.end()
+        else:
+            cut = user_input.rfind(" ", low, high) + 1 or high
+        yield user_input[start:cut]
+        start = cut
+    yield user_input[start:]
+
+
+def token_streams(user_input):
+    """The token streams an input is analyzed as: a single one, or one
+    per chunk (lazily) for inputs over LONG_INPUT_CHARS"""
+    if len(user_input) <= LONG_INPUT_CHARS:
+        return [tokenize(user_input)]
+    return map(tokenize, long_input_chunks(user_input))
+
+
+# ============= Entity extraction =============
+
+def _time_strings(time_sources):
+    # Matched strings in pattern priority order, from (text, time_matches)
+    # pairs for each chunk with any
+    for slot in range(_TIME_SLOT_COUNT):
+        for text, time_matches in time_sources:
+            for start, end in time_matches[slot]:
+                yield text[start:end]
+
+
+def time_expressions(user_input, tokens=None):
+    """Every TIME match in pattern priority order, including the shorter
+    ones analyze_input() drops from its entities ("3 pm" next to
+    "17 feb 2026"); the input for time_parser.resolve_expressions()"""
+    streams = token_streams(user_input) if tokens is None else [tokens]
+    return list(_time_strings([(tokens.text, tokens.time_matches) for tokens in streams]))
+
+
+def _find_titled_names(tokens):
+    """Name + title ("kavita mam", "john sir")"""
+    names = []
+    last_end = 0
+    words, starts, flags = tokens.words, tokens.starts, tokens.flags
+    for index in range(1, len(words)):
+        name = index - 1
+        if (
+            flags[index] & TITLE
+            and flags[name] & NAME
+            and starts[name] >= last_end
+            and len(words[name]) > 1
+            and tokens.gaps[index].isspace()
+            and tokens.boundary_before(name)
+            and tokens.boundary_after(index)
+        ):
+            last_end = tokens.ends[index]
+            names.append(tokens.text[starts[name]:last_end])
+    return names
+
+
+def _find_preposition_name(tokens):
+    """First non-stop-word name after to/with/from/by/for"""
+    consumed = 0
+    flags = tokens.flags
+    for index in range(len(flags) - 1):
+        if not flags[index] & PREPOSITION or tokens.starts[index] < consumed:
+            continue
+        name = index + 1
+        if (
+            flags[name] & NAME
+            and tokens.gaps[name].isspace()
+            and tokens.boundary_after(name)
+        ):
+            consumed = tokens.ends[name]
+            if flags[name] & NAME_AFTER_PREPOSITION:
+                return tokens.words[name]
+    return None
+
+
+def _find_capitalized_name(tokens):
+    """First capitalized word that isn't a stop word"""
+    for index, flags in enumerate(tokens.flags):
+        if flags & CAPITALIZED_NAME and tokens.boundary_before(index) and tokens.boundary_after(index):
+            return tokens.words[index]
+    return None
+
+
+def _scan_streams(streams):
+    """Walk the token streams of one input once.
+
+    Returns ((text, time_matches) of the streams with TIME matches, titled names, preposition name,
+    capitalized name, intent trigger bits, first token stream). A later
+    PERSON tier is only searched while no earlier one has
+    found a name.
+    """
+    time_sources = []
+    titled_names = []
+    preposition_name = capitalized_name = None
+    hits = 0
+    first = None
+
+    for tokens in streams:
+        if first is None:
+            first = tokens
+        hits |= tokens.hits
+        if any(tokens.time_matches):
+            time_sources.append((tokens.text, tokens.time_matches))
+
+        titled_names += _find_titled_names(tokens)
+        if not titled_names and preposition_name is None:
+            preposition_name = _find_preposition_name(tokens)
+            if preposition_name is None and capitalized_name is None:
+                capitalized_name = _find_capitalized_name(tokens)
+
+    return time_sources, titled_names, preposition_name, capitalized_name, hits, first
+
+
+def _entities(time_sources, titled_names, preposition_name, capitalized_name):
     entities = []
     time_entity = None
     person_entity = None
 
-    # Extract time/date entities - MORE COMPREHENSIVE PATTERNS
-    time_patterns = [
-        r'\d{1,2}\s+(?:january|february|march|april|may|june|july|august|september|october|november|december|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{4}',  # Most complete: 17 feb 2026
-        r'\d{1,2}:\d{2}\s*(?:am|pm|AM|PM)',  # 10:30 am
-        r'\d{1,2}\s+(?:am|pm|AM|PM)',  # 3 pm, 10 am (without colon)
-        r'\d{1,2}/\d{1,2}/\d{2,4}',  # 02/16/2026
-        r'(?:today|tomorrow|tonight|yesterday)',  # relative dates
-        r'(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)',  # days
-        r'\d{1,2}\s+(?:january|february|march|april|may|june|july|august|september|october|november|december|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)',  # Fallback: 17 feb
-    ]
-    
-    for pattern in time_patterns:
-        matches = re.finditer(pattern, user_input, re.IGNORECASE)
-        for match in matches:
-            time_str = match.group()
+    if time_sources:
+        for time_str in _time_strings(time_sources):
             # Prefer the most complete date (with year) over partial dates
             if time_entity is None or (len(time_str) >= len(time_entity)):
                 time_entity = time_str
                 if not entities or entities[-1][1] != "TIME" or entities[-1][0] != time_str:
                     entities.append((time_str, "TIME"))
-    
+
     # Extract person entities (names like "kavita mam", "john", "alice sir", etc.)
     # First try: Name + title pattern
-    person_pattern_with_title = r'\b[A-Z][a-z]+(?:\s+(?:mam|sir|madam|mrs|mr|ms|dr|prof|dad|mom))\b'
-    person_matches = re.finditer(person_pattern_with_title, user_input, re.IGNORECASE)
-    for match in person_matches:
-        name = match.group()
+    for name in titled_names:
         person_entity = name
         entities.append((name, "PERSON"))
-    
-    # Second try: Names after prepositions (to, with, from, by, etc.) - lowercase names
-    if not person_entity:
-        preposition_pattern = r'(?:to|with|from|by|for)\s+([a-z]+)\b'
-        prep_matches = re.finditer(preposition_pattern, user_input, re.IGNORECASE)
-        for match in prep_matches:
-            name = match.group(1)
-            # Filter common words, time-related words, and day names
-            excluded_words = {
-                "the", "you", "me", "him", "her", "it", "them", "time", "submit",
-                "morning", "afternoon", "evening", "night", "today", "tomorrow", "yesterday",
-                "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
-                "january", "february", "march", "april", "may", "june", "july", "august",
-                "september", "october", "november", "december", "jan", "feb", "mar", "apr",
-                "jun", "jul", "aug", "sep", "oct", "nov", "dec", "tonight", "date", "time",
-                "day", "hour", "minute", "week", "month", "year", "pm", "am"
-            }
-            if name not in excluded_words and len(name) > 2:
-                person_entity = name
-                entities.append((name, "PERSON"))
-                break
-    
-    # Third try: Just capitalized words (excluding common words)
+
+    # Second try: Names after prepositions - lowercase names
     if not person_entity:
-        person_pattern = r'\b[A-Z][a-z]+\b'
-        person_matches = re.finditer(person_pattern, user_input)
-        for match in person_matches:
-            name = match.group()
-            # Filter common words that shouldn't be names
-            excluded_words = {
-                "I", "The", "This", "That", "What", "When", "Where", "Why", "How", "You", "Submit",
-                "Alert", "Remind", "Your", "Form", "Morning", "Afternoon", "Evening", "Night",
-                "Today", "Tomorrow", "Yesterday", "Monday", "Tuesday", "Wednesday", "Thursday",
-                "Friday", "Saturday", "Sunday", "January", "February", "March", "April", "June",
-                "July", "August", "September", "October", "November", "December", "Jan", "Feb",
-                "Mar", "Apr", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec", "Tonight",
-                "Date", "Time", "Day", "Hour", "Minute", "Week", "Month", "Year", "Pm", "Am"
-            }
-            if name not in excluded_words and len(name) > 2:
-                person_entity = name
-                entities.append((name, "PERSON"))
-                break  # Take only first valid name
+        person_entity = preposition_name
+        # Third try: Just capitalized words (excluding common words)
+        if not person_entity:
+            person_entity = capitalized_name
+        if person_entity:
+            entities.append((person_entity, "PERSON"))
+
+    return entities, time_entity, person_entity
+
+
+def extract_entities(user_input, tokens=None):
+    """Extract TIME and PERSON entities; returns (entities, time, person)"""
+    streams = token_streams(user_input) if tokens is None else [tokens]
+    return _entities(*_scan_streams(streams)[:4])
+
+
+def _analyze(user_input):
+    # One tokenization (per chunk, for long inputs) serves both the entity
+    # and the intent rules
+    *found, hits, first = _scan_streams(token_streams(user_input))
+    entities, time_entity, person_entity = _entities(*found)
 
     # Use rule-based intent detection (fast, reliable, no model downloads)
-    intent, confidence = detect_intent_rule_based(user_input)
+    intent, confidence = _intent(hits, first is not None and first.starts_with("what"))
 
     return {
         "intent": intent,
         "entities": entities,
         "time": time_entity,
         "person": person_entity,
-        "confidence": confidence
+        "confidence": confidence,
+        # Every TIME match, as time_expressions() gives them; a tuple so
+        # cached results can share it
+        "time_expressions": tuple(_time_strings(found[0])),
     }
 
 
-def detect_intent_rule_based(text):
-    """Fallback rule-based intent detection with priority ordering"""
-    text = text.lower()
+def _copy_result(result):
+    # entities is the only mutable value; its tuples are immutable
+    return dict(result, entities=list(result["entities"]))
+
+
+class AnalysisCache:
+    """Bounded LRU of analyze_input results keyed on the exact input"""
+
+    def __init__(self, maxsize=ANALYSIS_CACHE_SIZE, enabled=ANALYSIS_CACHE_ENABLED):
+        self.maxsize = maxsize
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _copy_result(result)
+
+    def put(self, key, result):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = _copy_result(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
 
+_analysis_cache = AnalysisCache()
+
+def configure_analysis_cache(maxsize=None, enabled=None):
+    """Resize or switch the analyze_input cache on/off; clears it"""
+    with _analysis_cache._lock:
+        if maxsize is not None:
+            _analysis_cache.maxsize = maxsize
+        if enabled is not None:
+            _analysis_cache.enabled = enabled
+    _analysis_cache.clear()
+
+def analysis_cache_info():
+    """Hit/miss statistics for the analyze_input cache"""
+    return _analysis_cache.info()
+
+def clear_analysis_cache():
+    _analysis_cache.clear()
+
+def configure_intent_triggers(extra=None):
+    """Match extra triggers (label -> phrases) on top of INTENT_TRIGGERS.
+
+    Phrases under an existing label count towards its intent; new labels
+    are matched but have no rule of their own. None restores the defaults.
+    Clears the word and analysis caches.
+    """
+    triggers = {label: tuple(group) for label, group in INTENT_TRIGGERS.items()}
+    for label, group in (extra or {}).items():
+        triggers[label] = triggers.get(label, ()) + tuple(group)
+    _use_triggers(triggers)
+    _word_info.cache_clear()
+    _analysis_cache.clear()
+
+def analyze_input(user_input):
+    """Analyze user input with rule-based intent detection"""
+    # Keyed on the exact text: whitespace and case both change what the
+    # rules match and extract, so near-duplicates are analyzed separately.
+    # Long inputs rarely repeat and would pin megabytes of keys in the cache
+    if not _analysis_cache.enabled or len(user_input) > LONG_INPUT_CHARS:
+        return _analyze(user_input)
+
+    result = _analysis_cache.get(user_input)
+    if result is None:
+        result = _analyze(user_input)
+        _analysis_cache.put(user_input, result)
+    return result
+
+
+# ============= Batch analysis =============
+
+def _chunks(texts, size):
+    iterator = iter(texts)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyze_chunk(texts):
+    """analyze_input over a list of texts; the unit of work for analyze_batch"""
+    return [analyze_input(text) for text in texts]
+
+
+def _analyzed_chunks(chunks, workers):
+    if workers <= 1:
+        for chunk in chunks:
+            yield analyze_chunk(chunk)
+        return
+
+    # Keep a bounded window of chunks in flight so a huge (or endless)
+    # input never gets queued up in full
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(analyze_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def analyze_batch(texts, workers=None, chunk_size=BATCH_CHUNK_SIZE, detector=None):
+    """Analyze many utterances, yielding one analyze_input() result per text in order.
+
+    Args:
+        texts: Any iterable of strings; it is consumed lazily
+        workers: Processes to spread chunks over (default: CPU count);
+            1 analyzes in this process
+        chunk_size: Texts handed to a worker at a time
+        detector: Optional intent_detectors.TransformerIntentDetector; its
+            intents replace the rule-based ones and are computed one
+            batched model call per chunk in this process
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if detector is None:
+        for results in _analyzed_chunks(_chunks(texts, chunk_size), workers):
+            yield from results
+        return
+
+    # Keep each chunk's texts to hand to the detector once its entities are back
+    chunks = deque()
+
+    def remember(source):
+        for chunk in source:
+            chunks.append(chunk)
+            yield chunk
+
+    for results in _analyzed_chunks(remember(_chunks(texts, chunk_size)), workers):
+        chunk = chunks.popleft()
+        for result, (intent, confidence) in zip(results, detector.detect_batch(chunk)):
+            result["intent"] = intent
+            result["confidence"] = confidence
+        yield from results
+
+
+# ============= Intent detection =============
+
+def detect_intent_rule_based(text, tokens=None):
+    """Fallback rule-based intent detection with priority ordering.
+
+    Reuses tokens, the input's TokenStream, when there is one. Otherwise
+    the lowercased input is scanned as a whole against every trigger,
+    phrases included, which finds the same triggers without tokenizing;
+    long inputs are still read chunk by chunk.
+    """
+    if tokens is not None:
+        return _intent(tokens.hits, tokens.starts_with("what"))
+    if len(text) <= LONG_INPUT_CHARS:
+        lower = text.lower()
+        return _intent(INTENT_TEXT_AUTOMATON.scan(lower), lower.startswith("what"))
+    hits = 0
+    first = None
+    for tokens in token_streams(text):
+        if first is None:
+            first = tokens
+        hits |= tokens.hits
+    return _intent(hits, first is not None and first.starts_with("what"))
+
+
+def _intent(hits, starts_with_what):
     # PRIORITY 1: Retrieval / memory recall - CHECK FIRST to avoid false positives
-    # Patterns: "what have I", "did I mention", "do you remember", "what did I tell"
-    if any(phrase in text for phrase in ["what have i", "what did", "did i mention", "do you remember", "what have you told", "tell me about"]):
+    if hits & RECALL_PHRASE:
         return "retrieve_task", 0.8
-    if text.startswith("what") and any(word in text for word in ["told", "said", "mentioned", "earlier"]):
+    if hits & RECALL_WORD and starts_with_what:
         return "retrieve_task", 0.8
 
     # PRIORITY 2: Preference (but NOT in retrieve contexts)
-    if "prefer" in text and "remember" not in text:
+    if hits & PREFER and not hits & REMEMBER:
         return "set_preference", 0.9
 
     # PRIORITY 3: Reminder / alert
-    if any(word in text for word in ["remind", "reminder", "alert"]):
+    if hits & REMINDER:
         return "set_reminder", 0.9
 
     # PRIORITY 4: Meeting scheduling (but NOT in generic contexts)
-    if any(word in text for word in ["schedule", "meeting", "appoint"]):
+    if hits & MEETING:
         # Avoid false positive: "did I mention anything about the meeting" is retrieve, not schedule
-        if "did i mention" not in text and "what" not in text:
+        if not hits & (DID_I_MENTION | WHAT):
             return "schedule_meeting", 0.9
 
-    # PRIORITY 5: Generic task creation (submit, attend, complete, finish, send, call, pay)
-    if any(word in text for word in [
-        "submit", "attend", "complete", "finish",
-        "send", "call", "pay", "buy", "prepare",
-        "visit", "meet"
-    ]):
+    # PRIORITY 5: Generic task creation
+    if hits & TASK:
         return "create_task", 0.85
 
     return "unknown", 0.3
@@ -1,7 +1,18 @@
 from memory_system import store_preference, add_task, get_preference
+from nlp_engine import time_expressions
+from time_parser import resolve_expressions, to_timestamp
 from vector_memory import semantic_search
 
 CONFIDENCE_THRESHOLD = 0.75
+RECALL_TOP_K = 3
+
+def _timestamp(intent_data, user_input):
+    # analyze_input already found the TIME expressions; other sources of
+    # intent_data may not carry them
+    expressions = intent_data.get("time_expressions")
+    if expressions is None:
+        expressions = time_expressions(user_input)
+    return to_timestamp(resolve_expressions(expressions))
 
 def reason(intent_data, user_input):
 
@@ -32,12 +43,13 @@ def reason(intent_data, user_input):
             "action": "store_task",
             "task": user_input,
             "time": intent_data["time"] if intent_data["time"] else "No time detected",
+            "timestamp": _timestamp(intent_data, user_input),
             "person": intent_data["person"] if intent_data["person"] else None
         }
 
 
     if intent == "retrieve_task":
-        context = semantic_search(user_input)
+        context = semantic_search(user_input, k=RECALL_TOP_K)
         return {
             "action": "semantic_recall",
             "context": context
@@ -48,6 +60,7 @@ def reason(intent_data, user_input):
             "action": "store_task",
             "task": user_input,
             "time": intent_data["time"] if intent_data["time"] else "No time detected",
+            "timestamp": _timestamp(intent_data, user_input),
             "person": intent_data["person"] if intent_data["person"] else None
         }
 
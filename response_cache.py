@@ -0,0 +1,86 @@
+"""
+Persistent cache of model responses.
+
+Responses are keyed by a SHA-256 hash of the request (see request_key) and
+appended to a JSON-lines file, so they survive restarts without rewriting
+the file on every new answer. The file is read once, on first use.
+"""
+
+import hashlib
+import json
+import threading
+
+
+def request_key(*parts):
+    """Hash of the parts of a request, e.g. the model name and the prompt"""
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Maps request keys to JSON-serializable responses.
+
+    Args:
+        path: JSON-lines file the entries are loaded from and appended to;
+            None keeps them in memory only
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        self._entries = {}
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-append; skip it
+                        continue
+                    self._entries[entry["key"]] = entry["value"]
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        """The cached response for key, or None"""
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def put_many(self, items):
+        """Store (key, value) pairs with one append to the file"""
+        items = list(items)
+        if not items:
+            return
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            self._entries.update(items)
+            if self.path is not None:
+                with open(self.path, "a") as f:
+                    f.write("".join(json.dumps({"key": key, "value": value}) + "\n" for key, value in items))
+
+    def info(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries or {}),
+            }
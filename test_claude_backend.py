@@ -0,0 +1,139 @@
+"""
+Tests for the Claude intent backend against a local stand-in for the
+messages endpoint. Needs the anthropic package; skipped without it.
+
+Usage:
+    python -m pytest test_claude_backend.py
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import intent_detectors
+from intent_detectors import detect_intent_claude, detect_intents_claude, detect_intents_claude_async
+from response_cache import ResponseCache
+
+pytest.importorskip("anthropic")
+
+
+class StandInMessages(BaseHTTPRequestHandler):
+    """Answers POST /v1/messages like the Messages API: "remind" texts are
+    set_reminder, others create_task; "slow" texts take a second"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = request["messages"][0]["content"]
+        text = prompt.split('User message: "', 1)[1].split('"', 1)[0]
+        with server.lock:
+            server.requests.append(text)
+            server.connections.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(1.0 if "slow" in text else 0.05)
+        with server.lock:
+            server.in_flight -= 1
+
+        intent = "set_reminder" if "remind" in text else "create_task"
+        body = json.dumps({
+            "id": "msg_stand_in", "type": "message", "role": "assistant", "model": request["model"],
+            "content": [{"type": "text", "text": json.dumps({"intent": intent, "confidence": 0.95})}],
+            "stop_reason": "end_turn", "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": 10},
+        }).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out and hung up
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer:
+    def __enter__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInMessages)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.connections = set()
+        self.server.in_flight = self.server.max_in_flight = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.directory.name, "cache.jsonl")
+        self.saved_cache = intent_detectors.CLAUDE_CACHE
+        intent_detectors.CLAUDE_CACHE = ResponseCache(self.cache_file)
+        return self
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __exit__(self, *exc_info):
+        intent_detectors.CLAUDE_CACHE = self.saved_cache
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+
+def test_client_is_pooled_and_answers_are_cached():
+    with StandInServer() as stand_in:
+        assert detect_intent_claude("remind me to call mom", "test-key", stand_in.url) == ("set_reminder", 0.95)
+        assert detect_intent_claude("buy milk", "test-key", stand_in.url) == ("create_task", 0.95)
+        assert len(stand_in.server.connections) == 1
+        assert detect_intent_claude("remind me to call mom", "test-key", stand_in.url) == ("set_reminder", 0.95)
+        assert stand_in.server.requests == ["remind me to call mom", "buy milk"]
+
+        # A restarted process reads the answers back from the cache file
+        intent_detectors.CLAUDE_CACHE = ResponseCache(stand_in.cache_file)
+        assert detect_intent_claude("buy milk", "test-key", stand_in.url) == ("create_task", 0.95)
+        assert len(stand_in.server.requests) == 2
+
+
+def test_async_batch_respects_concurrency_limit():
+    texts = [f"remind me about item {i}" for i in range(8)] + ["buy milk", "buy milk"]
+    with StandInServer() as stand_in:
+        results = asyncio.run(detect_intents_claude_async(texts, "test-key", max_concurrency=3, base_url=stand_in.url))
+        assert [intent for intent, _ in results] == ["set_reminder"] * 8 + ["create_task"] * 2
+        assert len(stand_in.server.requests) == 9
+        assert 1 < stand_in.server.max_in_flight <= 3
+
+
+def test_blocking_batches_reuse_one_client_inside_a_running_loop():
+    with StandInServer() as stand_in:
+        first = detect_intents_claude(["remind me to stretch"], "test-key", max_concurrency=1, base_url=stand_in.url)
+
+        async def from_a_coroutine():
+            return detect_intents_claude(["buy bread", "remind me to stretch"], "test-key",
+                                         max_concurrency=1, base_url=stand_in.url)
+
+        second = asyncio.run(from_a_coroutine())
+        assert first == [("set_reminder", 0.95)]
+        assert second == [("create_task", 0.95), ("set_reminder", 0.95)]
+        assert stand_in.server.requests == ["remind me to stretch", "buy bread"]
+        assert len(stand_in.server.connections) == 1
+        assert intent_detectors.CLAUDE_CACHE.info()["size"] == 2
+
+
+def test_timeout_falls_back_to_rules_and_is_not_cached():
+    with StandInServer() as stand_in:
+        start = time.perf_counter()
+        result = detect_intent_claude("slow: schedule a meeting tomorrow", "test-key", stand_in.url, timeout=0.2)
+        assert result == ("schedule_meeting", 0.9)
+        assert time.perf_counter() - start < 0.9
+        assert intent_detectors.CLAUDE_CACHE.info()["size"] == 0
+
@@ -0,0 +1,88 @@
+"""
+Tests for the on-disk embedding cache.
+
+Usage:
+    python -m pytest test_embedding_cache.py
+"""
+
+import tempfile
+
+import numpy as np
+
+from embedding_cache import CachedEncoder, EmbeddingCache, cached_encoder, text_digest
+from vector_memory import HashingEmbedder
+
+
+class CountingEmbedder(HashingEmbedder):
+    """HashingEmbedder that records the texts of each encode call"""
+
+    def __init__(self):
+        super().__init__(dim=64)
+        self.calls = []
+
+    def encode(self, texts, normalize_embeddings=False, prompt=None, **kwargs):
+        self.calls.append(list(texts))
+        if prompt:
+            texts = [prompt + text for text in texts]
+        return super().encode(texts) * 2.0
+
+
+def test_each_text_is_encoded_once():
+    model = CountingEmbedder()
+    with tempfile.TemporaryDirectory() as directory:
+        encoder = cached_encoder(model, "counting", cache_dir=directory)
+        first = encoder.encode(["remind me", "call bob", "remind me"])
+        second = encoder.encode(["call bob", "buy milk"], normalize_embeddings=True)
+        assert model.calls == [["remind me", "call bob"], ["buy milk"]]
+        assert np.allclose(first, HashingEmbedder(64).encode(["remind me", "call bob", "remind me"]) * 2.0)
+        assert np.allclose(np.linalg.norm(second, axis=1), 1.0)
+        assert encoder.encode("buy milk").shape == (64,)
+
+
+def test_output_changing_arguments_bypass_the_cache():
+    model = CountingEmbedder()
+    with tempfile.TemporaryDirectory() as directory:
+        encoder = cached_encoder(model, "counting", cache_dir=directory)
+        plain = encoder.encode(["remind me"], batch_size=8, convert_to_numpy=True)
+        prompted = encoder.encode(["remind me"], prompt="query: ")
+        encoder.encode(["remind me"], prompt="query: ")
+        assert model.calls == [["remind me"]] * 3
+        assert not np.allclose(plain, prompted)
+        assert encoder.cache.info()["size"] == 1
+        assert np.allclose(encoder.encode(["remind me"]), plain)
+        assert len(model.calls) == 3
+
+
+def test_other_instances_see_published_entries():
+    with tempfile.TemporaryDirectory() as directory:
+        writer = EmbeddingCache(directory, dim=64)
+        reader = EmbeddingCache(directory, dim=64)
+        assert reader.get_many([text_digest("call bob")]) == [None]
+
+        model = CountingEmbedder()
+        CachedEncoder(model, writer).encode(["call bob"])
+        vector = reader.get_many([text_digest("call bob")])[0]
+        assert np.allclose(vector, HashingEmbedder(64).encode(["call bob"])[0] * 2.0)
+
+        # A restart reads the files back
+        restarted = CachedEncoder(model, EmbeddingCache(directory, dim=64))
+        restarted.encode(["call bob"])
+        assert model.calls == [["call bob"]]
+
+
+def test_eviction_keeps_recent_entries_and_readers_stay_correct():
+    with tempfile.TemporaryDirectory() as directory:
+        model = CountingEmbedder()
+        encoder = CachedEncoder(model, EmbeddingCache(directory, dim=64, max_entries=8, initial_capacity=2))
+        reader = EmbeddingCache(directory, dim=64)
+        texts = [f"task {i}" for i in range(20)]
+        expected = HashingEmbedder(64).encode(texts) * 2.0
+        for text in texts:
+            encoder.encode([text, "keep"])
+            # A reader that mapped an older generation never returns the wrong row
+            for vector, row in zip(reader.get_many(map(text_digest, texts)), expected):
+                assert vector is None or np.allclose(vector, row)
+
+        info = encoder.cache.info()
+        assert info["size"] <= 8 and info["evictions"] > 0
+        assert encoder.cache.get_many([text_digest("keep")])[0] is not None
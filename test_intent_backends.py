@@ -0,0 +1,125 @@
+"""
+Offline tests for the intent_detectors backends, using stand-in models.
+
+Usage:
+    python -m pytest test_intent_backends.py
+"""
+
+import gc
+import threading
+import time
+
+import intent_detectors
+import nlp_engine
+from intent_detectors import CascadeIntentDetector, TransformerIntentDetector, detect_intent_sentence_transformers
+from vector_memory import HashingEmbedder
+
+
+class CountingEncoder:
+    """Stands in for a SentenceTransformer; records the texts of each encode call"""
+
+    def __init__(self):
+        self.embedder = HashingEmbedder()
+        self.calls = []
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        self.calls.append(list(texts))
+        # Unnormalized, like a real model's output
+        return self.embedder.encode(list(texts)) * 3.0
+
+
+class SlowEncoder(CountingEncoder):
+    """A CountingEncoder whose forward pass takes delay seconds"""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        time.sleep(self.delay)
+        return super().encode(texts, batch_size, convert_to_numpy)
+
+
+def _detector(model):
+    return TransformerIntentDetector("sentence_transformers", model=model)
+
+
+def test_examples_are_encoded_once_per_model():
+    model = CountingEncoder()
+    detect_intent_sentence_transformers("remind me about the meeting", model)
+    detect_intent_sentence_transformers("book an appointment", model)
+    example_count = sum(map(len, intent_detectors.INTENT_EXAMPLES.values()))
+    assert [len(texts) for texts in model.calls] == [example_count, 1, 1]
+
+
+def test_single_and_batched_paths_agree():
+    texts = ["Remind me about the meeting", "Call the client", "zzz qqq"]
+    with _detector(CountingEncoder()) as detector:
+        expected = [detector.detect(text) for text in texts]
+        batched = detector.detect_many(texts)
+        assert [intent for intent, _ in batched] == ["set_reminder", "create_task", "unknown"]
+        assert all(intent == e_intent and abs(score - e_score) < 1e-5
+                   for (intent, score), (e_intent, e_score) in zip(batched, expected))
+
+
+def test_cascade_escalates_only_unsure_rules():
+    model = CountingEncoder()
+    intent_detectors.example_matrix(model)
+    model.calls.clear()
+    with _detector(model) as detector:
+        cascade = CascadeIntentDetector([(detector, 1000)], threshold=0.75)
+        assert cascade.classify("Remind me about the meeting") == ("set_reminder", 0.9, "rules")
+        assert model.calls == []
+        intent, confidence, tier = cascade.classify("Set an alarm for 6 AM")
+        assert (intent, tier) == ("set_reminder", "sentence_transformers") and confidence > 0.75
+        assert model.calls == [["Set an alarm for 6 AM"]]
+
+
+def test_cascade_reuses_rule_answers_it_is_given():
+    model = CountingEncoder()
+    intent_detectors.example_matrix(model)
+    model.calls.clear()
+    with _detector(model) as detector:
+        cascade = CascadeIntentDetector([(detector, 1000)], threshold=0.75)
+        texts = ["Remind me about the meeting", "Set an alarm for 6 AM"]
+        rules = [nlp_engine.analyze_input(text) for text in texts]
+
+        results = cascade.classify_batch(texts, [(r["intent"], r["confidence"]) for r in rules])
+        assert results == cascade.classify_batch(texts)
+        assert results[0] == ("set_reminder", 0.9, "rules")
+        # A confident answer handed in is not escalated
+        assert cascade.classify("Set an alarm for 6 AM", rules=("set_reminder", 0.9)) == ("set_reminder", 0.9, "rules")
+
+
+def test_cascade_skips_tier_past_its_budget():
+    with _detector(SlowEncoder(0.2)) as slow, _detector(CountingEncoder()) as fast:
+        intent_detectors.example_matrix(slow.model)
+        intent_detectors.example_matrix(fast.model)
+        fast.model.calls.clear()
+        cascade = CascadeIntentDetector([(slow, 10), (fast, 1000)], threshold=0.75)
+        start = time.perf_counter()
+        assert cascade.classify("Set an alarm for 6 AM")[::2] == ("set_reminder", "sentence_transformers")
+        assert time.perf_counter() - start < 0.15
+        assert cascade.info()["timeouts"] == {"sentence_transformers": 1}
+        assert fast.model.calls == [["Set an alarm for 6 AM"]]
+
+
+def test_closing_or_dropping_a_detector_stops_its_worker():
+    def workers():
+        return sum(thread.name == "intent-sentence_transformers" for thread in threading.enumerate())
+
+    model = CountingEncoder()
+    intent_detectors.example_matrix(model)
+    before = workers()
+    with _detector(model) as detector:
+        detector.detect("call the client")
+        assert workers() == before + 1
+    assert workers() == before
+
+    for _ in range(20):
+        _detector(model).detect("call the client")
+    gc.collect()
+    deadline = time.monotonic() + 2
+    while workers() > before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert workers() == before
@@ -68,6 +68,8 @@ def test_single_backend(backend: str) -> None:
             print(f"✗ [ERROR] {text[:50]}")
             print(f"  Error: {str(e)[:60]}")
     
+    detector.close()
+
     # Summary
     correct = sum(1 for _, intent, _, expected, _ in results if intent == expected)
     accuracy = correct / len(results) if results else 0
@@ -107,6 +109,7 @@ def test_all_backends() -> None:
                 except Exception:
                     pass
             
+            detector.close()
             accuracy = correct / len(TEST_DATA)
             avg_time = total_time / len(TEST_DATA) if TEST_DATA else 0
             
@@ -168,6 +171,8 @@ def interactive_mode(backend: str = "sentence_transformers") -> None:
         except Exception as e:
             print(f"Error: {e}\n")
 
+    detector.close()
+
 def main():
     parser = argparse.ArgumentParser(
         description="Test transformer-based intent detection"
@@ -0,0 +1,62 @@
+"""
+Tests for the distilled intent classifier.
+
+Usage:
+    python -m pytest test_intent_distillation.py
+"""
+
+import os
+import tempfile
+
+from intent_detectors import TransformerIntentDetector
+from intent_distillation import DistilledIntentClassifier, distill, load_distilled_classifier, training_corpus
+
+TRAINING = [
+    ("remind me to call mom", "set_reminder"),
+    ("set an alarm for 6 am", "set_reminder"),
+    ("schedule a meeting with the team", "schedule_meeting"),
+    ("book an appointment with the dentist", "schedule_meeting"),
+    ("i prefer tea over coffee", "set_preference"),
+    ("what did i say about the report", "retrieve_task"),
+]
+
+
+def test_learns_teacher_labels_and_survives_save():
+    classifier = DistilledIntentClassifier.fit(*zip(*TRAINING), dim=1024)
+    assert [intent for intent, _ in classifier.predict_batch(text for text, _ in TRAINING)] == [
+        label for _, label in TRAINING
+    ]
+    assert classifier.predict("please remind me to call dad")[0] == "set_reminder"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "model.npz")
+        classifier.save(path)
+        loaded = load_distilled_classifier(path)
+    assert loaded.labels == classifier.labels
+    assert loaded.predict("book a meeting") == classifier.predict("book a meeting")
+
+
+def test_training_corpus_is_utterances_only():
+    corpus = training_corpus()
+    assert "remind me to call the bank tomorrow" in corpus
+    assert not {"input", "expected_intent", "set_reminder", "retrieve_task"} & set(corpus)
+    assert len(corpus) == len(set(corpus))
+
+    excluded = training_corpus(exclude=["remind me to call the bank tomorrow"])
+    assert "remind me to call the bank tomorrow" not in excluded
+    assert len(excluded) == len(corpus) - 1
+
+
+def test_distilled_backend_uses_rule_teacher_labels():
+    classifier = distill([text for text, _ in TRAINING], teacher="rules", dim=1024)
+    detector = TransformerIntentDetector("distilled", model=classifier)
+    assert detector.detect("remind me to water the plants")[0] == "set_reminder"
+    assert detector.detect_batch(["schedule a meeting tomorrow"])[0][0] == "schedule_meeting"
+
+
+def test_switching_backend_drops_the_constructor_model():
+    classifier = distill([text for text, _ in TRAINING], teacher="rules", dim=1024)
+    detector = TransformerIntentDetector("distilled", model=classifier)
+    detector.switch_backend("claude")
+    assert detector.model is None and detector.classifier is None
+
@@ -0,0 +1,53 @@
+"""
+Tests for the Aho-Corasick keyword automaton used by intent detection.
+
+Usage:
+    python -m pytest test_keyword_automaton.py
+"""
+
+import random
+
+from keyword_automaton import KeywordAutomaton
+from nlp_engine import detect_intent_rule_based
+
+
+def test_reports_overlapping_keywords():
+    automaton = KeywordAutomaton({"remind": ["remind"], "reminder": ["reminder"], "mind": ["mind"]})
+    assert automaton.find("set a reminder") == {"remind", "reminder", "mind"}
+    assert automaton.find("nothing here") == set()
+
+
+def test_matches_substring_search():
+    rng = random.Random(5)
+    for _ in range(500):
+        keywords = {
+            label: ["".join(rng.choice("ab ") for _ in range(rng.randint(1, 4))) for _ in range(3)]
+            for label in range(rng.randint(1, 5))
+        }
+        text = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 30)))
+        expected = {label for label, words in keywords.items() if any(w in text for w in words)}
+        assert KeywordAutomaton(keywords).find(text) == expected, (keywords, text)
+
+
+def test_suffix_scan_matches_endswith():
+    rng = random.Random(6)
+    for _ in range(500):
+        keywords = {
+            label: ["".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(2)]
+            for label in range(rng.randint(1, 5))
+        }
+        automaton = KeywordAutomaton(keywords)
+        text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 12)))
+        found, ending = automaton.scan_with_suffix(text)
+        assert found == automaton.scan(text)
+        expected = {label for label, words in keywords.items() if any(text.endswith(w) for w in words)}
+        assert {label for label in keywords if ending >> label & 1} == expected, (keywords, text)
+
+
+def test_intent_exclusions_use_the_hit_set():
+    assert detect_intent_rule_based("schedule a meeting with alice")[0] == "schedule_meeting"
+    assert detect_intent_rule_based("did I mention the meeting")[0] == "retrieve_task"
+    # "meeting" also contains the task verb "meet"
+    assert detect_intent_rule_based("what about the meeting")[0] == "create_task"
+    assert detect_intent_rule_based("I prefer mornings")[0] == "set_preference"
+    assert detect_intent_rule_based("remember I prefer mornings")[0] == "unknown"
@@ -0,0 +1,243 @@
+"""
+Tests for the memory store and its storage backends.
+
+Usage:
+    python -m pytest test_memory_system.py
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from memory_system import (
+    MemoryStore,
+    InMemoryBackend,
+    JsonFileBackend,
+    SQLiteBackend,
+)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _json_backend(directory):
+    shutil.copy(os.path.join(SCRIPT_DIR, "memory.json"), directory)
+    return JsonFileBackend(
+        os.path.join(directory, "memory.json"),
+        os.path.join(directory, "history.jsonl"),
+    )
+
+
+def test_history_log_is_appended_not_rewritten():
+    with tempfile.TemporaryDirectory() as directory:
+        backend = _json_backend(directory)
+        store = MemoryStore(backend)
+        before = os.stat(backend.memory_file).st_mtime_ns
+
+        store.add_conversation("first turn")
+        store.add_conversation("second turn")
+
+        assert os.stat(backend.memory_file).st_mtime_ns == before
+        assert store.get_conversation_history()[-2:] == ["first turn", "second turn"]
+
+        # A task save rewrites the document and folds the log into it
+        store.add_task("call the bank", "3 pm")
+        assert not os.path.exists(backend.history_file)
+        assert MemoryStore(backend).get_conversation_history()[-2:] == ["first turn", "second turn"]
+
+
+def test_batched_flush_keeps_turns_another_store_appended():
+    with tempfile.TemporaryDirectory() as directory:
+        backend = _json_backend(directory)
+        batched = MemoryStore(backend, durability="batched", flush_every=100, flush_interval=0)
+        other = MemoryStore(JsonFileBackend(backend.memory_file, backend.history_file))
+
+        batched.add_task("call the bank", "3 pm")
+        other.add_conversation("turn from the other store")
+        batched.flush()
+
+        for store in (batched, MemoryStore(JsonFileBackend(backend.memory_file, backend.history_file))):
+            assert store.get_conversation_history()[-1] == "turn from the other store"
+            assert store.has_task("call the bank")
+
+
+def test_history_log_replays_on_load_and_compacts_past_the_limit():
+    with tempfile.TemporaryDirectory() as directory:
+        backend = _json_backend(directory)
+        backend.compact_bytes = 200
+        store = MemoryStore(backend)
+        base = store.get_conversation_history()
+
+        store.add_conversation("one")
+        store.add_conversation("two")
+        assert os.path.exists(backend.history_file)
+        assert backend.load()["conversation_history"] == base + ["one", "two"]
+
+        for i in range(20):
+            store.add_conversation(f"turn number {i}")
+        expected = base + ["one", "two"] + [f"turn number {i}" for i in range(20)]
+        assert os.path.getsize(backend.history_file) <= 200
+        assert backend.load()["conversation_history"] == expected
+        with open(backend.memory_file) as f:
+            assert json.load(f)["conversation_history"][-1].startswith("turn number")
+
+
+def test_log_left_behind_by_a_crashed_compaction_is_not_replayed():
+    with tempfile.TemporaryDirectory() as directory:
+        backend = _json_backend(directory)
+        store = MemoryStore(backend)
+        store.add_conversation("before the crash")
+        expected = store.get_conversation_history()
+
+        # Die between replacing memory.json and removing the log
+        backend._clear_history_log = lambda: None
+        store.add_task("call the bank", "3 pm")
+        assert os.path.exists(backend.history_file)
+
+        reopened = JsonFileBackend(backend.memory_file, backend.history_file)
+        assert reopened.load()["conversation_history"] == expected
+        assert "compacted_history_log" not in reopened.load()
+
+        # The next turn replaces the stale log instead of appending to it
+        MemoryStore(reopened).add_conversation("after the crash")
+        assert reopened.load()["conversation_history"] == expected + ["after the crash"]
+        store.add_conversation("from the first store")
+        assert JsonFileBackend(backend.memory_file, backend.history_file).load()["conversation_history"] == \
+            expected + ["after the crash", "from the first store"]
+
+
+def test_torn_last_log_line_is_skipped():
+    with tempfile.TemporaryDirectory() as directory:
+        backend = _json_backend(directory)
+        store = MemoryStore(backend)
+        store.add_conversation("whole")
+        with open(backend.history_file, "a") as f:
+            f.write('"half a li')
+
+        assert backend.load()["conversation_history"][-1] == "whole"
+
+
+def test_store_picks_up_writes_from_another_store():
+    with tempfile.TemporaryDirectory() as directory:
+        backend = _json_backend(directory)
+        store = MemoryStore(backend)
+        other = MemoryStore(JsonFileBackend(backend.memory_file, backend.history_file))
+
+        store.get_preference("meeting_time")
+        other.store_preference("meeting_time", "9 am")
+        other.add_conversation("from another process")
+
+        assert store.get_preference("meeting_time") == "9 am"
+        assert store.get_conversation_history()[-1] == "from another process"
+
+
+def test_sqlite_backend_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "memory.db")
+        store = MemoryStore(SQLiteBackend(db_file))
+        store.store_preference("meeting_time", "morning")
+        store.add_task("submit form", "17 feb 2026", "kavita mam", "2026-02-16T18:30:00+00:00")
+        store.add_conversation("hello")
+
+        reopened = MemoryStore(SQLiteBackend(db_file))
+        assert reopened.get_preference("meeting_time") == "morning"
+        assert reopened.get_tasks() == [
+            {"task": "submit form", "time": "17 feb 2026", "person": "kavita mam",
+             "timestamp": "2026-02-16T18:30:00+00:00"}
+        ]
+        assert reopened.get_conversation_history() == ["hello"]
+
+
+def test_sqlite_save_keeps_turn_timestamps():
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "memory.db")
+        backend = SQLiteBackend(db_file)
+        store = MemoryStore(backend)
+        store.add_conversation("hello")
+        store.add_conversation("hello")
+        with sqlite3.connect(db_file) as conn:
+            conn.execute("UPDATE conversation_history SET created_at = id")
+
+        memory = backend.load()
+        memory["conversation_history"] = memory["conversation_history"][1:] + ["new turn"]
+        backend.save(memory)
+
+        with sqlite3.connect(db_file) as conn:
+            rows = conn.execute("SELECT text, created_at FROM conversation_history ORDER BY id").fetchall()
+        assert rows[0] == ("hello", 1.0)
+        assert rows[1][0] == "new turn" and rows[1][1] > 1e9
+
+
+def test_batched_mode_defers_writes_until_flush():
+    backend = InMemoryBackend()
+    store = MemoryStore(backend, durability="batched", flush_every=10, flush_interval=0)
+
+    store.add_conversation("one")
+    store.add_task("pay rent", "friday")
+    assert store.get_conversation_history() == ["one"]
+    assert backend.load()["conversation_history"] == []
+
+    store.flush()
+    assert backend.load()["conversation_history"] == ["one"]
+    assert backend.load()["tasks"][0]["task"] == "pay rent"
+
+
+def test_failing_listener_does_not_lose_the_write():
+    backend = InMemoryBackend()
+    store = MemoryStore(backend)
+    seen = []
+
+    def broken(position, text):
+        raise RuntimeError("listener bug")
+
+    store.subscribe(broken)
+    store.subscribe(lambda position, text: seen.append((position, text)))
+    store.add_conversation("still saved")
+
+    assert backend.load()["conversation_history"] == ["still saved"]
+    assert seen == [(0, "still saved")]
+
+
+def test_task_index_deduplicates_and_filters():
+    store = MemoryStore(InMemoryBackend())
+    store.add_task("Remind me to call  Mom", "7 PM", "mom")
+    store.add_task("remind me to call mom ", "7 pm", "mom")
+    store.add_task("buy milk", "7 pm")
+
+    assert len(store.get_tasks()) == 2
+    assert store.has_task("REMIND ME TO CALL MOM")
+    assert [t["task"] for t in store.find_tasks(person="Mom")] == ["Remind me to call  Mom"]
+    assert len(store.find_tasks(time="7 pm")) == 2
+    assert store.find_tasks(person="mom", time="8 pm") == []
+
+
+def test_task_queries_return_copies():
+    store = MemoryStore(InMemoryBackend())
+    store.add_task("buy milk", "7 pm", "mom", "2026-02-16T14:30:00+00:00")
+
+    for tasks in (store.get_tasks(), store.find_tasks(), store.find_tasks(person="mom"),
+                  store.tasks_between()):
+        tasks[0]["task"] = "changed"
+        tasks.clear()
+
+    assert store.get_tasks()[0]["task"] == "buy milk"
+    assert store.has_task("buy milk") and not store.has_task("changed")
+    assert store.find_tasks(time="7 pm")[0]["task"] == "buy milk"
+    assert store.tasks_between()[0]["task"] == "buy milk"
+
+
+def test_tasks_between_orders_by_timestamp():
+    store = MemoryStore(InMemoryBackend())
+    ist = timezone(timedelta(hours=5, minutes=30))
+    store.add_task("pay rent", "friday", timestamp=datetime(2026, 2, 20, tzinfo=ist))
+    store.add_task("call mom", "tonight", timestamp="2026-02-16T14:30:00+00:00")
+    store.add_task("buy milk", "No time detected")
+    store.add_task("submit form", "17 feb 2026", timestamp="2026-02-16T18:30:00+00:00")
+
+    assert [t["task"] for t in store.tasks_between()] == ["call mom", "submit form", "pay rent"]
+    assert store.get_tasks()[0]["timestamp"] == "2026-02-19T18:30:00+00:00"
+    in_window = store.tasks_between(datetime(2026, 2, 17, tzinfo=ist), "2026-02-20T00:00:00+00:00")
+    assert [t["task"] for t in in_window] == ["submit form", "pay rent"]
+
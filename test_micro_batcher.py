@@ -0,0 +1,54 @@
+"""
+Tests for micro-batched inference.
+
+Usage:
+    python -m pytest test_micro_batcher.py
+"""
+
+import threading
+
+from micro_batcher import MicroBatcher
+
+
+def test_concurrent_items_share_batches():
+    sizes = []
+    batcher = MicroBatcher(lambda items: sizes.append(len(items)) or [item * 2 for item in items],
+                           max_batch_size=4, max_wait_ms=50)
+    results = {}
+    start = threading.Barrier(10)
+
+    def caller(n):
+        start.wait()
+        results[n] = batcher(n)
+
+    threads = [threading.Thread(target=caller, args=(n,)) for n in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert results == {n: n * 2 for n in range(10)}
+    assert max(sizes) <= 4 and len(sizes) < 10
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def fail(items):
+        raise RuntimeError("model crashed")
+
+    batcher = MicroBatcher(fail, max_wait_ms=20)
+    futures = [batcher.submit(n) for n in range(3)]
+    assert all(isinstance(future.exception(), RuntimeError) for future in futures)
+    batcher.close()
+
+
+def test_close_finishes_queued_items():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=2, max_wait_ms=0)
+    futures = [batcher.submit(n) for n in range(7)]
+    batcher.close()
+    assert [future.result(timeout=1) for future in futures] == list(range(7))
+    try:
+        batcher.submit(8)
+        assert False, "submit after close should fail"
+    except RuntimeError:
+        pass
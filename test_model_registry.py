@@ -0,0 +1,76 @@
+"""
+Tests for the process-wide model registry.
+
+Usage:
+    python -m pytest test_model_registry.py
+"""
+
+import threading
+
+from model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+        self.warmed_up = False
+
+
+def _registry(budget, sizes, loads):
+    registry = ModelRegistry(budget)
+    for name, size in sizes.items():
+        def load(name=name, size=size):
+            loads.append(name)
+            return FakeModel(name)
+
+        def warm_up(model):
+            model.warmed_up = True
+
+        registry.register(name, load, warm_up, size_mb=size)
+    return registry
+
+
+def test_loads_once_and_warms_up():
+    loads = []
+    registry = _registry(1000, {"a": 100}, loads)
+    threads = [threading.Thread(target=registry.get, args=("a",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["a"]
+    assert registry.get("a").warmed_up
+    assert registry.info()["hits"] == 8
+
+
+def test_evicts_least_recently_used_over_budget():
+    loads = []
+    registry = _registry(250, {"a": 100, "b": 100, "c": 100}, loads)
+    registry.preload(["a", "b"])
+    registry.get("a")  # b is now least recently used
+    registry.get("c")
+    assert list(registry.info()["resident"]) == ["a", "c"]
+
+    registry.get("b")  # reloaded, evicting a
+    assert loads == ["a", "b", "c", "b"]
+    assert list(registry.info()["resident"]) == ["c", "b"]
+    assert registry.info()["evictions"] == 2
+
+
+def test_failed_load_is_remembered_until_retry_after():
+    attempts = []
+    registry = ModelRegistry(100)
+    registry.register("broken", lambda: attempts.append(1))
+    assert registry.get("broken") is None and registry.get("broken") is None
+    assert len(attempts) == 1 and registry.info()["failures"] == 1
+    assert registry.info()["resident"] == {}
+
+    registry.retry_after = 0
+    assert registry.get("broken") is None
+    assert len(attempts) == 2
+
+    registry.retry_after = 60
+    registry.evict("broken")
+    registry.get("broken")
+    assert len(attempts) == 3
+
@@ -0,0 +1,165 @@
+"""
+Tests for nlp_engine tokenization, batch analysis and the analyze_input cache.
+
+Usage:
+    python -m pytest test_nlp_engine.py
+"""
+
+import random
+
+import nlp_engine
+from nlp_engine import analyze_batch, analyze_input
+
+TEXTS = [
+    "remind me to submit undertaking form to kavita mam on 17 feb 2026",
+    "schedule meeting tomorrow with alice",
+    "what have I told you about the project",
+    "I prefer morning meetings",
+    "call John at 3 pm",
+    "hello there",
+] * 7
+
+
+class FixedDetector:
+    """Stands in for TransformerIntentDetector; records batch sizes"""
+
+    def __init__(self):
+        self.batches = []
+
+    def detect_batch(self, texts):
+        self.batches.append(len(texts))
+        return [("create_task", 0.5)] * len(texts)
+
+
+def test_batch_matches_analyze_input_in_order():
+    expected = [analyze_input(text) for text in TEXTS]
+    assert list(analyze_batch(TEXTS, workers=1, chunk_size=4)) == expected
+    assert list(analyze_batch(iter(TEXTS), workers=2, chunk_size=5)) == expected
+
+
+def test_batch_is_lazy():
+    def endless():
+        while True:
+            yield "call mom tomorrow"
+
+    results = analyze_batch(endless(), workers=1, chunk_size=3)
+    assert [next(results)["time"] for _ in range(5)] == ["tomorrow"] * 5
+    results.close()
+
+
+def test_detector_classifies_whole_chunks():
+    detector = FixedDetector()
+    results = list(analyze_batch(TEXTS, workers=1, chunk_size=10, detector=detector))
+    assert detector.batches == [10, 10, 10, 10, 2]
+    assert {r["intent"] for r in results} == {"create_task"}
+    assert results[0]["person"] == "kavita mam"
+
+
+def test_cache_hits_return_copies():
+    nlp_engine.configure_analysis_cache(maxsize=8, enabled=True)
+    first = analyze_input("remind me to call mom")
+    first["entities"].append(("mutated", "PERSON"))
+    again = analyze_input("remind me to call mom")
+    assert ("mutated", "PERSON") not in again["entities"]
+    assert again["intent"] == "set_reminder"
+
+    info = nlp_engine.analysis_cache_info()
+    assert (info["hits"], info["misses"], info["size"]) == (1, 1, 1)
+
+
+def test_cache_does_not_change_results_for_whitespace_variants():
+    nlp_engine.configure_analysis_cache(maxsize=8, enabled=True)
+    for text in ["what  did I say", "what\ndid you say", "kavita   mam", "3\tpm", "17  feb 2026"]:
+        analyze_input(" ".join(text.split()))
+        assert analyze_input(text) == nlp_engine._analyze(text), text
+    assert nlp_engine.analysis_cache_info()["hits"] == 0
+
+
+def test_cache_keeps_case_for_person_extraction():
+    nlp_engine.configure_analysis_cache(maxsize=8, enabled=True)
+    assert analyze_input("call John")["person"] == "John"
+    assert analyze_input("call john")["person"] is None
+    assert nlp_engine.analysis_cache_info()["hits"] == 0
+
+
+def test_cache_is_bounded_and_can_be_disabled():
+    nlp_engine.configure_analysis_cache(maxsize=2, enabled=True)
+    for text in ["call mom", "pay rent", "buy milk", "call mom"]:
+        analyze_input(text)
+    assert nlp_engine.analysis_cache_info()["size"] == 2
+    assert nlp_engine.analysis_cache_info()["hits"] == 0
+
+    nlp_engine.configure_analysis_cache(enabled=False)
+    analyze_input("call mom")
+    assert nlp_engine.analysis_cache_info()["misses"] == 0
+    nlp_engine.configure_analysis_cache(maxsize=nlp_engine.ANALYSIS_CACHE_SIZE, enabled=True)
+
+
+def test_token_stream_offsets_and_phrases():
+    tokens = nlp_engine.tokenize("What did Kavita mam say at 3 pm?")
+    assert tokens.words == ["What", "did", "Kavita", "mam", "say", "at", "pm"]
+    assert all(tokens.text[s:e] == w for s, e, w in zip(tokens.starts, tokens.ends, tokens.words))
+    assert tokens.hits & nlp_engine.RECALL_PHRASE and tokens.starts_with("what")
+    # Trigger phrases only match across single spaces, as substring checks would
+    assert not nlp_engine.tokenize("what  did").hits & nlp_engine.RECALL_PHRASE
+    assert nlp_engine.tokenize("somewhat didactic").hits & nlp_engine.RECALL_PHRASE
+
+
+def test_phrases_match_like_substring_checks():
+    phrases = [trigger for triggers in nlp_engine.INTENT_TRIGGERS.values() for trigger in triggers if " " in trigger]
+    rng = random.Random(4)
+    words = sorted({word for phrase in phrases for word in phrase.split()} | {"some", "xdid", "tell", "a"})
+    for _ in range(2000):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+        expected = any(phrase in text for phrase in nlp_engine.INTENT_TRIGGERS["recall_phrase"])
+        assert bool(nlp_engine.tokenize(text).hits & nlp_engine.RECALL_PHRASE) == expected, text
+
+
+def test_standalone_intent_matches_the_token_stream():
+    rng = random.Random(8)
+    words = ["What", "did", "i", "mention", "tell", "me", "about", "Remind", "meeting", "said",
+             "somewhat", "call", "prefer", "remember", "x", "İ", "3", "pm"]
+    for _ in range(2000):
+        text = "".join(rng.choice(words) + rng.choice([" ", " ", "  ", "-", "_", ""]) for _ in range(rng.randint(0, 6)))
+        tokens = nlp_engine.tokenize(text)
+        assert nlp_engine.detect_intent_rule_based(text) == nlp_engine.detect_intent_rule_based(text, tokens), text
+
+
+def test_extra_triggers_count_towards_their_intent():
+    try:
+        nlp_engine.configure_intent_triggers({"task": ["book"], "recall_phrase": ["look up what"]})
+        assert analyze_input("book a table")["intent"] == "create_task"
+        assert analyze_input("can you look up what we planned")["intent"] == "retrieve_task"
+        assert analyze_input("did i mention it")["intent"] == "retrieve_task"
+    finally:
+        nlp_engine.configure_intent_triggers()
+    assert analyze_input("book a table")["intent"] == "unknown"
+
+
+def test_long_input_shares_one_tokenization():
+    text = " ".join(TEXTS * 50)
+    tokens = nlp_engine.tokenize(text)
+    assert nlp_engine.extract_entities(text, tokens) == nlp_engine.extract_entities(text)
+    assert nlp_engine.detect_intent_rule_based(text, tokens) == ("retrieve_task", 0.8)
+    assert nlp_engine.time_expressions(text, tokens)[:2] == ["17 feb 2026", "17 feb 2026"]
+
+
+def test_long_input_chunks_match_one_stream():
+    text = ". ".join(TEXTS * 400)
+    assert len(text) > nlp_engine.LONG_INPUT_CHARS
+    chunks = list(nlp_engine.long_input_chunks(text))
+    assert "".join(chunks) == text
+    assert max(map(len, chunks)) <= nlp_engine.LONG_INPUT_CHUNK_CHARS
+    # Without anything to cut at, chunks are still bounded
+    assert max(map(len, nlp_engine.long_input_chunks("a" * 10000, size=64))) == 64
+
+    tokens = nlp_engine.tokenize(text)
+    assert nlp_engine.extract_entities(text) == nlp_engine.extract_entities(text, tokens)
+    assert nlp_engine.time_expressions(text) == nlp_engine.time_expressions(text, tokens)
+    assert nlp_engine.detect_intent_rule_based(text) == nlp_engine.detect_intent_rule_based(text, tokens)
+
+
+def test_long_input_is_not_cached():
+    nlp_engine.configure_analysis_cache(maxsize=8, enabled=True)
+    analyze_input("a" * (nlp_engine.LONG_INPUT_CHARS + 1))
+    assert nlp_engine.analysis_cache_info()["size"] == 0
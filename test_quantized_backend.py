@@ -0,0 +1,49 @@
+"""
+Tests for the int8-quantized Sentence Transformers backend, on a tiny model
+built locally. Needs torch and sentence-transformers; skipped without them.
+
+Usage:
+    python -m pytest test_quantized_backend.py
+"""
+
+import os
+import tempfile
+
+import pytest
+
+from benchmark_quantized import build_tiny_model
+from intent_detectors import INTENT_EXAMPLES, TransformerIntentDetector, init_sentence_transformer, init_sentence_transformer_int8
+from model_registry import model_size_mb
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+
+EXAMPLES = [(example, intent) for intent, examples in INTENT_EXAMPLES.items() for example in examples]
+
+
+def _tiny_models():
+    with tempfile.TemporaryDirectory() as directory:
+        path = build_tiny_model(os.path.join(directory, "tiny"))
+        return init_sentence_transformer(path, cache_dir=""), init_sentence_transformer_int8(path, cache_dir="")
+
+
+def test_int8_model_is_smaller_and_close_to_float():
+    float_model, int8_model = _tiny_models()
+    assert any(isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in int8_model.modules())
+    assert model_size_mb(int8_model) < model_size_mb(float_model) / 2
+
+    texts = [text for text, _ in EXAMPLES]
+    cosine = torch.nn.functional.cosine_similarity(
+        torch.tensor(float_model.encode(texts)), torch.tensor(int8_model.encode(texts))
+    )
+    assert float(cosine.min()) > 0.99
+
+
+def test_int8_backend_detects_intents():
+    _, int8_model = _tiny_models()
+    detector = TransformerIntentDetector("sentence_transformers_int8", micro_batching=False, model=int8_model)
+    # Each example is its own nearest neighbour
+    assert [intent for intent, _ in detector.detect_batch(text for text, _ in EXAMPLES)] == [
+        intent for _, intent in EXAMPLES
+    ]
+
@@ -0,0 +1,112 @@
+"""
+Tests for resolving TIME expressions to datetimes.
+
+Usage:
+    python -m pytest test_time_parser.py
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import time_parser
+from nlp_engine import analyze_input, time_expressions
+from time_parser import parse_time, resolve_expressions, to_timestamp
+
+IST = timezone(timedelta(hours=5, minutes=30))
+# A Monday morning
+NOW = datetime(2026, 2, 16, 9, 30, tzinfo=IST)
+
+
+def test_absolute_dates():
+    assert parse_time("17 feb 2026", NOW) == datetime(2026, 2, 17, tzinfo=IST)
+    assert parse_time("02/16/2026", NOW) == datetime(2026, 2, 16, tzinfo=IST)
+    assert parse_time("1/2/25", NOW) == datetime(2025, 1, 2, tzinfo=IST)
+    assert parse_time("31 feb 2026", NOW) is None
+
+
+def test_dates_without_year_roll_forward():
+    assert parse_time("17 Feb", NOW) == datetime(2026, 2, 17, tzinfo=IST)
+    assert parse_time("15 jan", NOW) == datetime(2027, 1, 15, tzinfo=IST)
+    assert parse_time("29 feb", NOW) == datetime(2028, 2, 29, tzinfo=IST)
+
+
+def test_relative_days_and_weekdays():
+    assert parse_time("tomorrow", NOW) == datetime(2026, 2, 17, tzinfo=IST)
+    assert parse_time("Tonight", NOW) == datetime(2026, 2, 16, 20, tzinfo=IST)
+    assert parse_time("monday", NOW) == datetime(2026, 2, 16, tzinfo=IST)
+    assert parse_time("sunday", NOW) == datetime(2026, 2, 22, tzinfo=IST)
+
+
+def test_clock_times():
+    assert parse_time("3 pm", NOW) == datetime(2026, 2, 16, 15, tzinfo=IST)
+    assert parse_time("13 pm", NOW) is None
+
+
+def test_past_clock_times_roll_to_the_next_day():
+    assert parse_time("12:05 AM", NOW) == datetime(2026, 2, 17, 0, 5, tzinfo=IST)
+    assert parse_time("9:30 am", NOW) == datetime(2026, 2, 16, 9, 30, tzinfo=IST)
+    # An explicit day is kept even when that time has passed
+    assert resolve_expressions(["today", "8 am"], NOW) == datetime(2026, 2, 16, 8, tzinfo=IST)
+
+
+def test_resolves_across_a_dst_change():
+    new_york = ZoneInfo("America/New_York")
+    # Clocks go forward on 8 mar 2026: EST (-5) today, EDT (-4) tomorrow
+    expected = datetime(2026, 3, 8, 19, tzinfo=timezone.utc)
+    texts = time_expressions("call the bank tomorrow 3 pm")
+    assert resolve_expressions(texts, datetime(2026, 3, 7, 10, tzinfo=new_york)) == expected
+
+    saved = time_parser.ASSISTANT_TIMEZONE
+    time_parser.ASSISTANT_TIMEZONE = "America/New_York"
+    try:
+        assert resolve_expressions(texts, datetime(2026, 3, 7, 10)) == expected
+    finally:
+        time_parser.ASSISTANT_TIMEZONE = saved
+
+    # Naive times in system local time
+    if hasattr(time, "tzset"):
+        saved_tz = os.environ.get("TZ")
+        os.environ["TZ"] = "America/New_York"
+        time.tzset()
+        try:
+            assert resolve_expressions(texts, datetime(2026, 3, 7, 10)) == expected
+        finally:
+            if saved_tz is None:
+                del os.environ["TZ"]
+            else:
+                os.environ["TZ"] = saved_tz
+            time.tzset()
+
+
+def test_clock_reads_follow_a_change_of_system_zone():
+    if not hasattr(time, "tzset"):
+        return
+    saved_tz = os.environ.get("TZ")
+    try:
+        for zone, offsets in [("Asia/Kolkata", {330}), ("America/New_York", {-300, -240})]:
+            os.environ["TZ"] = zone
+            time.tzset()
+            offset = parse_time("tomorrow").utcoffset()
+            assert offset.total_seconds() // 60 in offsets
+    finally:
+        if saved_tz is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = saved_tz
+        time.tzset()
+
+
+def test_utterance_combines_date_and_clock():
+    texts = time_expressions("submit the form at 3 pm on 17 feb 2026")
+    resolved = resolve_expressions(texts, NOW)
+    assert resolved == datetime(2026, 2, 17, 15, tzinfo=IST)
+    assert to_timestamp(resolved) == "2026-02-17T09:30:00+00:00"
+    assert resolve_expressions(time_expressions("buy milk"), NOW) is None
+
+
+def test_analysis_carries_the_time_expressions():
+    text = "submit the form at 3 pm on 17 feb 2026"
+    assert list(analyze_input(text)["time_expressions"]) == time_expressions(text)
+    assert analyze_input("buy milk")["time_expressions"] == ()
@@ -0,0 +1,242 @@
+"""
+Tests for semantic recall over conversation history.
+
+Usage:
+    python -m pytest test_vector_memory.py
+"""
+
+import os
+import tempfile
+import threading
+
+import memory_system
+import vector_memory
+
+HISTORY = [
+    "remind me to call mom on sunday",
+    "schedule meeting with alice tomorrow",
+    "submit the tax form by friday",
+    "the tax deadline moved to april",
+]
+
+
+class CountingEmbedder(vector_memory.HashingEmbedder):
+    """HashingEmbedder that records which texts it was asked to encode"""
+
+    def __init__(self, dim=64):
+        super().__init__(dim)
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        return super().encode(texts)
+
+
+def _use_history(history=HISTORY):
+    memory_system.configure(memory_system.InMemoryBackend({"conversation_history": list(history)}))
+    vector_memory.clear_recall_cache()
+
+
+def test_fuzzy_top_k_matches_full_scan():
+    _use_history()
+    query = "what did I say about the tax form"
+    expected = sorted(
+        ((vector_memory.simple_similarity(query, h), -i) for i, h in enumerate(HISTORY)),
+        reverse=True,
+    )[:3]
+
+    result = vector_memory.semantic_search(query, k=3, mode="fuzzy")
+    assert [m["match"] for m in result["matches"]] == [HISTORY[-i] for _, i in expected]
+    assert result["match"] == result["matches"][0]["match"]
+
+
+def test_min_score_filters_everything():
+    _use_history()
+    assert vector_memory.semantic_search("zzzz qqqq", min_score=0.9, mode="fuzzy") is None
+
+
+def test_bm25_index_follows_new_turns():
+    _use_history()
+    assert vector_memory.semantic_search("tax deadline", mode="bm25")["match"] == HISTORY[3]
+
+    memory_system.add_conversation("book the dentist for thursday")
+    assert vector_memory.semantic_search("dentist", mode="bm25")["match"] == "book the dentist for thursday"
+
+
+def test_bm25_top_k_matches_exhaustive_scoring():
+    import math
+
+    words = ["tax", "form", "mom", "alice", "dentist", "friday", "report", "bank"]
+    history = [" ".join(words[(i * j) % len(words)] for j in range(1, 2 + i % 5)) for i in range(200)]
+    index = vector_memory.BM25Index()
+    index.rebuild(history)
+
+    docs = [vector_memory.tokenize(text) for text in history]
+    avg_length = sum(len(doc) for doc in docs) / len(docs)
+    for query in ["tax form", "mom friday bank", "alice", "report report dentist"]:
+        scores = []
+        for doc_id, doc in enumerate(docs):
+            score = 0.0
+            for term in set(vector_memory.tokenize(query)):
+                df = sum(term in d for d in docs)
+                tf = doc.count(term)
+                if tf:
+                    idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                    score += idf * tf * 2.5 / (tf + 1.5 * (0.25 + 0.75 * len(doc) / avg_length))
+            if score:
+                scores.append((-round(score, 9), doc_id))
+        expected = [doc_id for _, doc_id in sorted(scores)[:5]]
+        assert [doc_id for doc_id, _ in index.search(query, k=5)] == expected, query
+
+
+def test_recall_cache_hits_until_history_changes():
+    _use_history()
+    vector_memory.semantic_search("What did I say about  alice")
+    vector_memory.semantic_search("what did i say about alice")
+    info = vector_memory.recall_cache_info()
+    assert info["hits"] == 1 and info["size"] == 1
+
+    memory_system.add_conversation("alice moved the meeting to monday")
+    result = vector_memory.semantic_search("what did i say about alice", k=5)
+    assert "alice moved the meeting to monday" in [m["match"] for m in result["matches"]]
+    assert vector_memory.recall_cache_info()["invalidations"] >= 1
+
+
+def test_recall_cache_ignores_results_from_an_older_generation():
+    cache = vector_memory.RecallCache(maxsize=4)
+    store = object()
+    cache.put("fresh", (store, 2), {"match": "new"})
+
+    # A search that started before the last mutation finishes late
+    cache.put("stale", (store, 1), {"match": "old"})
+    assert cache.get("stale", (store, 1)) == (False, None)
+    assert cache.get("fresh", (store, 2)) == (True, {"match": "new"})
+
+    cache.put("other", (object(), 0), {"match": "other store"})
+    assert cache.get("fresh", (store, 2)) == (False, None)
+
+
+def test_embedding_index_reuses_saved_rows():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "embeddings.npy")
+        first = CountingEmbedder()
+        vector_memory.EmbeddingIndex(first, path).rebuild(HISTORY)
+        assert first.encoded == HISTORY
+
+        # A restart only encodes the turns logged since
+        second = CountingEmbedder()
+        index = vector_memory.EmbeddingIndex(second, path)
+        index.rebuild(HISTORY + ["book the dentist for thursday"])
+        assert second.encoded == ["book the dentist for thursday"]
+        assert index.count == 5
+        assert index.search("dentist thursday")[0][0] == 4
+        assert index.search("call mom sunday")[0][0] == 0
+
+
+def test_embedding_index_rebuilds_rewritten_history():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "embeddings.npy")
+        vector_memory.EmbeddingIndex(CountingEmbedder(), path).rebuild(HISTORY)
+
+        # Same length and same last entry, different earlier turns
+        rewritten = ["water the plants every morning"] + HISTORY[1:]
+        embedder = CountingEmbedder()
+        index = vector_memory.EmbeddingIndex(embedder, path)
+        index.rebuild(rewritten)
+        assert embedder.encoded == rewritten
+        assert index.search("water the plants")[0][0] == 0
+
+
+def test_embedding_build_does_not_block_logging_turns():
+    class BlockingEmbedder(CountingEmbedder):
+        def __init__(self):
+            super().__init__()
+            self.started = threading.Event()
+            self.release = threading.Event()
+
+        def encode(self, texts):
+            self.started.set()
+            self.release.wait(5)
+            return super().encode(texts)
+
+    _use_history()
+    embedder = BlockingEmbedder()
+    vector_memory.configure_embedding_index(embedder, path=None)
+    try:
+        searcher = threading.Thread(target=vector_memory.semantic_search, args=("tax",), kwargs={"mode": "embedding"})
+        searcher.start()
+        assert embedder.started.wait(5)
+
+        # The store's lock is free while the index is being built
+        writer = threading.Thread(target=memory_system.add_conversation, args=("book the dentist for thursday",))
+        writer.start()
+        writer.join(2)
+        assert not writer.is_alive()
+        embedder.release.set()
+        searcher.join(5)
+
+        # The search caught up on the turn logged during the build alone
+        assert embedder.encoded == HISTORY + ["book the dentist for thursday", "tax"]
+        result = vector_memory.semantic_search("dentist thursday", mode="embedding")
+        assert result["match"] == "book the dentist for thursday"
+    finally:
+        embedder.release.set()
+        vector_memory.configure_embedding_index(vector_memory.HashingEmbedder(), path=None)
+
+
+def test_ann_index_reuses_saved_graph_unless_history_is_rewritten():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ann.npz")
+        vector_memory.AnnIndex(CountingEmbedder(), path).rebuild(HISTORY)
+
+        embedder = CountingEmbedder()
+        index = vector_memory.AnnIndex(embedder, path)
+        index.rebuild(HISTORY + ["book the dentist for thursday"])
+        assert embedder.encoded == ["book the dentist for thursday"]
+        assert index.search("dentist thursday")[0][0] == 4
+
+        rewritten = ["water the plants every morning"] + HISTORY[1:] + ["book the dentist for thursday"]
+        embedder = CountingEmbedder()
+        index = vector_memory.AnnIndex(embedder, path)
+        index.rebuild(rewritten)
+        assert embedder.encoded == rewritten
+        assert index.search("water the plants")[0][0] == 0
+
+
+def test_ann_index_catches_up_on_new_turns_in_one_batch():
+    _use_history()
+    embedder = CountingEmbedder()
+    index = vector_memory.configure_ann_index(embedder, path=None)
+    try:
+        vector_memory.semantic_search("tax", mode="ann")
+        memory_system.add_conversation("book the dentist for thursday")
+        memory_system.add_conversation("water the plants every morning")
+        assert index.count == len(HISTORY)
+
+        del embedder.encoded[:]
+        result = vector_memory.semantic_search("dentist thursday", mode="ann")
+        assert result["match"] == "book the dentist for thursday"
+        assert embedder.encoded == ["book the dentist for thursday", "water the plants every morning", "dentist thursday"]
+    finally:
+        vector_memory.configure_ann_index(vector_memory.HashingEmbedder(), path=None)
+
+
+def test_ann_recall_against_brute_force():
+    subjects = ["mom", "alice", "the dentist", "the tax form", "the plumber", "bob", "the landlord", "the gym"]
+    actions = ["call", "email", "pay", "visit", "meet", "text"]
+    days = ["monday", "tuesday", "friday", "sunday", "tomorrow", "next week"]
+    history = [f"{action} {subject} on {day}" for subject in subjects for action in actions for day in days]
+    queries = ["call mom", "pay the tax form friday", "meet alice tomorrow", "text bob next week", "visit the gym"]
+
+    embedder = vector_memory.HashingEmbedder(64)
+    exact = vector_memory.EmbeddingIndex(embedder, path=None)
+    exact.rebuild(history)
+    ann = vector_memory.AnnIndex(embedder, path=None)
+    ann.rebuild(history)
+
+    found = total = 0
+    for query in queries:
+        expected = {doc_id for doc_id, _ in exact.search(query, k=10)}
+        found += len(expected & {doc_id for doc_id, _ in ann.search(query, k=10)})
+        total += len(expected)
+    assert found / total >= 0.9, f"recall {found / total:.2f}"
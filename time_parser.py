@@ -0,0 +1,237 @@
+"""
+Resolve the TIME expressions nlp_engine extracts ("17 feb 2026", "3 pm",
+"tomorrow", "friday") to timezone-aware datetimes.
+
+Parsing is split in two: the text of an expression is parsed once into a
+small, clock-independent spec (memoized, since real traffic repeats the
+same few expressions), and the spec is resolved against a reference time
+with plain date arithmetic (memoized per reference day).
+"""
+
+import os
+import re
+import time as _time
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+
+# IANA zone used when the reference time is naive; default: system local time
+ASSISTANT_TIMEZONE = os.getenv("ASSISTANT_TIMEZONE")
+# Hour "tonight" resolves to
+TONIGHT_HOUR = 20
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6,
+}
+RELATIVE_DAYS = {"yesterday": -1, "today": 0, "tonight": 0, "tomorrow": 1}
+
+# Specs for the one-word expressions, built once
+WORD_SPECS = {
+    **{word: ("relative", offset, TONIGHT_HOUR if word == "tonight" else None)
+       for word, offset in RELATIVE_DAYS.items()},
+    **{word: ("weekday", weekday) for word, weekday in WEEKDAYS.items()},
+}
+
+# One alternative per numeric TIME pattern family in nlp_engine; matched
+# against lowercased text
+EXPRESSION_PATTERN = re.compile(r"""
+      (?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<meridiem>am|pm)  # 3 pm, 10:30 am
+    | (?P<day>\d{1,2})\s+(?P<month>[a-z]+)(?:\s+(?P<year>\d{4}))?     # 17 feb [2026]
+    | (?P<slash_month>\d{1,2})/(?P<slash_day>\d{1,2})/(?P<slash_year>\d{2,4})  # 02/16/2026
+""", re.VERBOSE)
+
+
+@lru_cache(maxsize=None)
+def _zone(name):
+    from zoneinfo import ZoneInfo
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=8)
+def _system_zone(tzname):
+    """ZoneInfo for the system local time, or None if it cannot be found.
+
+    Keyed on time.tzname, which time.tzset() updates, so a change of TZ
+    is picked up once tzset() has been called.
+    """
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+    tz = os.environ.get("TZ")
+    try:
+        if tz:
+            tz = tz.lstrip(":")
+            if os.path.isabs(tz):
+                with open(tz, "rb") as f:
+                    return ZoneInfo.from_file(f)
+            return ZoneInfo(tz)
+        with open("/etc/localtime", "rb") as f:
+            return ZoneInfo.from_file(f)
+    except (OSError, ValueError, ZoneInfoNotFoundError):
+        return None
+
+
+def _reference(now):
+    """(aware reference time, zone to resolve in): now's own zone if it
+    is aware, else ASSISTANT_TIMEZONE if set, else system local time
+    (zone None where it has no ZoneInfo)"""
+    if now is not None and now.tzinfo is not None:
+        return now, now.tzinfo
+    if ASSISTANT_TIMEZONE:
+        zone = _zone(ASSISTANT_TIMEZONE)
+    else:
+        # Reading the clock through a cached ZoneInfo is several times
+        # cheaper than astimezone(), which goes through localtime()
+        zone = _system_zone(_time.tzname)
+    if zone is not None:
+        return (datetime.now(zone) if now is None else now.replace(tzinfo=zone)), zone
+    # astimezone() on a naive datetime treats it as local time
+    return (now or datetime.now()).astimezone(), None
+
+
+def _localize(day, clock, zone):
+    """day at clock in zone, with the UTC offset in force on that day
+    rather than the reference time's (they differ across a DST change)"""
+    moment = datetime.combine(day, clock)
+    if zone is None:
+        return moment.astimezone()
+    return moment.replace(tzinfo=zone)
+
+
+@lru_cache(maxsize=4096)
+def parse_expression(text):
+    """Parse one expression into a clock-independent spec, or None.
+
+    Specs are ("date", year or None, month, day), ("clock", hour, minute),
+    ("relative", day offset, hour) and ("weekday", weekday).
+    """
+    text = text.strip().lower()
+    # Relative days and weekday names are most of the traffic
+    spec = WORD_SPECS.get(text)
+    if spec is not None:
+        return spec
+
+    match = EXPRESSION_PATTERN.fullmatch(text)
+    if match is None:
+        return None
+    hour, minute, meridiem, day, month, year, slash_month, slash_day, slash_year = match.groups()
+
+    if hour:
+        hour = int(hour)
+        minute = int(minute or 0)
+        if not 1 <= hour <= 12 or minute > 59:
+            return None
+        return ("clock", hour % 12 + (12 if meridiem == "pm" else 0), minute)
+
+    if day:
+        month = MONTHS.get(month)
+        if month is None:
+            return None
+        return ("date", int(year) if year else None, month, int(day))
+
+    if slash_month:
+        year = int(slash_year)
+        if len(slash_year) == 2:
+            year += 2000
+        return ("date", year, int(slash_month), int(slash_day))
+    return None
+
+
+def _resolve_date(spec, today):
+    """Calendar date a date-like spec refers to, seen from today; None if invalid"""
+    kind = spec[0]
+    if kind == "relative":
+        return today + timedelta(days=spec[1])
+    if kind == "weekday":
+        # The coming occurrence, today included
+        return today + timedelta(days=(spec[1] - today.weekday()) % 7)
+
+    _, year, month, day = spec
+    # Without a year, the next time this day comes round (up to 8 years
+    # ahead, far enough to reach a 29 feb)
+    years = [year] if year is not None else range(today.year, today.year + 9)
+    for candidate_year in years:
+        try:
+            candidate = date(candidate_year, month, day)
+        except ValueError:
+            continue
+        if year is not None or candidate >= today:
+            return candidate
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _resolve_on(date_spec, clock_spec, today, zone):
+    """The moment date_spec and clock_spec name, seen from today in zone,
+    or None; it depends on the day but not the time of day, so it is
+    memoized like parse_expression"""
+    day = _resolve_date(date_spec, today) if date_spec else today
+    if day is None:
+        return None  # e.g. 31 feb
+    if clock_spec:
+        clock = time(clock_spec[1], clock_spec[2])
+    elif date_spec[0] == "relative" and date_spec[2] is not None:
+        clock = time(date_spec[2])
+    else:
+        clock = time(0)
+    return _localize(day, clock, zone)
+
+
+def resolve_specs(specs, now=None):
+    """Combine parsed specs into one aware datetime, or None.
+
+    The first date-like spec picks the day (default: the reference day,
+    or the next one for a time of day that has already passed) and the
+    first clock spec the time of day (default: midnight, or the evening
+    for "tonight").
+    """
+    date_spec = clock_spec = None
+    for spec in specs:
+        if spec is None:
+            continue
+        if spec[0] == "clock":
+            clock_spec = clock_spec or spec
+        else:
+            date_spec = date_spec or spec
+    if date_spec is None and clock_spec is None:
+        return None
+
+    now, zone = _reference(now)
+    # System local time without a ZoneInfo can change under the cache
+    resolve = _resolve_on if zone is not None else _resolve_on.__wrapped__
+    moment = resolve(date_spec, clock_spec, now.date(), zone)
+    if date_spec is None and moment < now:
+        # A bare "3 pm" said at 4 pm means tomorrow's
+        moment = resolve(WORD_SPECS["tomorrow"], clock_spec, now.date(), zone)
+    return moment
+
+
+def parse_time(text, now=None):
+    """Resolve one TIME expression to an aware datetime, or None"""
+    return resolve_specs([parse_expression(text)], now)
+
+
+def resolve_expressions(texts, now=None):
+    """Resolve the TIME expressions of one utterance together, so
+    "tomorrow" and "3 pm" give tomorrow at 15:00"""
+    return resolve_specs([parse_expression(text) for text in texts], now)
+
+
+def clear_cache():
+    """Forget memoized expressions and resolutions"""
+    parse_expression.cache_clear()
+    _resolve_on.cache_clear()
+    to_timestamp.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def to_timestamp(moment):
+    """Normalized storage form: UTC ISO 8601, which sorts chronologically"""
+    if moment is None:
+        return None
+    return moment.astimezone(timezone.utc).isoformat()
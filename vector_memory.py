@@ -1,38 +1,883 @@
+import copy
+import hashlib
+import heapq
 import json
+import math
 import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import nullcontext
 from difflib import SequenceMatcher
 
+from memory_system import get_conversation_history, get_store
+
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-MEMORY_FILE = os.path.join(SCRIPT_DIR, "memory.json")
+
+# "fuzzy" scans every entry with difflib; "bm25" ranks through an
+# incrementally maintained inverted index; "embedding" ranks by cosine
+# similarity against a matrix of history embeddings; "ann" does the same
+# through an HNSW graph for very large histories.
+RECALL_MODE = os.getenv("RECALL_MODE", "fuzzy")
+
+# Embedding matrix for the "embedding" mode, plus its metadata sidecar.
+# RECALL_EMBEDDER is "hashing" (offline, deterministic) or
+# "sentence_transformers" (all-MiniLM-L6-v2).
+EMBEDDING_FILE = os.path.join(SCRIPT_DIR, "history_embeddings.npy")
+RECALL_EMBEDDER = os.getenv("RECALL_EMBEDDER", "hashing")
+
+# HNSW graph for the "ann" mode. M is links per node, EF_CONSTRUCTION the
+# build-time search width and EF_SEARCH the query-time width: raise them
+# for recall, lower them for latency. On 30k hashed entries
+# (benchmark_ann.py) EF_SEARCH=64 gives recall@10 0.87 at 2.2x brute-force
+# speed, 100 gives 0.91 at 1.6x and 128 gives 0.93 at 1.2x; the pure-Python
+# graph only pays off over exact search on much larger histories.
+ANN_INDEX_FILE = os.path.join(SCRIPT_DIR, "history_ann.npz")
+ANN_M = int(os.getenv("ANN_M", "16"))
+ANN_EF_CONSTRUCTION = int(os.getenv("ANN_EF_CONSTRUCTION", "100"))
+ANN_EF_SEARCH = int(os.getenv("ANN_EF_SEARCH", "100"))
+
+# Number of recent recall results kept per history generation; 0 disables
+RECALL_CACHE_SIZE = int(os.getenv("RECALL_CACHE_SIZE", "256"))
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Very frequent words carry almost no BM25 weight but have the longest
+# posting lists, so they are left out of the index entirely.
+STOP_WORDS = frozenset({
+    "a", "an", "the", "i", "me", "my", "you", "your", "it", "is", "am", "are",
+    "was", "to", "of", "and", "or", "in", "on", "at", "for", "with", "about",
+    "that", "this", "do", "did", "what", "have", "has", "be",
+})
 
 def simple_similarity(a, b):
     """Calculate basic string similarity score"""
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
-def semantic_search(query):
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+class HistoryIndex:
+    """Base for recall indexes kept in step with conversation history.
+
+    sync() snapshots the history under the store's lock but builds or
+    catches up outside it, so memory reads and writes never wait for an
+    index build; the index's own ``lock`` serializes syncs and searches.
+    A full rebuild happens only when the store's history epoch changes
+    (reload from disk, another process writing) or the store itself is
+    replaced; otherwise only the turns appended since are added.
+
+    Cheap indexes (``follow_appends``) also subscribe to the store and add
+    each turn as it is logged. The embedding indexes leave new turns to
+    the next sync instead, so logging a turn never waits for an encode.
+    """
+
+    follow_appends = True
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.RLock()
+        self._store = None
+        self._epoch = None
+        self._following = False
+
+    def reset(self):
+        raise NotImplementedError
+
+    def add(self, text):
+        raise NotImplementedError
+
+    def appended(self):
+        """Called after an incremental add() has been counted"""
+        pass
+
+    def extend(self, texts):
+        """Add turns appended since the last sync"""
+        for text in texts:
+            self.add(text)
+            self.count += 1
+            self.appended()
+
+    def _on_conversation(self, position, text):
+        if self._following and self._epoch == self._store.history_epoch and position == self.count:
+            self.add(text)
+            self.count += 1
+            self.appended()
+
+    def detach(self):
+        """Stop following the current store"""
+        if self._store is not None:
+            with self._store.lock:
+                self._store.unsubscribe(self._on_conversation)
+            self._store = None
+            self._epoch = None
+            self._following = False
+
+    def sync(self, store):
+        """Bring the index up to date with store's conversation history"""
+        with self.lock:
+            with store.lock:
+                if store is not self._store:
+                    self.detach()
+                    if self.follow_appends:
+                        store.subscribe(self._on_conversation)
+                    self._store = store
+            while True:
+                with store.lock:
+                    length = store.history_length()
+                    epoch = store.history_epoch
+                    if epoch == self._epoch and self.count == length:
+                        self._following = True
+                        return
+                    # The listener must leave the index alone while it is
+                    # changed outside the store's lock
+                    self._following = False
+                    if epoch == self._epoch and self.count < length:
+                        history = None
+                        appended = store.get_conversation_entries(range(self.count, length))
+                    else:
+                        history = store.get_conversation_history()
+                if history is None:
+                    self.extend(appended)
+                else:
+                    self.rebuild(history)
+                    self._epoch = epoch
+
+    def rebuild(self, history):
+        self.reset()
+        self.count = 0
+        for text in history:
+            self.add(text)
+            self.count += 1
+
+
+class BM25Index(HistoryIndex):
+    """Inverted index over conversation history with BM25 ranking.
+
+    Postings are per-term lists of doc_ids and term frequencies, appended in
+    doc order and mirrored into NumPy arrays that search() scores in bulk.
+    Each term also tracks its largest tf and shortest document, which give
+    an upper bound on its score contribution; search() uses the bounds to
+    stop admitting new documents once no unseen document can reach the
+    current top k, and only updates the surviving candidates after that.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        super().__init__()
+        self.k1 = k1
+        self.b = b
+        self.reset()
+
+    def reset(self):
+        self.postings = {}
+        self.max_tf = {}
+        self.min_length = {}
+        self.doc_lengths = []
+        self.total_length = 0
+        self._arrays = {}
+
+    def add(self, text):
+        doc_id = len(self.doc_lengths)
+        terms = tokenize(text)
+        length = len(terms)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                self.postings[term] = ([doc_id], [tf])
+                self.max_tf[term] = tf
+                self.min_length[term] = length
+                continue
+            postings[0].append(doc_id)
+            postings[1].append(tf)
+            if tf > self.max_tf[term]:
+                self.max_tf[term] = tf
+            if length < self.min_length[term]:
+                self.min_length[term] = length
+        self.doc_lengths.append(length)
+        self.total_length += length
+
+    def rebuild(self, history):
+        super().rebuild(history)
+        # Mirror every term now rather than on its first query
+        for term in self.postings:
+            self._posting_arrays(term)
+
+    def _posting_arrays(self, term):
+        """(doc_ids, tfs, doc lengths) arrays for term, extended with
+        postings added since the last call"""
+        import numpy as np
+
+        doc_ids, tfs = self.postings[term]
+        cached = self._arrays.get(term)
+        have = 0 if cached is None else len(cached[0])
+        if have == len(doc_ids):
+            return cached
+        doc_lengths = self.doc_lengths
+        tail = (
+            np.array(doc_ids[have:], dtype=np.int64),
+            np.array(tfs[have:], dtype=np.float64),
+            np.array([doc_lengths[doc_id] for doc_id in doc_ids[have:]], dtype=np.float64),
+        )
+        arrays = tail if cached is None else tuple(np.concatenate(pair) for pair in zip(cached, tail))
+        self._arrays[term] = arrays
+        return arrays
+
+    def search(self, query, k=1):
+        """Return up to k (doc_id, score) pairs, best first"""
+        import numpy as np
+
+        n_docs = len(self.doc_lengths)
+        if not n_docs or k <= 0:
+            return []
+
+        k1 = self.k1
+        b = self.b
+        avg_length = (self.total_length / n_docs) or 1.0
+        # Length normalisation k1 * (1 - b + b * length / avg_length)
+        base = k1 * (1 - b)
+        slope = k1 * b / avg_length
+
+        terms = []
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings[0])
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            max_tf = self.max_tf[term]
+            bound = idf * max_tf * (k1 + 1) / (max_tf + base + slope * self.min_length[term])
+            terms.append((bound, idf, term))
+        if not terms:
+            return []
+
+        # Strongest terms first; rest[j] bounds what terms j.. can still add
+        terms.sort(key=lambda t: t[0], reverse=True)
+        rest = [0.0] * (len(terms) + 1)
+        for j in range(len(terms) - 1, -1, -1):
+            rest[j] = rest[j + 1] + terms[j][0]
+
+        # idf > 0, so the documents admitted so far are the nonzero scores
+        scores = np.zeros(n_docs)
+        admitted = []
+        candidates = None
+        for j, (bound, idf, term) in enumerate(terms):
+            if candidates is None and admitted:
+                pool = admitted[0] if len(admitted) == 1 else np.flatnonzero(scores)
+                if len(pool) >= k:
+                    pool_scores = scores[pool]
+                    kth = _kth_largest(pool_scores, k)
+                    if kth > rest[j]:
+                        # No unseen document can reach the top k any more
+                        candidates = pool[pool_scores + rest[j] >= kth]
+
+            ids, tfs, lengths = self._posting_arrays(term)
+            weight = idf * (k1 + 1)
+            if candidates is None:
+                scores[ids] += weight * tfs / (tfs + (base + slope * lengths))
+                admitted.append(ids)
+            elif len(candidates) * 16 > len(ids):
+                # Cheaper to score the whole posting list than to look the
+                # candidates up in it; other documents are ignored below
+                scores[ids] += weight * tfs / (tfs + (base + slope * lengths))
+            else:
+                positions = np.minimum(np.searchsorted(ids, candidates), len(ids) - 1)
+                hit = positions[ids[positions] == candidates]
+                tf = tfs[hit]
+                scores[ids[hit]] += weight * tf / (tf + (base + slope * lengths[hit]))
+
+        if candidates is None:
+            candidates = admitted[0] if len(admitted) == 1 else np.flatnonzero(scores)
+        candidate_scores = scores[candidates]
+        if len(candidates) > k:
+            # Everything above the k-th score, then the lowest doc_ids among
+            # those tied with it (candidates are in doc_id order)
+            kth = _kth_largest(candidate_scores, k)
+            above = np.flatnonzero(candidate_scores > kth)
+            tied = np.flatnonzero(candidate_scores == kth)[:k - len(above)]
+            keep = np.concatenate((above, tied))
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+        order = np.lexsort((candidates, -candidate_scores))
+        return [(int(candidates[i]), float(candidate_scores[i])) for i in order]
+
+
+def _kth_largest(values, k):
+    import numpy as np
+
+    if k == 1:
+        return values.max()
+    return -np.partition(-values, k - 1)[k - 1]
+
+
+# ============= Embedding recall =============
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedder that needs no model download.
+
+    Word unigrams, bigrams and character trigrams are hashed into ``dim``
+    signed buckets and the result is L2-normalised, so cosine similarity
+    rewards shared words and near-identical spellings.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        words = TOKEN_PATTERN.findall(text.lower())
+        features = list(words)
+        features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def encode(self, texts):
+        import numpy as np
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+class SentenceTransformerEmbedder:
+    """Embeds with the INTENT_EMBEDDING_MODEL used by the intent detectors"""
+
+    def __init__(self, model=None):
+        from embedding_cache import model_version
+        from intent_detectors import INTENT_EMBEDDING_MODEL, get_model
+
+        if model is None:
+            # Shares the intent detector's resident model and its embedding cache
+            model = get_model("sentence_transformers")
+        if model is None:
+            raise RuntimeError("Sentence Transformers model is not available")
+        self.model = model
+        self.dim = model.get_sentence_embedding_dimension()
+        # Persisted embeddings are only reused for the same model files
+        self.name = model_version(INTENT_EMBEDDING_MODEL)
+
+    def encode(self, texts):
+        import numpy as np
+
+        embeddings = self.model.encode(
+            list(texts), convert_to_numpy=True, normalize_embeddings=True
+        )
+        return np.asarray(embeddings, dtype=np.float32).reshape(len(texts), self.dim)
+
+
+EMBEDDERS = {
+    "hashing": HashingEmbedder,
+    "sentence_transformers": SentenceTransformerEmbedder,
+}
+
+def create_embedder(name=None):
+    name = name or RECALL_EMBEDDER
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown recall embedder: {name}")
+    return EMBEDDERS[name]()
+
+
+def _chain_digest(digest, text):
+    """Rolling digest of every entry up to and including text, given the
+    digest of the entries before it (None for the first)"""
+    return hashlib.sha1(f"{digest or ''}\0{text}".encode("utf-8")).hexdigest()
+
+def _history_digest(history, count):
+    digest = None
+    for text in history[:count]:
+        digest = _chain_digest(digest, text)
+    return digest
+
+def _read_meta(path):
     try:
-        with open(MEMORY_FILE, "r") as f:
-            memory = json.load(f)
-    except FileNotFoundError:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
         return None
 
-    history = memory.get("conversation_history", [])
+def _write_meta(path, meta):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, path)
 
-    if not history:
-        return None
+def _meta_matches(meta, embedder, history, capacity):
+    """Whether persisted state covering meta["count"] entries fits history"""
+    if not meta:
+        return False
+    count = meta.get("count", 0)
+    return (meta.get("embedder") == embedder.name
+            and meta.get("dim") == embedder.dim
+            and 0 < count <= min(len(history), capacity)
+            and meta.get("history_digest") == _history_digest(history, count))
+
+
+class EmbeddingIndex(HistoryIndex):
+    """One contiguous float32 matrix of normalised history embeddings.
+
+    New turns are encoded in one batch at the next sync.
+
+    With a ``path`` the matrix lives in a memory-mapped .npy file whose
+    row capacity doubles as needed; a JSON sidecar records how many rows
+    are valid, which embedder wrote them and a rolling digest of every
+    embedded entry. On restart, rows that still line up with the history are
+    reused and only newer turns are encoded. Without a path the matrix stays in RAM.
+    """
+
+    follow_appends = False
 
-    # Compute similarity scores using simple string matching
-    scores = [simple_similarity(query, h) for h in history]
+    def __init__(self, embedder=None, path=EMBEDDING_FILE, initial_capacity=1024):
+        super().__init__()
+        self.embedder = embedder if embedder is not None else create_embedder()
+        self.path = path
+        self.meta_path = f"{os.path.splitext(path)[0]}.json" if path else None
+        self.initial_capacity = initial_capacity
+        self.matrix = None
+        self._history_digest = None
 
-    best_index = max(range(len(scores)), key=lambda i: scores[i])
-    best_score = scores[best_index]
+    # ----- storage -----
 
+    def _allocate(self, capacity):
+        import numpy as np
+
+        if not self.path:
+            return np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        tmp_path = f"{self.path}.tmp"
+        matrix = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(capacity, self.embedder.dim)
+        )
+        if self.matrix is not None and self.count:
+            matrix[:self.count] = self.matrix[:self.count]
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, self.path)
+        return np.load(self.path, mmap_mode="r+")
+
+    def _ensure_capacity(self, rows):
+        capacity = 0 if self.matrix is None else self.matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(self.initial_capacity, capacity)
+        while new_capacity < rows:
+            new_capacity *= 2
+        self.matrix = self._allocate(new_capacity)
+
+    def _save_meta(self):
+        if not self.meta_path:
+            return
+        _write_meta(self.meta_path, {
+            "embedder": self.embedder.name,
+            "dim": self.embedder.dim,
+            "count": self.count,
+            "history_digest": self._history_digest,
+        })
+
+    def _reusable_rows(self, history):
+        """How many persisted rows still match the start of history, and
+        the rolling digest of those entries"""
+        import numpy as np
+
+        if not self.path or not os.path.exists(self.path):
+            return 0, None
+        try:
+            matrix = np.load(self.path, mmap_mode="r+")
+        except (OSError, ValueError):
+            return 0, None
+        meta = _read_meta(self.meta_path)
+        if not _meta_matches(meta, self.embedder, history, matrix.shape[0]):
+            return 0, None
+        self.matrix = matrix
+        return meta["count"], meta["history_digest"]
+
+    # ----- HistoryIndex hooks -----
+
+    def reset(self):
+        self.matrix = None
+        self.count = 0
+        self._history_digest = None
+
+    def rebuild(self, history, batch_size=256):
+        self.reset()
+        self.count, self._history_digest = self._reusable_rows(history)
+        self._ensure_capacity(max(len(history), 1))
+        for start in range(self.count, len(history), batch_size):
+            batch = history[start:start + batch_size]
+            self.matrix[start:start + len(batch)] = self.embedder.encode(batch)
+            self.count = start + len(batch)
+            for text in batch:
+                self._history_digest = _chain_digest(self._history_digest, text)
+        self._save_meta()
+
+    def add(self, text):
+        self._ensure_capacity(self.count + 1)
+        self.matrix[self.count] = self.embedder.encode([text])[0]
+        self._history_digest = _chain_digest(self._history_digest, text)
+
+    def extend(self, texts):
+        if not texts:
+            return
+        self._ensure_capacity(self.count + len(texts))
+        self.matrix[self.count:self.count + len(texts)] = self.embedder.encode(texts)
+        for text in texts:
+            self._history_digest = _chain_digest(self._history_digest, text)
+        self.count += len(texts)
+        self._save_meta()
+
+    def search(self, query, k=1):
+        """Return up to k (doc_id, cosine similarity) pairs, best first"""
+        import numpy as np
+
+        if not self.count or k <= 0:
+            return []
+        query_vector = self.embedder.encode([query])[0]
+        scores = self.matrix[:self.count] @ query_vector
+        k = min(k, self.count)
+        if k < self.count:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(self.count)
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+class AnnIndex(HistoryIndex):
+    """HNSW graph over history embeddings for very large histories.
+
+    Uses the same embedders as EmbeddingIndex. The graph is saved to an .npz
+    file after each rebuild and every ``save_every`` appended turns, with the
+    same JSON sidecar scheme, so restarts resume from the saved graph.
+    """
+
+    follow_appends = False
+
+    def __init__(self, embedder=None, path=ANN_INDEX_FILE, M=ANN_M,
+                 ef_construction=ANN_EF_CONSTRUCTION, ef_search=ANN_EF_SEARCH, save_every=1000):
+        super().__init__()
+        self.embedder = embedder if embedder is not None else create_embedder()
+        self.path = path
+        self.meta_path = f"{os.path.splitext(path)[0]}.json" if path else None
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.save_every = save_every
+        self.graph = None
+        self._history_digest = None
+        self._unsaved = 0
+
+    def save(self):
+        if not self.path or self.graph is None:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            self.graph.save(f)
+        os.replace(tmp_path, self.path)
+        _write_meta(self.meta_path, {
+            "embedder": self.embedder.name,
+            "dim": self.embedder.dim,
+            "count": self.count,
+            "history_digest": self._history_digest,
+        })
+        self._unsaved = 0
+
+    def reset(self):
+        from ann_index import HNSWIndex
+
+        self.graph = HNSWIndex(
+            self.embedder.dim, M=self.M,
+            ef_construction=self.ef_construction, ef_search=self.ef_search
+        )
+        self.count = 0
+        self._history_digest = None
+
+    def _load_saved(self, history):
+        from ann_index import HNSWIndex
+
+        if not self.path or not os.path.exists(self.path):
+            return False
+        meta = _read_meta(self.meta_path)
+        if not _meta_matches(meta, self.embedder, history, len(history)):
+            return False
+        try:
+            graph = HNSWIndex.load(self.path)
+        except (OSError, ValueError, KeyError):
+            return False
+        if len(graph) != meta["count"]:
+            return False
+        graph.ef_search = self.ef_search
+        self.graph = graph
+        self.count = len(graph)
+        self._history_digest = meta["history_digest"]
+        return True
+
+    def rebuild(self, history, batch_size=256):
+        if not self._load_saved(history):
+            self.reset()
+        start_count = self.count
+        for start in range(self.count, len(history), batch_size):
+            batch = history[start:start + batch_size]
+            self.graph.add_many(self.embedder.encode(batch))
+            self.count = start + len(batch)
+            for text in batch:
+                self._history_digest = _chain_digest(self._history_digest, text)
+        if self.count != start_count:
+            self.save()
+
+    def add(self, text):
+        self.graph.add(self.embedder.encode([text])[0])
+        self._history_digest = _chain_digest(self._history_digest, text)
+
+    def extend(self, texts):
+        if not texts:
+            return
+        self.graph.add_many(self.embedder.encode(texts))
+        for text in texts:
+            self._history_digest = _chain_digest(self._history_digest, text)
+        self.count += len(texts)
+        self._unsaved += len(texts)
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def search(self, query, k=1, ef=None):
+        """Return up to k (doc_id, cosine similarity) pairs, best first"""
+        if not self.count or k <= 0:
+            return []
+        query_vector = self.embedder.encode([query])[0]
+        return self.graph.search(query_vector, k, ef=ef)
+
+
+_bm25_index = BM25Index()
+_embedding_index = None
+_ann_index = None
+
+def configure_embedding_index(embedder=None, path=EMBEDDING_FILE):
+    """Swap the embedder (or storage path) used by the "embedding" mode"""
+    global _embedding_index
+    if _embedding_index is not None:
+        _embedding_index.detach()
+    _embedding_index = EmbeddingIndex(embedder=embedder, path=path)
+    return _embedding_index
+
+def configure_ann_index(embedder=None, path=ANN_INDEX_FILE, **params):
+    """Swap the embedder, storage path or HNSW parameters of the "ann" mode"""
+    global _ann_index
+    if _ann_index is not None:
+        _ann_index.detach()
+    _ann_index = AnnIndex(embedder=embedder, path=path, **params)
+    return _ann_index
+
+def _recall_result(ranked, entries):
+    """Shape ranked (score, text) pairs into semantic_search's result"""
+    if not ranked:
+        return None
+    matches = [{"match": text, "score": score} for score, text in zip(ranked, entries)]
     return {
-        "match": history[best_index],
-        "score": best_score
+        "match": matches[0]["match"],
+        "score": matches[0]["score"],
+        "matches": matches
     }
 
-    # Save memory
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(memory, f, indent=4)
\ No newline at end of file
+def _indexed_search(index, query, k=1, min_score=0.0):
+    store = get_store()
+    with index.lock:
+        index.sync(store)
+        # Indexes that follow appends are also changed by the store's
+        # writers; the others only by sync(), under the index lock
+        with store.lock if index.follow_appends else nullcontext():
+            hits = [(doc_id, score) for doc_id, score in index.search(query, k) if score >= min_score]
+            entries = store.get_conversation_entries([doc_id for doc_id, _ in hits])
+        return _recall_result([score for _, score in hits], entries)
+
+def embedding_search(query, k=1, min_score=0.0):
+    if _embedding_index is None:
+        configure_embedding_index()
+    return _indexed_search(_embedding_index, query, k, min_score)
+
+def ann_search(query, k=1, min_score=0.0):
+    if _ann_index is None:
+        configure_ann_index()
+    return _indexed_search(_ann_index, query, k, min_score)
+
+def bm25_search(query, k=1, min_score=0.0):
+    return _indexed_search(_bm25_index, query, k, min_score)
+
+def fuzzy_search(query, k=1, min_score=0.0):
+    """Top-k history entries by difflib ratio.
+
+    Scores match simple_similarity exactly. Before paying for ratio(),
+    each entry is checked against difflib's cheap upper bounds
+    (real_quick_ratio from lengths, quick_ratio from character counts);
+    entries that cannot beat the current k-th best or min_score are
+    skipped. A bounded min-heap keeps the best k, earlier entries winning
+    ties as max() did.
+    """
+    try:
+        history = get_conversation_history()
+    except FileNotFoundError:
+        return None
+
+    if not history or k <= 0:
+        return None
+
+    query = query.lower()
+    # Bounds are symmetric, so they use a matcher whose fixed side is the
+    # query (analysed once); ratio() keeps the original query-first order.
+    bounds = SequenceMatcher(None, b=query)
+    matcher = SequenceMatcher(None, a=query)
+    heap = []
+
+    for i, entry in enumerate(history):
+        entry = entry.lower()
+        full = len(heap) >= k
+        floor = heap[0][0] if full else min_score
+
+        bounds.set_seq1(entry)
+        upper = bounds.real_quick_ratio()
+        if upper <= floor if full else upper < floor:
+            continue
+        upper = bounds.quick_ratio()
+        if upper <= floor if full else upper < floor:
+            continue
+
+        matcher.set_seq2(entry)
+        score = matcher.ratio()
+        if full:
+            if score > floor:
+                heapq.heapreplace(heap, (score, -i))
+        elif score >= floor:
+            heapq.heappush(heap, (score, -i))
+
+    ranked = sorted(heap, reverse=True)
+    return _recall_result(
+        [score for score, _ in ranked],
+        [history[-neg_i] for _, neg_i in ranked]
+    )
+
+# ============= Recall result cache =============
+
+class RecallCache:
+    """LRU cache of semantic_search results for one history generation.
+
+    Entries are keyed on the normalised query and search parameters. The
+    cache remembers which store and history generation its entries were
+    computed against and drops all of them as soon as either changes, so
+    a hit is always what a fresh search would return.
+    """
+
+    def __init__(self, maxsize=RECALL_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._owner = None
+        self._lock = threading.Lock()
+
+    def _check_owner(self, owner):
+        """Adopt owner, dropping entries computed for another one; False
+        when owner is an older generation of the current store, whose
+        callers raced a mutation and must not evict newer entries"""
+        if owner == self._owner:
+            return True
+        if self._owner is not None and owner[0] is self._owner[0] and owner[1] < self._owner[1]:
+            return False
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self._owner = owner
+        return True
+
+    def get(self, key, owner):
+        """Return (True, result) on a hit, (False, None) on a miss"""
+        with self._lock:
+            if self._check_owner(owner) and key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(self._entries[key])
+            self.misses += 1
+            return False, None
+
+    def put(self, key, owner, result):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if not self._check_owner(owner):
+                return
+            self._entries[key] = copy.deepcopy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._owner = None
+
+    def info(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+_recall_cache = RecallCache()
+
+def recall_cache_info():
+    """Hit/miss statistics for the semantic_search result cache"""
+    return _recall_cache.info()
+
+def clear_recall_cache():
+    _recall_cache.clear()
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+def _search_uncached(query, k, min_score, mode):
+    indexed = {
+        "bm25": bm25_search,
+        "embedding": embedding_search,
+        "ann": ann_search,
+    }
+    if mode in indexed:
+        try:
+            return indexed[mode](query, k, min_score)
+        except FileNotFoundError:
+            return None
+    return fuzzy_search(query, k, min_score)
+
+def semantic_search(query, k=1, min_score=0.0, mode=None):
+    """Return the best history match plus up to k ranked ``matches``"""
+    mode = mode or RECALL_MODE
+    query = normalize_query(query)
+    if _recall_cache.maxsize <= 0:
+        return _search_uncached(query, k, min_score, mode)
+
+    store = get_store()
+    try:
+        owner = (store, store.history_generation())
+    except FileNotFoundError:
+        return None
+    key = (query, k, min_score, mode)
+    hit, result = _recall_cache.get(key, owner)
+    if hit:
+        return result
+
+    result = _search_uncached(query, k, min_score, mode)
+    _recall_cache.put(key, owner, result)
+    return result